@@ -0,0 +1,67 @@
+"""Benchmarks for the conversion of NetworkX graphs to METIS input."""
+
+import networkx as nx
+
+from nxmetis import metis
+from nxmetis import types
+
+from . import graphs
+
+
+def _convert_graph_reference(G, node_weight, node_size, edge_weight):
+    """The per-node and per-edge conversion used before NumPy arrays were
+    built directly, kept as a baseline.
+    """
+    index = dict(zip(G, list(range(len(G)))))
+    xadj = [0]
+    adjncy = []
+    for u in G:
+        adjncy.extend(index[v] for v in G[u])
+        xadj.append(len(adjncy))
+    vwgt = [G.nodes[u].get(node_weight, 1) for u in G]
+    vsize = [G.nodes[u].get(node_size, 1) for u in G]
+    adjwgt = [G[u][v].get(edge_weight, 1) for u in G for v in G[u]]
+    return xadj, adjncy, vwgt, vsize, adjwgt
+
+
+class ConvertGraph(object):
+    """Convert a weighted square grid graph."""
+
+    params = [10 ** 4, 10 ** 5, 10 ** 6]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        side = int(round(n ** 0.5))
+        self.G = nx.convert_node_labels_to_integers(
+            nx.grid_2d_graph(side, side))
+        for u, data in self.G.nodes(data=True):
+            data['weight'] = u % 3 + 1
+        for u, v, data in self.G.edges(data=True):
+            data['weight'] = (u + v) % 5 + 1
+
+    def time_convert_graph(self, n):
+        types._convert_graph(self.G, 'weight', 'size', 'weight')
+
+    def time_convert_graph_reference(self, n):
+        _convert_graph_reference(self.G, 'weight', 'size', 'weight')
+
+
+class ConvertKinds(object):
+    """Convert unweighted synthetic graphs of several kinds."""
+
+    params = [graphs.KINDS, [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]]
+    param_names = ['kind', 'n']
+    timeout = 600
+
+    def setup(self, kind, n):
+        xadj, adjncy = graphs.make(kind, n)
+        self.G = graphs.to_networkx(xadj, adjncy)
+        self.xadj = xadj.tolist()
+        self.adjncy = adjncy.tolist()
+
+    def time_convert_graph(self, kind, n):
+        types._convert_graph(self.G)
+
+    def time_validate_lists(self, kind, n):
+        metis.convert_graph(self.xadj, self.adjncy)
@@ -0,0 +1,147 @@
+"""Benchmarks for the METIS wrappers and their phases.
+
+Each phase of a call is timed separately, on graphs that skip the NetworkX
+conversion (MetisGraphs built from generated arrays):
+
+- ``time_validate``: validation and self-loop removal of the input arrays,
+- ``time_part_graph``: METIS proper, with its output discarded,
+- ``time_part_graph_captured``: METIS with its output captured; the
+  difference with ``time_part_graph`` is the cost of the capture,
+- ``time_regroup``: grouping the nodes by the parts returned by METIS.
+
+The NetworkX-to-METIS conversion is timed in ``bench_convert``.
+"""
+
+import numpy
+
+import nxmetis
+from nxmetis import metis
+from nxmetis import types
+
+from . import graphs
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+class _MetisBenchmark(object):
+
+    params = [graphs.KINDS, SIZES]
+    param_names = ['kind', 'n']
+    timeout = 3600
+
+    def setup(self, kind, n):
+        self.G = types.MetisGraph.from_arrays(*graphs.make(kind, n))
+
+
+class Functions(_MetisBenchmark):
+    """The high-level functions, end to end on a MetisGraph."""
+
+    def time_partition(self, kind, n):
+        nxmetis.partition(self.G, 16)
+
+    def time_partition_compress(self, kind, n):
+        nxmetis.partition(self.G, 16, compress=True)
+
+    def time_partition_hierarchical(self, kind, n):
+        nxmetis.partition_hierarchical(self.G, [4, 2, 2])
+
+    def time_node_nested_dissection(self, kind, n):
+        nxmetis.node_nested_dissection(self.G)
+
+    def time_vertex_separator(self, kind, n):
+        nxmetis.vertex_separator(self.G)
+
+
+class Phases(_MetisBenchmark):
+    """The phases of a call to nxmetis.partition."""
+
+    nparts = 16
+
+    def setup(self, kind, n):
+        super(Phases, self).setup(kind, n)
+        self.xadj = numpy.array(self.G.xadj)
+        self.adjncy = numpy.array(self.G.adjncy)
+        rng = numpy.random.RandomState(0)
+        self.part = rng.randint(self.nparts, size=len(self.G)).astype(
+            self.G.xadj.dtype)
+
+    def time_validate(self, kind, n):
+        metis.convert_graph(self.xadj, self.adjncy)
+
+    def time_part_graph(self, kind, n):
+        metis.part_graph(self.G.xadj, self.G.adjncy, self.nparts,
+                         return_array=True, capture_output=False)
+
+    def time_part_graph_captured(self, kind, n):
+        metis.part_graph(self.G.xadj, self.G.adjncy, self.nparts,
+                         return_array=True, capture_output=True)
+
+    def time_compress_graph(self, kind, n):
+        metis.compress_graph(self.G.xadj, self.G.adjncy)
+
+    def time_node_nd(self, kind, n):
+        metis.node_nd(self.G.xadj, self.G.adjncy, return_array=True,
+                      capture_output=False)
+
+    def time_node_nd_tree(self, kind, n):
+        metis.node_nd(self.G.xadj, self.G.adjncy, return_array=True,
+                      capture_output=False, return_tree=True)
+
+    def time_compute_vertex_separator(self, kind, n):
+        metis.compute_vertex_separator(self.G.xadj, self.G.adjncy,
+                                       return_array=True,
+                                       capture_output=False)
+
+    def time_regroup(self, kind, n):
+        nxmetis._regroup(self.G.nodes, self.part, self.nparts)
+
+    def time_evaluate(self, kind, n):
+        metis.evaluate_partition(self.G.xadj, self.G.adjncy, self.part,
+                                 self.nparts)
+
+    def time_regroup_dict(self, kind, n):
+        nxmetis._format_parts(self.G.nodes, self.part, self.nparts, 'dict')
+
+
+class Repartition(_MetisBenchmark):
+    """Refinement of an existing partitioning against a fresh one."""
+
+    nparts = 16
+
+    def setup(self, kind, n):
+        super(Repartition, self).setup(kind, n)
+        self.part = metis.part_graph(self.G.xadj, self.G.adjncy, self.nparts,
+                                     return_array=True)[1]
+
+    def time_part_graph(self, kind, n):
+        metis.part_graph(self.G.xadj, self.G.adjncy, self.nparts,
+                         return_array=True)
+
+    def time_refine_graph(self, kind, n):
+        metis.refine_graph(self.G.xadj, self.G.adjncy, self.part,
+                           self.nparts, return_array=True)
+
+
+class IdxWidth(_MetisBenchmark):
+    """METIS built with 32-bit and 64-bit idx_t, on the same graphs."""
+
+    params = [graphs.KINDS, SIZES, ['int32', 'int64']]
+    param_names = ['kind', 'n', 'dtype']
+    nparts = 16
+
+    def setup(self, kind, n, dtype):
+        xadj, adjncy = graphs.make(kind, n)
+        self.xadj = xadj.astype(dtype)
+        self.adjncy = adjncy.astype(dtype)
+        # The build is selected by the width of the output buffer.
+        self.out = numpy.empty(len(xadj) - 1, dtype=dtype)
+        self.iperm = numpy.empty(len(xadj) - 1, dtype=dtype)
+
+    def time_part_graph(self, kind, n, dtype):
+        metis.part_graph(self.xadj, self.adjncy, self.nparts, out=self.out)
+
+    def peakmem_part_graph(self, kind, n, dtype):
+        metis.part_graph(self.xadj, self.adjncy, self.nparts, out=self.out)
+
+    def time_node_nd(self, kind, n, dtype):
+        metis.node_nd(self.xadj, self.adjncy, out=(self.out, self.iperm))
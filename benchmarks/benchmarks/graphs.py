@@ -0,0 +1,109 @@
+"""Synthetic graphs for the benchmarks.
+
+The graphs are generated directly as adjacency structures with NumPy, so that
+graphs with millions of vertices can be built in seconds. Building the
+largest graphs (10 ** 7 vertices) takes several gigabytes of memory.
+"""
+
+import networkx as nx
+import numpy
+
+from nxmetis import metis
+
+KINDS = ['grid', 'geometric', 'power_law', 'mesh_dual']
+
+
+def _from_edges(n, u, v):
+    """Build the adjacency structure of an undirected graph from its edges."""
+    u, v = numpy.concatenate([u, v]), numpy.concatenate([v, u])
+    order = numpy.argsort(u, kind='stable')
+    xadj = numpy.zeros(n + 1, dtype=numpy.intp)
+    numpy.cumsum(numpy.bincount(u, minlength=n), out=xadj[1:])
+    return xadj, v[order].astype(numpy.intp)
+
+
+def _unique_edges(n, u, v):
+    """Remove self-loops and parallel edges."""
+    u, v = numpy.minimum(u, v), numpy.maximum(u, v)
+    key = numpy.unique(u[u != v].astype(numpy.int64) * n + v[u != v])
+    return key // n, key % n
+
+
+def grid(n):
+    """Square grid graph with about n vertices."""
+    side = max(int(round(n ** 0.5)), 2)
+    ids = numpy.arange(side * side).reshape(side, side)
+    u = numpy.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    v = numpy.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    return _from_edges(side * side, u, v)
+
+
+def geometric(n, degree=8, seed=0):
+    """Random geometric graph on n points in the unit square, with the given
+    expected degree.
+    """
+    rng = numpy.random.RandomState(seed)
+    radius = (degree / (numpy.pi * n)) ** 0.5
+    ncells = max(int(1 / radius), 1)
+    points = rng.random_sample((n, 2))
+    cells = numpy.minimum((points * ncells).astype(numpy.intp), ncells - 1)
+    cell = cells[:, 0] * ncells + cells[:, 1]
+    # Number the points cell by cell so that each cell is a range.
+    order = numpy.argsort(cell, kind='stable')
+    points, cells, cell = points[order], cells[order], cell[order]
+    start = numpy.searchsorted(cell, numpy.arange(ncells * ncells + 1))
+
+    us, vs = [], []
+    for dx, dy in [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]:
+        x, y = cells[:, 0] + dx, cells[:, 1] + dy
+        src = numpy.flatnonzero((x < ncells) & (y >= 0) & (y < ncells))
+        other = x[src] * ncells + y[src]
+        count = start[other + 1] - start[other]
+        offset = numpy.cumsum(count) - count
+        dst = (numpy.repeat(start[other] - offset, count) +
+               numpy.arange(count.sum()))
+        src = numpy.repeat(src, count)
+        close = ((points[src] - points[dst]) ** 2).sum(axis=1) < radius ** 2
+        if (dx, dy) == (0, 0):
+            close &= src < dst
+        us.append(src[close])
+        vs.append(dst[close])
+    return _from_edges(n, numpy.concatenate(us), numpy.concatenate(vs))
+
+
+def power_law(n, degree=8, exponent=2.5, seed=0):
+    """Chung-Lu random graph with a power-law degree distribution and the
+    given expected degree.
+    """
+    rng = numpy.random.RandomState(seed)
+    weights = numpy.arange(1, n + 1) ** (-1.0 / (exponent - 1))
+    weights /= weights.sum()
+    u = rng.choice(n, n * degree // 2, p=weights)
+    v = rng.choice(n, n * degree // 2, p=weights)
+    return _from_edges(n, *_unique_edges(n, u, v))
+
+
+def mesh_dual(n):
+    """Dual graph of a triangulated square with about n triangles."""
+    side = max(int(round((n / 2.0) ** 0.5)), 1) + 1
+    ids = numpy.arange(side * side).reshape(side, side)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, 1:].ravel(), ids[1:, :-1].ravel()
+    eind = numpy.concatenate([numpy.stack([a, b, c], axis=1),
+                              numpy.stack([a, c, d], axis=1)]).ravel()
+    eptr = numpy.arange(0, len(eind) + 1, 3)
+    return metis.mesh_to_dual(eptr, eind, ncommon=2, return_array=True)
+
+
+def make(kind, n):
+    """Return the adjacency structure of a synthetic graph."""
+    return globals()[kind](n)
+
+
+def to_networkx(xadj, adjncy):
+    """Convert an adjacency structure to a NetworkX graph."""
+    G = nx.Graph()
+    G.add_nodes_from(range(len(xadj) - 1))
+    u = numpy.repeat(numpy.arange(len(xadj) - 1), numpy.diff(xadj))
+    G.add_edges_from(zip(u.tolist(), adjncy.tolist()))
+    return G
@@ -7,49 +7,148 @@
 Wrappers of METIS graph partitioning functions.
 """
 
-import contextlib
+import collections
+import concurrent.futures
+import copy
 import decorator
+import heapq
 import itertools
 import sys
 
 import networkx as nx
+import numpy
 import six
 
+from nxmetis import cache as _cache
 from nxmetis import enums
 from nxmetis import exceptions
 from nxmetis import metis
+from nxmetis import readwrite
 from nxmetis import types
 
-__all__ = ['node_nested_dissection', 'partition', 'vertex_separator',
-           'MetisOptions']
+__all__ = ['node_nested_dissection', 'partition', 'partition_hierarchical',
+           'repartition', 'vertex_separator',
+           'evaluate', 'read_csr', 'read_metis_graph', 'MetisCache',
+           'MetisGraph', 'MetisMetrics', 'MetisOptions', 'MetisStats']
 
+MetisCache = _cache.MetisCache
+MetisGraph = types.MetisGraph
+MetisMetrics = types.MetisMetrics
 MetisOptions = types.MetisOptions
+MetisStats = types.MetisStats
+read_csr = readwrite.read_csr
+read_metis_graph = readwrite.read_metis_graph
+
+
+def _metis_graph(G, node_weight=None, node_size=None, edge_weight=None):
+    """Return G if it is a MetisGraph, or convert it to one."""
+    if isinstance(G, MetisGraph):
+        return G
+    return MetisGraph(G, node_weight, node_size, edge_weight)
+
+
+def _compress_graph(G, targets, ubvec):
+    """Return the graph of the super-vertices merging the twin vertices of a
+    MetisGraph and the super-vertex of each vertex, or G and None if it has
+    no twins.
+
+    The super-vertices weigh at most ``ubvec - 1`` times the smallest of the
+    ``targets`` fractions of the total weight, for each constraint, so that
+    the imbalance that one of them can cause stays within the tolerance.
+    """
+    if len(G) == 0:
+        return G, None
+    if G.vwgt is None:
+        totals = numpy.array([len(G)])
+    else:
+        totals = numpy.reshape(G.vwgt, (len(G), -1)).sum(axis=0)
+    targets = numpy.reshape(targets, (-1, len(totals))).min(axis=0)
+    maxvwgt = numpy.floor(totals * targets *
+                          (numpy.asarray(ubvec, dtype=float) - 1))
+    cmap, xadj, adjncy, vwgt, vsize, adjwgt = metis.compress_graph(
+        G.xadj, G.adjncy, G.vwgt, G.vsize, G.adjwgt,
+        maxvwgt.astype(numpy.int64))
+    if len(xadj) == len(G.xadj):
+        return G, None
+    if G.vwgt is not None and numpy.ndim(G.vwgt) == 2:
+        vwgt = vwgt.reshape(len(xadj) - 1, -1)
+    return MetisGraph.from_arrays(xadj, adjncy, vwgt, vsize, adjwgt), cmap
+
+
+def _tolerances(ubvec, options, ncon, default_ufactor):
+    """Return the load imbalance tolerance of each constraint, as METIS sets
+    it from ubvec or from the ufactor option in ``SetupCtrl``.
+    """
+    if ubvec is not None:
+        return list(ubvec)
+    ufactor = -1 if options is None else options.ufactor
+    if ufactor == -1:
+        ufactor = default_ufactor
+    return [1 + 0.001 * ufactor] * ncon
 
 
-@contextlib.contextmanager
 def _zero_numbering(options):
-    """Temporarily force zero-based numbering."""
-    if options:
-        numbering = options.numbering
-        options.numbering = enums.MetisNumbering.zero
-    try:
-        yield
-    finally:
-        if options:
-            options.numbering = numbering
-
-
-def _convert_graph(G):
-    """Convert a graph to the numbered adjacency list structure expected by
-    METIS.
+    """Return a copy of options with zero-based numbering forced. The options
+    passed in are left untouched so that they can be shared between threads.
     """
-    index = dict(zip(G, list(range(len(G)))))
-    xadj = [0]
-    adjncy = []
-    for u in G:
-        adjncy.extend(index[v] for v in G[u])
-        xadj.append(len(adjncy))
-    return xadj, adjncy
+    if options is None:
+        return None
+    options = copy.copy(options)
+    options.numbering = enums.MetisNumbering.zero
+    return options
+
+
+# Forms of the partitionings returned, see partition
+_OUTPUTS = ('lists', 'dict', 'array')
+
+
+def _check_output(output):
+    if output not in _OUTPUTS:
+        raise nx.NetworkXError(
+            "output is not one of 'lists', 'dict' or 'array'.")
+
+
+def _labels(nodes, indices):
+    """Return the list of the nodes at an array of indices."""
+    indices = indices.tolist()
+    if isinstance(nodes, range) and nodes == range(len(nodes)):
+        return indices
+    return list(map(nodes.__getitem__, indices))
+
+
+def _regroup(nodes, part, nparts):
+    """Group nodes into lists by their part numbers."""
+    if isinstance(nodes, range) and nodes == range(len(nodes)):
+        order, starts = metis.group_vertices(part, nparts)
+        return [order[starts[i]:starts[i + 1]].tolist()
+                for i in range(nparts)]
+    return metis.group_nodes(nodes, part, nparts)
+
+
+def _format_parts(nodes, part, nparts, output):
+    """Return a partition vector in the form requested by ``output``."""
+    if output == 'dict':
+        return dict(zip(nodes, part.tolist()))
+    if output == 'array':
+        # Copied so that results held in a MetisCache cannot be modified.
+        return part.copy()
+    return _regroup(nodes, part, nparts)
+
+
+def _flatten_tpwgts(tpwgts, ubvec, nparts):
+    """Check the shape of the target part weights and flatten them."""
+    if tpwgts is None:
+        return None
+    if len(tpwgts) != nparts:
+        raise nx.NetworkXError('length of tpwgts is not equal to nparts.')
+    ncon = len(tpwgts[0])
+    if any(len(tpwgts[j]) != ncon for j in range(1, nparts)):
+        raise nx.NetworkXError(
+            'lists in tpwgts are not of the same length.')
+    if ubvec is not None and len(ubvec) != ncon:
+        raise nx.NetworkXError(
+            'ubvec is not of the same length as tpwgts.')
+    return list(itertools.chain.from_iterable(tpwgts))
 
 
 def _convert_exceptions(convert_type, catch_types=None):
@@ -81,10 +180,8 @@ def _convert_exceptions(convert_type, catch_types=None):
     def _convert_exceptions(func, *args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except catch_types as e:
-            exc = e
         except Exception as e:
-            if catch_types is not None:
+            if catch_types is not None and not isinstance(e, catch_types):
                 raise
             exc = sys.exc_info()
         six.reraise(convert_type, convert_type(exc[1]), exc[2])
@@ -95,50 +192,90 @@ def _convert_exceptions(convert_type, catch_types=None):
 @nx.utils.not_implemented_for('multigraph')
 @_convert_exceptions(
     nx.NetworkXError, (ValueError, TypeError, exceptions.MetisError))
-def node_nested_dissection(G, weight='weight', options=None):
+def node_nested_dissection(G, weight='weight', options=None, stats=None,
+                           return_tree=False, cache=None):
     """Compute a node ordering of a graph that reduces fill when the Laplacian
     matrix of the graph is LU factorized. The algorithm aims to minimize the
     sum of weights of vertices in separators computed in the process.
 
     Parameters
     ----------
-    G : NetworkX graph
+    G : NetworkX graph or MetisGraph
         A graph.
 
     weight : object, optional
         The data key used to determine the weight of each node. If None, each
-        node has unit weight. Default value: 'weight'.
+        node has unit weight. Ignored if G is a MetisGraph. Default value:
+        'weight'.
 
     options : MetisOptions, optional
         METIS options. If None, the default options are used. Default value:
         None.
 
+    stats : MetisStats, optional
+        If not None, it is filled with the timing, memory and coarsening
+        statistics of the METIS run. Default value: None.
+
+    return_tree : bool, optional
+        If True, the separator tree of the nested dissection is also returned,
+        so that the elimination tree does not have to be rebuilt from the
+        ordering. Default value: False.
+
+    cache : MetisCache, optional
+        If not None, the result is looked up in this cache before running
+        METIS, and stored in it afterwards. ``stats`` is left untouched when
+        the result is found in the cache. Default value: None.
+
     Returns
     -------
     perm : list of nodes
         The node ordering.
 
+    tree : list of lists of four ints
+        Only returned if ``return_tree`` is True. The nodes of the separator
+        tree in pre-order, each given as ``[first, sep, last, parent]``.
+        ``perm[first:last]`` are the nodes of the subtree of the node, and
+        ``perm[sep:last]`` its own nodes: a separator, ordered after the
+        subtrees of its children, or the nodes of a leaf, for which
+        ``sep == first``. ``parent`` is the index of the parent node in the
+        list, or -1 for the root. Disjoint subtrees can be factored
+        independently.
+
     Raises
     ------
     NetworkXError
         If the parameters cannot be converted to valid METIS input format, or
         METIS returns an error status.
+
+    Notes
+    -----
+    This function is thread-safe. METIS runs with the GIL released, so calls
+    from several threads proceed in parallel.
     """
     if len(G) == 0:
-        return []
-
-    vwgt = [G.nodes[u].get(weight, 1) for u in G]
-    if all(w == 1 for w in vwgt):
-        vwgt = None
-
-    xadj, adjncy = _convert_graph(G)
-
-    with _zero_numbering(options):
-        perm = metis.node_nd(xadj, adjncy, vwgt, options)[0]
-
-    nodes = list(G)
-    perm = [nodes[i] for i in perm]
-
+        return ([], []) if return_tree else []
+
+    G = _metis_graph(G, node_weight=weight)
+
+    options = _zero_numbering(options)
+    result = None
+    if cache is not None:
+        key = cache._key(G, 'node_nested_dissection', options,
+                         bool(return_tree))
+        result = cache._get(key)
+    if result is None:
+        result = metis.node_nd(G.xadj, G.adjncy, G.vwgt, options,
+                               return_array=True, stats=stats,
+                               return_tree=return_tree)
+        # The inverse permutation is not needed.
+        result = result[:1] + result[2:]
+        if cache is not None:
+            cache._put(key, result)
+
+    perm = _labels(G.nodes, result[0])
+
+    if return_tree:
+        return perm, result[1].tolist()
     return perm
 
 
@@ -148,21 +285,27 @@ def node_nested_dissection(G, weight='weight', options=None):
     nx.NetworkXError, (ValueError, TypeError, exceptions.MetisError))
 def partition(G, nparts, node_weight='weight', node_size='size',
               edge_weight='weight', tpwgts=None, ubvec=None, options=None,
-              recursive=False):
+              recursive=False, trials=1, n_jobs=None, return_trials=False,
+              stats=None, cache=None, output='lists', metrics=None,
+              split_components=False, compress=False):
     """Partition a graph using multilevel recursive bisection or multilevel
     multiway partitioning.
 
     Parameters
     ----------
-    G : NetworkX graph
+    G : NetworkX graph or MetisGraph
         An undirected graph.
 
     nparts : int
         Number of parts to partition the graph. It should be at least 2.
 
-    node_weight : object, optional
+    node_weight : object, list or NumPy array, optional
         The data key used to determine the weight of each node. If None, each
-        node has unit weight. Default value: 'weight'.
+        node has unit weight. For partitioning with several balancing
+        constraints, a list of data keys, one per constraint, or an array of
+        shape ``(n, ncon)`` whose rows are the weights of the nodes in the
+        order of ``G``. Missing data values count as one. Ignored if G is a
+        MetisGraph. Default value: 'weight'.
 
     node_size : object, optional
         The data key used to determine the size of each node when computing the
@@ -173,6 +316,9 @@ def partition(G, nparts, node_weight='weight', node_size='size',
         The data key used to determine the weight of each edge. If None, each
         edge has unit weight. Default value: 'weight'.
 
+        The data keys are ignored if G is a MetisGraph, which carries the
+        weights it was built with.
+
     tpwgts : list of lists of floats, optional
         The target weights of the partitions and the constraints. The target
         weight of the `i`-th partition and the `j`-th constraint is given by
@@ -198,6 +344,68 @@ def partition(G, nparts, node_weight='weight', node_size='size',
         If True, multilevel recursive bisection is used. Otherwise, multileve
         multilevel multiway partitioning is used. Default value: False.
 
+    trials : int, optional
+        Number of times METIS is run, each time with a different random seed,
+        to return the partitioning with the lowest objective value. Trial `i`
+        uses seed ``options.seed + i``, with the default seed of -1 taken as
+        0. The trials share a single conversion of the graph. Default value:
+        1.
+
+    n_jobs : int, optional
+        Maximum number of threads running trials in parallel. If None, the
+        default of ``concurrent.futures.ThreadPoolExecutor`` is used. Default
+        value: None.
+
+    return_trials : bool, optional
+        If True, also return the seed and the objective value of each trial.
+        Default value: False.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the timing, memory and coarsening
+        statistics of the METIS run, or of the best trial if there are
+        several. Default value: None.
+
+    cache : MetisCache, optional
+        If not None, the result is looked up in this cache before running
+        METIS, and stored in it afterwards. ``stats`` is left untouched when
+        the result is found in the cache. Default value: None.
+
+    output : string, optional
+        Form of the partitioning returned: 'lists' for the lists of the nodes
+        of each part, 'dict' for a dict mapping each node to its part, or
+        'array' for a NumPy array holding the part of each node in the order
+        of ``G``. The array is the partition vector of METIS, so it is the
+        fastest to return for large graphs. Default value: 'lists'.
+
+    metrics : MetisMetrics, optional
+        If not None, it is filled with the quality metrics of the
+        partitioning, as computed by :func:`evaluate`. Default value: None.
+
+    split_components : bool, optional
+        If True and the graph is not connected, its connected components are
+        assigned to parts whole, largest first, each to the part furthest
+        below its target weight. Only the components that fit in no part are
+        partitioned by METIS, in parallel on up to ``n_jobs`` threads, among
+        the parts with the most room left and in proportion to it. This is
+        much faster than partitioning the whole graph when it has many small
+        components, and never cuts the components that fit in a part.
+        ``trials`` must be 1, and ``stats`` is left untouched. Default value:
+        False.
+
+    compress : bool, optional
+        If True, the nodes with the same neighbors besides each other, joined
+        by edges of the same weights, are merged into super-nodes before
+        partitioning, and each node is given the part of its super-node. The
+        weights and sizes of a super-node and of its edges are the sums of
+        those of its nodes, so the edge-cut, the communication volume and the
+        part weights are those of the partitioning of ``G``. This shrinks
+        graphs with many such twins, as found with replicated services. A
+        super-node weighs at most ``ubvec - 1`` times the smallest target
+        weight of a part, with the default tolerance of METIS if ``ubvec`` is
+        None, so that it cannot upset the balance; the twins beyond that
+        weight, such as many isolated nodes or leaves of one hub, are merged
+        into several super-nodes. Default value: False.
+
     Returns
     -------
     objval : int
@@ -205,8 +413,12 @@ def partition(G, nparts, node_weight='weight', node_size='size',
         solution. The value returned depends on the partitioining's objective
         function.
 
-    parts : lists of nodes
-        The partitioning.
+    parts : lists of nodes, dict or NumPy array
+        The partitioning, in the form given by ``output``.
+
+    trials : list of pairs of ints
+        The ``(seed, objval)`` pair of each trial, in the order of the seeds.
+        Only returned if ``return_trials`` is True.
 
     Raises
     ------
@@ -216,99 +428,695 @@ def partition(G, nparts, node_weight='weight', node_size='size',
     NetworkXError
         If the parameters cannot be converted to valid METIS input format, or
         METIS returns an error status.
+
+    Notes
+    -----
+    This function is thread-safe. METIS runs with the GIL released, so calls
+    from several threads proceed in parallel.
     """
     if nparts < 1:
         raise nx.NetworkXError('nparts is less than one.')
-    if nparts == 1:
-        return 0, [list(G)]
+    if trials < 1:
+        raise nx.NetworkXError('trials is less than one.')
+    if split_components and trials > 1:
+        raise nx.NetworkXError('split_components is only supported with a '
+                               'single trial.')
+    _check_output(output)
+
+    if options is None:
+        options = MetisOptions()
+    seed = max(options.seed, 0) if trials > 1 else options.seed
+    seeds = list(range(seed, seed + trials))
+
+    if nparts == 1 or len(G) == 0:
+        nodes = list(G)
+        part = numpy.zeros(len(nodes), dtype=metis.idx_dtype(len(nodes) + 1))
+        if metrics is not None:
+            _fill_metrics(metrics, _metis_graph(G, node_weight, node_size,
+                                                edge_weight), part, nparts)
+        result = 0, _format_parts(nodes, part, nparts, output)
+        if return_trials:
+            result += ([(seed, 0) for seed in seeds],)
+        return result
+
+    G = _metis_graph(G, node_weight, node_size, edge_weight)
+
+    tpwgts = _flatten_tpwgts(tpwgts, ubvec, nparts)
+
+    options = _zero_numbering(options)
+
+    if cache is not None:
+        key = cache._key(G, 'partition', nparts, tpwgts, ubvec, options,
+                         bool(recursive), seeds, bool(split_components),
+                         bool(compress))
+        value = cache._get(key)
+        if value is not None:
+            objvals, part = value
+            return _partition_result(G, nparts, seeds, objvals.tolist(), part,
+                                     return_trials, output, metrics, tpwgts)
+
+    if compress:
+        ncon = 1 if numpy.ndim(G.vwgt) < 2 else numpy.shape(G.vwgt)[1]
+        # The defaults of ufactor of METIS for each kind of partitioning
+        if not recursive:
+            ufactor = 30
+        else:
+            ufactor = 1 if ncon == 1 else 10
+        H, cmap = _compress_graph(
+            G, [1.0 / nparts] if tpwgts is None else tpwgts,
+            _tolerances(ubvec, options, ncon, ufactor))
+    else:
+        H, cmap = G, None
+
+    def part_graph(seed):
+        trial_options = copy.copy(options)
+        trial_options.seed = seed
+        trial_stats = None if stats is None else MetisStats()
+        objval, part = metis.part_graph(
+            H.xadj, H.adjncy, nparts, H.vwgt, H.vsize, H.adjwgt, tpwgts,
+            ubvec, trial_options, recursive, return_array=True,
+            stats=trial_stats)
+        return objval, part, trial_stats
+
+    result = None
+    if split_components:
+        result = _partition_components(H, nparts, tpwgts, ubvec, options,
+                                       recursive, n_jobs)
+    if result is not None:
+        objval, part = result
+        objvals = [objval]
+    else:
+        if trials == 1:
+            results = [part_graph(seeds[0])]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=n_jobs) as pool:
+                results = list(pool.map(part_graph, seeds))
+        objval, part, trial_stats = min(results,
+                                        key=lambda result: result[0])
+        if stats is not None:
+            vars(stats).update(vars(trial_stats))
+        objvals = [result[0] for result in results]
+    if cmap is not None:
+        part = part[cmap]
+
+    if cache is not None:
+        cache._put(key, (numpy.array(objvals), part))
+
+    return _partition_result(G, nparts, seeds, objvals, part, return_trials,
+                             output, metrics, tpwgts)
+
+
+def _partition_result(G, nparts, seeds, objvals, part, return_trials,
+                      output, metrics, tpwgts):
+    """Return the result of partition from the objective values of the
+    trials and the partition vector of the best one.
+    """
+    if metrics is not None:
+        _fill_metrics(metrics, G, part, nparts, tpwgts)
+    parts = _format_parts(G.nodes, part, nparts, output)
+    if return_trials:
+        return min(objvals), parts, list(zip(seeds, objvals))
+    return min(objvals), parts
+
+
+def _pack_components(loads, targets, ub):
+    """Assign components to parts by their loads, largest first, each to the
+    part with the most room left. Components that do not fit in any part are
+    split among the parts with the most room.
 
+    Returns
+    -------
+    comp_part : NumPy array
+        The part of each component, or -1 for the components to split.
+
+    splits : list of tuples
+        For each component to split, ``(c, parts, fractions)`` where the
+        ``fractions`` of the load of component ``c`` go to ``parts``.
+    """
+    nparts = len(targets)
+    rooms = targets.copy()
+    heap = [(-rooms[p], p) for p in range(nparts)]
+    heapq.heapify(heap)
+    comp_part = numpy.full(len(loads), -1, dtype=numpy.int64)
+    splits = []
+    order = numpy.argsort(-loads, kind='stable')
+    # Components below this load cannot unbalance a part by themselves.
+    nlarge = int(numpy.count_nonzero(loads > targets.min() * (ub - 1) / 2))
+    for c in order[:nlarge].tolist():
+        load = loads[c]
+        room, p = heap[0]
+        if load <= -room + targets[p] * (ub - 1):
+            comp_part[c] = p
+            rooms[p] -= load
+            heapq.heapreplace(heap, (-rooms[p], p))
+            continue
+
+        by_room = numpy.argsort(-rooms, kind='stable')
+        avail = numpy.maximum(rooms[by_room], 0)
+        cum = numpy.cumsum(avail)
+        if cum[-1] >= load:
+            m = int(numpy.searchsorted(cum, load)) + 1
+            parts = by_room[:m]
+            fractions = avail[:m].copy()
+            fractions[-1] = load - (cum[m - 2] if m > 1 else 0)
+        else:
+            # Overload all the parts in proportion to their targets.
+            parts = by_room
+            fractions = avail + (load - cum[-1]) * targets[by_room]
+        if len(parts) == 1:
+            comp_part[c] = parts[0]
+        else:
+            splits.append((c, parts, fractions / load))
+        rooms[parts] -= fractions
+        heap = [(-rooms[p], p) for p in range(nparts)]
+        heapq.heapify(heap)
+
+    # Fill the room left in the parts with the small components in turn,
+    # each going to the part in which its middle falls.
+    small = order[nlarge:]
+    if len(small):
+        small_loads = loads[small]
+        total = small_loads.sum()
+        rooms = numpy.maximum(rooms, 0)
+        if rooms.sum() < total:
+            rooms += (total - rooms.sum()) * targets
+        bounds = numpy.cumsum(rooms) * (total / rooms.sum())
+        middles = numpy.cumsum(small_loads) - small_loads / 2
+        comp_part[small] = numpy.minimum(
+            numpy.searchsorted(bounds, middles, side='right'), nparts - 1)
+    return comp_part, splits
+
+
+def _partition_components(G, nparts, tpwgts, ubvec, options, recursive,
+                          n_jobs):
+    """Partition a graph component by component. Return None if the graph is
+    connected.
+    """
+    ncomps, comp = metis.connected_components(G.xadj, G.adjncy)
+    if ncomps == 1:
+        return None
+
+    n = len(G)
+    if G.vwgt is None:
+        vwgt = numpy.ones((n, 1))
+    else:
+        vwgt = numpy.asarray(G.vwgt).reshape(n, -1)
+    ncon = vwgt.shape[1]
+    cwgts = numpy.stack([numpy.bincount(comp, vwgt[:, j], minlength=ncomps)
+                         for j in range(ncon)], axis=1)
+    totals = cwgts.sum(axis=0)
+    totals[totals == 0] = 1
+    # The constraints are packed together, each normalized by its total.
+    loads = (cwgts / totals).mean(axis=1)
+    if tpwgts is None:
+        targets = numpy.full(nparts, 1.0 / nparts)
+    else:
+        targets = numpy.reshape(tpwgts, (nparts, -1)).mean(axis=1)
+    if ubvec is None:
+        ub = 1.001 if ncon == 1 else 1.01
+    else:
+        ub = min(ubvec)
+
+    comp_part, splits = _pack_components(loads, targets, ub)
+    part = comp_part[comp].astype(G.xadj.dtype)
+    if not splits:
+        return 0, part
+
+    # Extract the components to split at once, in groups 1 to len(splits).
+    group = numpy.zeros(ncomps, dtype=G.xadj.dtype)
+    group[[c for c, parts, fractions in splits]] = numpy.arange(
+        1, len(splits) + 1)
+    subgraphs = metis.split_graph(G.xadj, G.adjncy, group[comp],
+                                  len(splits) + 1, G.vwgt, G.vsize,
+                                  G.adjwgt)[1:]
+
+    def part_graph(args):
+        (c, parts, fractions), subgraph = args
+        vertices, xadj, adjncy, vwgt, vsize, adjwgt = subgraph
+        sub_tpwgts = numpy.repeat(fractions, ncon)
+        objval, sub_part = metis.part_graph(
+            xadj, adjncy, len(parts), vwgt, vsize, adjwgt, sub_tpwgts, ubvec,
+            options, recursive, return_array=True)
+        part[vertices] = parts[sub_part]
+        return objval
+
+    tasks = list(zip(splits, subgraphs))
+    if len(tasks) == 1:
+        objvals = [part_graph(tasks[0])]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=n_jobs) as pool:
+            objvals = list(pool.map(part_graph, tasks))
+    return sum(objvals), part
+
+
+def _part_vector(G, parts):
+    """Return the partition vector of a partitioning given as lists of nodes,
+    with -1 for the nodes in no part. Nodes not in G are ignored.
+    """
+    index = dict(zip(G, range(len(G))))
+    part = numpy.full(len(G), -1, dtype=G.xadj.dtype)
+    for i, nodes in enumerate(parts):
+        for u in nodes:
+            u = index.get(u)
+            if u is None:
+                continue
+            if part[u] >= 0:
+                raise nx.NetworkXError(
+                    'node {0!r} is in more than one part.'.format(G.nodes[u]))
+            part[u] = i
+    return part
+
+
+def _fill_metrics(metrics, G, part, nparts, tpwgts=None):
+    """Fill a MetisMetrics object with the metrics of a partition vector of a
+    MetisGraph.
+    """
     if len(G) == 0:
-        return 0, [[] for i in range(nparts)]
+        ncon = 1 if G.vwgt is None else numpy.shape(G.vwgt)[-1]
+        metrics.edgecut = metrics.volume = 0
+        metrics.part_weights = numpy.zeros((nparts, ncon), dtype=G.xadj.dtype)
+        metrics.boundary = numpy.zeros(nparts, dtype=G.xadj.dtype)
+        metrics.connectivity = (numpy.zeros(nparts + 1, dtype=G.xadj.dtype),
+                                numpy.zeros(0, dtype=G.xadj.dtype),
+                                numpy.zeros(0, dtype=G.xadj.dtype))
+    else:
+        result = metis.evaluate_partition(G.xadj, G.adjncy, part, nparts,
+                                          G.vwgt, G.vsize, G.adjwgt)
+        (metrics.edgecut, metrics.volume, metrics.part_weights,
+         metrics.boundary) = result[:4]
+        metrics.connectivity = result[4:]
+    pwgts = metrics.part_weights
+    if tpwgts is None:
+        targets = numpy.full(pwgts.shape, 1.0 / nparts)
+    else:
+        targets = numpy.reshape(tpwgts, pwgts.shape)
+    totals = pwgts.sum(axis=0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # Empty parts are balanced even with zero target weights.
+        ratios = numpy.where(pwgts == 0, 0.0, pwgts / (targets * totals))
+    metrics.imbalance = [float(ratios[:, j].max()) if totals[j] else 1.0
+                         for j in range(pwgts.shape[1])]
+
+
+def _assign_new_nodes(G, part, nparts):
+    """Assign the nodes with no part (-1 in part) to the most common part
+    among their neighbors, spreading out from the nodes with parts. The nodes
+    out of reach of any part are assigned to the lightest parts.
+    """
+    xadj, adjncy = G.xadj, G.adjncy
+    pending = collections.deque(numpy.flatnonzero(part < 0).tolist())
+    nstuck = 0
+    while pending and nstuck < len(pending):
+        u = pending.popleft()
+        nbrs = part[adjncy[xadj[u]:xadj[u + 1]]]
+        nbrs = nbrs[nbrs >= 0]
+        if len(nbrs) == 0:
+            pending.append(u)
+            nstuck += 1
+            continue
+        part[u] = numpy.bincount(nbrs).argmax()
+        nstuck = 0
+
+    if pending:
+        vwgt = (numpy.ones(len(part), dtype=numpy.intp) if G.vwgt is None
+                else numpy.asarray(G.vwgt).reshape(len(part), -1)[:, 0])
+        pwgts = numpy.bincount(part[part >= 0], vwgt[part >= 0],
+                               minlength=nparts)
+        for u in pending:
+            part[u] = pwgts.argmin()
+            pwgts[part[u]] += vwgt[u]
 
-    xadj, adjncy = _convert_graph(G)
 
-    vwgt = [G.nodes[u].get(node_weight, 1) for u in G]
-    if all(w == 1 for w in vwgt):
-        vwgt = None
+@nx.utils.not_implemented_for('directed')
+@nx.utils.not_implemented_for('multigraph')
+@_convert_exceptions(
+    nx.NetworkXError, (ValueError, TypeError, exceptions.MetisError))
+def repartition(G, previous_parts, node_weight='weight', node_size='size',
+                edge_weight='weight', tpwgts=None, ubvec=None, options=None,
+                stats=None):
+    """Repartition a graph that changed since it was partitioned, moving as
+    few nodes as possible.
+
+    Instead of partitioning the graph from scratch, the previous partitioning
+    is refined with the `k`-way refinement of METIS on the graph itself,
+    without coarsening it. Nodes only move between parts to restore the
+    balance of the parts or to reduce the objective value, so regions of the
+    graph that did not change mostly stay in place. This is much faster than
+    :func:`partition` when only a small fraction of the graph changed.
 
-    vsize = [G.nodes[u].get(node_size, 1) for u in G]
-    if all(w == 1 for w in vsize):
-        vsize = None
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        An undirected graph.
 
-    adjwgt = [G[u][v].get(edge_weight, 1) for u in G for v in G[u]]
-    if all(w == 1 for w in adjwgt):
-        adjwgt = None
+    previous_parts : lists of nodes
+        The previous partitioning, for instance as returned by
+        :func:`partition`. Its length is the number of parts. Nodes that are
+        no longer in the graph are ignored. New nodes are assigned to the most
+        common part among their neighbors, or to the lightest parts if none
+        of their neighbors has a part.
 
-    if tpwgts is not None:
-        if len(tpwgts) != nparts:
-            raise nx.NetworkXError('length of tpwgts is not equal to nparts.')
-        ncon = len(tpwgts[0])
-        if any(len(tpwgts[j]) != ncon for j in range(1, nparts)):
-            raise nx.NetworkXError(
-                'lists in tpwgts are not of the same length.')
-        if ubvec is not None and len(ubvec) != ncon:
+    node_weight, node_size, edge_weight, tpwgts, ubvec, options, stats
+        See :func:`partition`. The node sizes also weigh the nodes counted in
+        the migration volume.
+
+    Returns
+    -------
+    objval : int
+        The edge-cut or the total communication volume of the partitioning
+        solution.
+
+    parts : lists of nodes
+        The partitioning.
+
+    migration : int
+        The total size of the nodes of the previous partitioning that moved to
+        other parts.
+
+    Raises
+    ------
+    NetworkXNotImplemented
+        If the graph is directed or is a multigraph.
+
+    NetworkXError
+        If a node is in more than one part of the previous partitioning, if
+        the parameters cannot be converted to valid METIS input format, or if
+        METIS returns an error status.
+
+    Example
+    -------
+    >>> G = nx.grid_2d_graph(100, 100)
+    >>> objval, parts = nxmetis.partition(G, 8)
+    >>> G.remove_node((0, 0))
+    >>> G.add_edge((0, 1), (5, 5))
+    >>> objval, parts, migration = nxmetis.repartition(G, parts)
+
+    Notes
+    -----
+    This function is thread-safe. METIS runs with the GIL released, so calls
+    from several threads proceed in parallel.
+    """
+    nparts = len(previous_parts)
+    if nparts < 1:
+        raise nx.NetworkXError('nparts is less than one.')
+    if nparts == 1 or len(G) == 0:
+        return 0, [list(G)] + [[] for i in range(nparts - 1)], 0
+
+    G = _metis_graph(G, node_weight, node_size, edge_weight)
+
+    previous = _part_vector(G, previous_parts)
+    part = previous.copy()
+    _assign_new_nodes(G, part, nparts)
+
+    tpwgts = _flatten_tpwgts(tpwgts, ubvec, nparts)
+    options = _zero_numbering(options)
+    objval, part = metis.refine_graph(
+        G.xadj, G.adjncy, part, nparts, G.vwgt, G.vsize, G.adjwgt, tpwgts,
+        ubvec, options, return_array=True, out=part, stats=stats)
+
+    moved = (previous >= 0) & (previous != part)
+    if G.vsize is None:
+        migration = int(moved.sum())
+    else:
+        migration = int(numpy.asarray(G.vsize)[moved].sum())
+
+    return objval, _regroup(G.nodes, part, nparts), migration
+
+
+@nx.utils.not_implemented_for('directed')
+@nx.utils.not_implemented_for('multigraph')
+@_convert_exceptions(nx.NetworkXError, (ValueError, TypeError))
+def evaluate(G, parts, nparts=None, node_weight='weight', node_size='size',
+             edge_weight='weight', tpwgts=None):
+    """Compute the quality metrics of a partitioning of a graph.
+
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        An undirected graph. A graph given by its CSR arrays can be evaluated
+        through :meth:`MetisGraph.from_arrays`.
+
+    parts : lists of nodes, dict or NumPy array
+        The partitioning, in any of the forms returned by :func:`partition`.
+
+    nparts : int, optional
+        Number of parts of the partitioning, if it has empty parts beyond the
+        last one found in a dict or an array. If None, it is the number of
+        lists, or the largest part plus one. Default value: None.
+
+    node_weight, node_size, edge_weight, tpwgts
+        See :func:`partition`. The target weights of the parts are used to
+        compute the load imbalances.
+
+    Returns
+    -------
+    metrics : MetisMetrics
+        The edge-cut, the total communication volume, the weights, load
+        imbalances and boundary sizes of the parts, and the weights of the
+        edges between each pair of parts.
+
+    Raises
+    ------
+    NetworkXNotImplemented
+        If the graph is directed or is a multigraph.
+
+    NetworkXError
+        If a node is in no part or in more than one part, or if the
+        parameters cannot be converted to valid METIS input format.
+
+    Example
+    -------
+    >>> objval, parts = nxmetis.partition(G, 8)
+    >>> metrics = nxmetis.evaluate(G, parts)
+    >>> metrics.imbalance
+    [1.03]
+
+    """
+    G = _metis_graph(G, node_weight, node_size, edge_weight)
+    if isinstance(parts, dict):
+        try:
+            part = numpy.array([parts[u] for u in G], dtype=G.xadj.dtype)
+        except KeyError as e:
             raise nx.NetworkXError(
-                'ubvec is not of the same length as tpwgts.')
-        tpwgts = list(itertools.chain.from_iterable(tpwgts))
+                'node {0!r} is in no part.'.format(e.args[0]))
+    elif isinstance(parts, numpy.ndarray):
+        if len(parts) != len(G):
+            raise nx.NetworkXError('len(parts) != len(G)')
+        part = parts
+    else:
+        if nparts is None:
+            nparts = len(parts)
+        part = _part_vector(G, parts)
+        if (part < 0).any():
+            raise nx.NetworkXError('node {0!r} is in no part.'.format(
+                G.nodes[int(numpy.argmin(part))]))
+    if nparts is None:
+        nparts = int(part.max()) + 1 if len(part) else 1
+    if nparts < 1:
+        raise nx.NetworkXError('nparts is less than one.')
 
-    with _zero_numbering(options):
-        objval, part = metis.part_graph(xadj, adjncy, nparts, vwgt, vsize,
-                                         adjwgt, tpwgts, ubvec, options,
-                                         recursive)
+    tpwgts = _flatten_tpwgts(tpwgts, None, nparts)
+    metrics = MetisMetrics()
+    _fill_metrics(metrics, G, part, nparts, tpwgts)
+    return metrics
 
-    parts = [[] for i in range(nparts)]
-    for u, i in zip(G, part):
-        parts[i].append(u)
 
-    return objval, parts
+@nx.utils.not_implemented_for('directed')
+@nx.utils.not_implemented_for('multigraph')
+@_convert_exceptions(
+    nx.NetworkXError, (ValueError, TypeError, exceptions.MetisError))
+def partition_hierarchical(G, nparts, node_weight='weight', node_size='size',
+                           edge_weight='weight', ubvecs=None, options=None,
+                           recursive=False):
+    """Partition a graph recursively along a hierarchy, for instance of
+    machines, sockets and cores.
+
+    The graph is partitioned into ``nparts[0]`` parts, then each part into
+    ``nparts[1]`` parts, and so on. The subgraphs induced by the parts are
+    extracted from the adjacency structure of their parent graph, so the
+    graph is converted only once.
+
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        An undirected graph.
+
+    nparts : list of ints
+        Number of parts at each level of the hierarchy, from the top.
+
+    node_weight, node_size, edge_weight, options, recursive
+        See :func:`partition`.
+
+    ubvecs : list of lists of floats, optional
+        The load imbalance tolerance of each level, one ``ubvec`` (see
+        :func:`partition`) or None per level. The imbalances of the levels
+        compound. If None, the default tolerance of METIS is used at every
+        level. Default value: None.
+
+    Returns
+    -------
+    objvals : list of ints
+        For each level, the sum of the edge-cuts or of the total communication
+        volumes of the partitionings at that level. With the edge-cut
+        objective, the edge-cut between the parts of the lowest level is the
+        sum of ``objvals``.
+
+    parts : nested lists of nodes
+        The partitioning, nested as deep as there are levels:
+        ``parts[i][j][k]`` lists the nodes of the `k`-th part of the `j`-th
+        part of the `i`-th part for three levels.
+
+    Raises
+    ------
+    NetworkXNotImplemented
+        If the graph is directed or is a multigraph.
+
+    NetworkXError
+        If the parameters cannot be converted to valid METIS input format, or
+        METIS returns an error status.
+
+    Example
+    -------
+    >>> objvals, parts = partition_hierarchical(G, [4, 2, 8])
+    >>> cores = parts[3][1]
+
+    """
+    nparts = list(nparts)
+    if not nparts:
+        raise nx.NetworkXError('nparts is empty.')
+    if any(k < 1 for k in nparts):
+        raise nx.NetworkXError('nparts is less than one.')
+    if ubvecs is None:
+        ubvecs = [None] * len(nparts)
+    elif len(ubvecs) != len(nparts):
+        raise nx.NetworkXError('ubvecs is not of the same length as nparts.')
+
+    G = _metis_graph(G, node_weight, node_size, edge_weight)
+    options = _zero_numbering(options)
+    objvals = [0] * len(nparts)
+
+    def split(level, vertices, xadj, adjncy, vwgt, vsize, adjwgt):
+        k = nparts[level]
+        if k == 1 or len(vertices) == 0:
+            part = numpy.zeros(len(vertices), dtype=G.xadj.dtype)
+        else:
+            objval, part = metis.part_graph(
+                xadj, adjncy, k, vwgt, vsize, adjwgt, None, ubvecs[level],
+                options, recursive, return_array=True)
+            objvals[level] += objval
+        if level == len(nparts) - 1:
+            return _regroup(_labels(G.nodes, vertices), part, k)
+        if len(vertices) == 0:
+            subgraphs = [(vertices, xadj, adjncy, vwgt, vsize, adjwgt)] * k
+        else:
+            subgraphs = metis.split_graph(xadj, adjncy, part, k, vwgt,
+                                          vsize, adjwgt)
+        return [split(level + 1, vertices[subgraph[0]], *subgraph[1:])
+                for subgraph in subgraphs]
+
+    return objvals, split(0, numpy.arange(len(G)), G.xadj, G.adjncy,
+                          G.vwgt, G.vsize, G.adjwgt)
 
 
 @nx.utils.not_implemented_for('directed')
 @nx.utils.not_implemented_for('multigraph')
 @_convert_exceptions(
     nx.NetworkXError, (ValueError, TypeError, exceptions.MetisError))
-def vertex_separator(G, weight='weight', options=None):
+def vertex_separator(G, weight='weight', options=None, stats=None,
+                     cache=None, output='lists', compress=False):
     """Compute a vertex separator that bisects a graph. The algorithm aims to
     minimize the sum of weights of vertices in the separator.
 
     Parameters
     ----------
-    G : NetworkX graph
+    G : NetworkX graph or MetisGraph
         A graph.
 
     weight : object, optional
         The data key used to determine the weight of each node. If None, each
-        node has unit weight. Default value: 'weight'.
+        node has unit weight. Ignored if G is a MetisGraph. Default value:
+        'weight'.
 
     options : MetisOptions, optional
         METIS options. If None, the default options are used. Default value:
         None.
 
+    stats : MetisStats, optional
+        If not None, it is filled with the timing, memory and coarsening
+        statistics of the METIS run. Default value: None.
+
+    cache : MetisCache, optional
+        If not None, the result is looked up in this cache before running
+        METIS, and stored in it afterwards. ``stats`` is left untouched when
+        the result is found in the cache. Default value: None.
+
+    output : string, optional
+        Form of the result: 'lists' for the lists of the nodes of the
+        separator and of the two parts, 'dict' for a dict mapping each node
+        to 0 or 1 for the parts and 2 for the separator, or 'array' for a
+        NumPy array holding these numbers in the order of ``G``. Default
+        value: 'lists'.
+
+    compress : bool, optional
+        If True, the nodes with the same neighbors besides each other are
+        merged into super-nodes weighing the sum of their weights before
+        bisecting, and each node is given the part of its super-node. The
+        super-nodes are kept within the balance tolerance of the bisection.
+        See :func:`partition`. Default value: False.
+
     Returns
     -------
     sep, part1, part2 : lists of nodes
         The separator and the two parts of the bisection represented as lists.
+        Returned if ``output`` is 'lists'.
+
+    part : dict or NumPy array
+        The part of each node, 2 standing for the separator. Returned if
+        ``output`` is 'dict' or 'array'.
 
     Raises
     ------
     NetworkXError
         If the parameters cannot be converted to valid METIS input format, or
         METIS returns an error status.
+
+    Notes
+    -----
+    This function is thread-safe. METIS runs with the GIL released, so calls
+    from several threads proceed in parallel.
     """
+    _check_output(output)
     if len(G) == 0:
-        return [], [], []
-
-    vwgt = [G.nodes[u].get(weight, 1) for u in G]
-    if all(w == 1 for w in vwgt):
-        vwgt = None
-
-    xadj, adjncy = _convert_graph(G)
-
-    with _zero_numbering(options):
-        part = metis.compute_vertex_separator(xadj, adjncy, vwgt, options)[1]
-
-    groups = [[], [], []]
-    for u, i in zip(G, part):
-        groups[i].append(u)
-
+        if output == 'lists':
+            return [], [], []
+        return _format_parts([], numpy.zeros(0, dtype=metis.idx_dtype(1)), 3,
+                             output)
+
+    G = _metis_graph(G, node_weight=weight)
+
+    options = _zero_numbering(options)
+    result = None
+    if cache is not None:
+        key = cache._key(G, 'vertex_separator', options, bool(compress))
+        result = cache._get(key)
+    if result is None:
+        if compress:
+            # Two halves with the default ufactor of METIS for orderings
+            H, cmap = _compress_graph(G, [0.5], _tolerances(None, options, 1,
+                                                            200))
+        else:
+            H, cmap = G, None
+        result = metis.compute_vertex_separator(
+            H.xadj, H.adjncy, H.vwgt, options, return_array=True,
+            stats=stats)[1:]
+        if cmap is not None:
+            result = (result[0][cmap],)
+        if cache is not None:
+            cache._put(key, result)
+
+    if output != 'lists':
+        return _format_parts(G.nodes, result[0], 3, output)
+    groups = _regroup(G.nodes, result[0], 3)
     return groups[2], groups[0], groups[1]
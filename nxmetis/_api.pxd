@@ -12,6 +12,11 @@ cdef extern from "metis.h":
         idx_t *vsize, idx_t *adjwgt, idx_t *nparts, real_t *tpwgts,
         real_t *ubvec, idx_t *options, idx_t *edgecut, idx_t *part) nogil
 
+    int METIS_RefineGraphKway(
+        idx_t *nvtxs, idx_t *ncon, idx_t *xadj, idx_t *adjncy, idx_t *vwgt,
+        idx_t *vsize, idx_t *adjwgt, idx_t *nparts, real_t *tpwgts,
+        real_t *ubvec, idx_t *options, idx_t *objval, idx_t *part) nogil
+
     int METIS_MeshToDual(
         idx_t *ne, idx_t *nn, idx_t *eptr, idx_t *eind, idx_t *ncommon,
         idx_t *numflag, idx_t **r_xadj, idx_t **r_adjncy) nogil
@@ -34,14 +39,26 @@ cdef extern from "metis.h":
         idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt, idx_t *options,
         idx_t *perm, idx_t *iperm) nogil
 
+    int METIS_NodeNDTree(
+        idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt, idx_t *options,
+        idx_t *perm, idx_t *iperm, idx_t *r_nnodes, idx_t **r_tree) nogil
+
     int METIS_Free(void *ptr) nogil
 
     int METIS_SetDefaultOptions(idx_t *options) nogil
 
+    int METIS_NodeNDP(
+        idx_t nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt, idx_t npes,
+        idx_t *options, idx_t *perm, idx_t *iperm, idx_t *sizes) nogil
+
     int METIS_ComputeVertexSeparator(
         idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt, idx_t *options,
         idx_t *sepsize, idx_t *part) nogil
 
+    int METIS_NodeRefine(
+        idx_t nvtxs, idx_t *xadj, idx_t *vwgt, idx_t *adjncy, idx_t *where,
+        idx_t *hmarker, real_t ubfactor) nogil
+
     enum:
         METIS_VER_MAJOR
         METIS_VER_MINOR
@@ -118,3 +135,28 @@ cdef extern from "metis.h":
     enum mobjtype_et:
         METIS_OBJTYPE_CUT
         METIS_OBJTYPE_VOL
+
+
+cdef extern from "gk_capture.h":
+    void gk_capture_begin() nogil
+
+    char *gk_capture_end(size_t *size) nogil
+
+
+cdef extern from "runstats.h":
+    ctypedef struct metis_runstats_t:
+        double totaltime
+        double coarsentime
+        double matchtime
+        double contracttime
+        double initparttime
+        double uncoarsentime
+        double reftime
+        double projecttime
+        double splittime
+        size_t maxmem
+        size_t ncoarsenings
+        size_t nlevels
+
+    void metis_runstats_reset() nogil
+    metis_runstats_t *metis_runstats_get() nogil
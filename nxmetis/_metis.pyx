@@ -1,140 +1,433 @@
+from cpython.list cimport PyList_New, PyList_SET_ITEM
+from cpython.ref cimport Py_INCREF
 from libc cimport stdio
-cimport cpython.mem
+from libc cimport stdlib
+from cython cimport view
+cimport cython
 cimport _api
 
-import contextlib
-import os
-import sys
-import tempfile
+import numpy
 
 from nxmetis import exceptions
 
-__all__ = ['part_graph', 'node_nd', 'compute_vertex_separator']
+__all__ = ['part_graph', 'refine_graph', 'evaluate_partition',
+           'group_vertices', 'group_nodes', 'connected_components',
+           'split_graph', 'compress_graph', 'node_nd', 'node_ndp',
+           'compute_vertex_separator', 'node_refine', 'part_mesh_nodal',
+           'part_mesh_dual', 'mesh_to_dual', 'mesh_to_nodal']
 
+# NumPy data type and buffer format string of idx_t, which is 32 or 64 bits
+# wide depending on the build
+IDX_DTYPE = numpy.dtype('i{0}'.format(sizeof(_api.idx_t)))
+IDX_FORMAT = IDX_DTYPE.char
 
-_STDOUT_FILENO = 1 #File descriptor for stdout
+# Methods of _part_graph
+cdef enum:
+    PART_KWAY
+    PART_RECURSIVE
+    PART_REFINE
 
 
-@contextlib.contextmanager
-def redirect_stdout(target):
-    """Temporarily redirect operations on ``stdout`` to file ``target``.
+cdef void begin_capture(bint capture) nogil:
+    """Start capturing the output of METIS in the calling thread if
+    ``capture`` is set.
     """
-    stdio.fflush(stdio.stdout)
-    with os.fdopen(os.dup(_STDOUT_FILENO), 'w') as stdout_backup:
-        os.dup2(target.fileno(), _STDOUT_FILENO)
-        try:
-            yield
-        finally:
-            stdio.fflush(stdio.stdout)
-            os.dup2(stdout_backup.fileno(), _STDOUT_FILENO)
+    if capture:
+        _api.gk_capture_begin()
 
 
-cdef void* checked_malloc(_api.idx_t size) except NULL:
-    cdef void* ptr = cpython.mem.PyMem_Malloc(size)
-    if ptr == NULL:
-        raise MemoryError()
-    return ptr
+cdef str end_capture(bint capture):
+    """Stop capturing the output of METIS in the calling thread and return the
+    captured output, or flush ``stdout`` if ``capture`` is not set.
+    """
+    cdef size_t size
+    cdef char *output
+    if not capture:
+        stdio.fflush(stdio.stdout)
+        return ''
+    output = _api.gk_capture_end(&size)
+    if output == NULL:
+        return ''
+    try:
+        return output[:size].decode('ascii', 'replace')
+    finally:
+        stdlib.free(output)
+
 
+cdef _api.idx_t _empty_idx_array[1]
+cdef _api.real_t _empty_real_array[1]
 
-cdef _api.idx_t* convert_idx_array(array) except NULL:
-    """Convert a list of ints to a C array of idx_t's.
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline _api.idx_t* idx_ptr(const _api.idx_t[::1] array) nogil:
+    """Return a pointer to the data of a typed memoryview of idx_t's, or to a
+    dummy array if it is empty.
     """
-    cdef _api.idx_t size = len(array)
-    cdef _api.idx_t *_array = <_api.idx_t*> checked_malloc(sizeof(_api.idx_t) * size)
-    cdef _api.idx_t i
-    try:
-        for i from 0 <= i < size:
-            _array[i] = array[i]
-    except:
-        cpython.mem.PyMem_Free(_array)
-        raise
-    return _array
+    if array is None:
+        return NULL
+    if array.shape[0] == 0:
+        return _empty_idx_array
+    return <_api.idx_t*> &array[0]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline _api.real_t* real_ptr(const _api.real_t[::1] array) nogil:
+    """Return a pointer to the data of a typed memoryview of real_t's, or to a
+    dummy array if it is empty.
+    """
+    if array is None:
+        return NULL
+    if array.shape[0] == 0:
+        return _empty_real_array
+    return <_api.real_t*> &array[0]
+
+
+def as_idx_array(array, name='array', writable=False):
+    """Convert a sequence or buffer of ints to a C-contiguous array of
+    idx_t's.
+
+    NumPy arrays and other objects supporting the buffer protocol whose
+    element type and layout already match idx_t are returned without copying.
+    Lists and buffers of other integer types are converted in a single pass.
+
+    Parameters
+    ----------
+    array : sequence or buffer of ints
+        Array to convert.
 
+    name : str
+        Name of the array used in error messages.
 
-cdef _api.real_t* convert_real_array(array) except NULL:
-    """Convert a list of floats to a C array of real_t's.
+    writable : bool
+        If True, the result never shares memory with ``array``.
+
+    Returns
+    -------
+    result : NumPy array
+        One-dimensional array of idx_t's.
     """
-    cdef _api.idx_t size = len(array)
-    cdef _api.real_t *_array = <_api.real_t*> checked_malloc(sizeof(_api.real_t) * size)
-    cdef _api.idx_t i
-    try:
-        for i from 0 <= i < size:
-            _array[i] = array[i]
-    except:
-        cpython.mem.PyMem_Free(_array)
-        raise
-    return _array
+    arr = numpy.asarray(array)
+    if arr.dtype.kind not in 'biu' and arr.size != 0:
+        raise TypeError('{0} is not an array of ints'.format(name))
+    if arr.ndim != 1:
+        raise ValueError('{0} is not one-dimensional'.format(name))
+    result = numpy.ascontiguousarray(arr, dtype=IDX_DTYPE)
+    if writable and result is arr and (arr is array or arr.base is not None):
+        result = result.copy()
+    return result
+
+
+def as_vwgt_array(vwgt, nvtxs):
+    """Convert the weights of the vertices of a graph, with one or more
+    constraints, to a C-contiguous array of idx_t's with the weights of each
+    vertex stored contiguously.
+
+    Returns
+    -------
+    vwgt : NumPy array
+        One-dimensional array of idx_t's.
+
+    ncon : int
+        The number of constraints.
+    """
+    arr = numpy.asarray(vwgt)
+    if arr.ndim == 2:
+        if arr.shape[0] != nvtxs:
+            raise ValueError('len(vwgt) != len(xadj) - 1')
+        ncon = arr.shape[1]
+        arr = arr.reshape(-1)
+    elif arr.ndim == 1:
+        ncon = arr.shape[0] // nvtxs if nvtxs else 1
+        if arr.shape[0] != nvtxs * ncon:
+            raise ValueError('len(vwgt) is not a multiple of len(xadj) - 1')
+    else:
+        raise ValueError('vwgt is not one- or two-dimensional')
+    if ncon < 1:
+        raise ValueError('vwgt has no constraints')
+    return as_idx_array(arr, 'vwgt'), ncon
+
+
+def as_real_array(array, name='array'):
+    """Convert a sequence or buffer of floats to a C-contiguous array of
+    real_t's.
+    """
+    arr = numpy.asarray(array)
+    if arr.dtype.kind not in 'biuf' and arr.size != 0:
+        raise TypeError('{0} is not an array of floats'.format(name))
+    if arr.ndim != 1:
+        raise ValueError('{0} is not one-dimensional'.format(name))
+    return numpy.ascontiguousarray(arr, dtype=numpy.float32)
 
 
-cdef convert_options(options, _api.idx_t *_options):
-    """Convert a MetisOptions object to a C array.
+def output_idx_array(out, size, name='out'):
+    """Return ``out`` after checking that it can receive ``size`` idx_t's, or
+    a new NumPy array of that size if ``out`` is None.
+    """
+    cdef _api.idx_t[::1] _out
+    if out is None:
+        return numpy.empty(size, dtype=IDX_DTYPE)
+    _out = out
+    if _out.shape[0] != size:
+        raise ValueError('len({0}) != len(xadj) - 1'.format(name))
+    return out
+
+
+cdef convert_options(options, _api.idx_t *_options, bint timing=False):
+    """Convert a MetisOptions object to a C array. If timing is True, the
+    timers of METIS are turned on as well.
     """
     _api.METIS_SetDefaultOptions(_options)
-    if options is None:
-        return
-
-    _options[<_api.idx_t> _api.METIS_OPTION_PTYPE]     = options.ptype
-    _options[<_api.idx_t> _api.METIS_OPTION_OBJTYPE]   = options.objtype
-    _options[<_api.idx_t> _api.METIS_OPTION_CTYPE]     = options.ctype
-    _options[<_api.idx_t> _api.METIS_OPTION_IPTYPE]    = options.iptype
-    _options[<_api.idx_t> _api.METIS_OPTION_RTYPE]     = options.rtype
-    _options[<_api.idx_t> _api.METIS_OPTION_NCUTS]     = options.ncuts
-    _options[<_api.idx_t> _api.METIS_OPTION_NSEPS]     = options.nseps
-    _options[<_api.idx_t> _api.METIS_OPTION_NUMBERING] = options.numbering
-    _options[<_api.idx_t> _api.METIS_OPTION_NITER]     = options.niter
-    _options[<_api.idx_t> _api.METIS_OPTION_SEED]      = options.seed
-    _options[<_api.idx_t> _api.METIS_OPTION_MINCONN]   = options.minconn
-    _options[<_api.idx_t> _api.METIS_OPTION_NO2HOP]    = options.no2hop
-    _options[<_api.idx_t> _api.METIS_OPTION_CONTIG]    = options.contig
-    _options[<_api.idx_t> _api.METIS_OPTION_COMPRESS]  = options.compress
-    _options[<_api.idx_t> _api.METIS_OPTION_CCORDER]   = options.ccorder
-    _options[<_api.idx_t> _api.METIS_OPTION_PFACTOR]   = options.pfactor
-    _options[<_api.idx_t> _api.METIS_OPTION_UFACTOR]   = options.ufactor
-    _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL]    = options.dbglvl
-
-
-cdef void convert_graph(xadj, adjncy, _api.idx_t *nvtxs_ptr, _api.idx_t **_xadj_ptr,
-                        _api.idx_t **_adjncy_ptr) except *:
-    """Convert a list-based graph structure to C arrays.
+    if options is not None:
+        _options[<_api.idx_t> _api.METIS_OPTION_PTYPE]     = options.ptype
+        _options[<_api.idx_t> _api.METIS_OPTION_OBJTYPE]   = options.objtype
+        _options[<_api.idx_t> _api.METIS_OPTION_CTYPE]     = options.ctype
+        _options[<_api.idx_t> _api.METIS_OPTION_IPTYPE]    = options.iptype
+        _options[<_api.idx_t> _api.METIS_OPTION_RTYPE]     = options.rtype
+        _options[<_api.idx_t> _api.METIS_OPTION_NCUTS]     = options.ncuts
+        _options[<_api.idx_t> _api.METIS_OPTION_NSEPS]     = options.nseps
+        _options[<_api.idx_t> _api.METIS_OPTION_NUMBERING] = options.numbering
+        _options[<_api.idx_t> _api.METIS_OPTION_NITER]     = options.niter
+        _options[<_api.idx_t> _api.METIS_OPTION_SEED]      = options.seed
+        _options[<_api.idx_t> _api.METIS_OPTION_MINCONN]   = options.minconn
+        _options[<_api.idx_t> _api.METIS_OPTION_NO2HOP]    = options.no2hop
+        _options[<_api.idx_t> _api.METIS_OPTION_CONTIG]    = options.contig
+        _options[<_api.idx_t> _api.METIS_OPTION_COMPRESS]  = options.compress
+        _options[<_api.idx_t> _api.METIS_OPTION_CCORDER]   = options.ccorder
+        _options[<_api.idx_t> _api.METIS_OPTION_PFACTOR]   = options.pfactor
+        _options[<_api.idx_t> _api.METIS_OPTION_UFACTOR]   = options.ufactor
+        _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL]    = options.dbglvl
+
+    if timing:
+        # METIS only updates its timers with METIS_DBG_TIME set.
+        if _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL] < 0:
+            _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL] = 0
+        _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL] |= _api.METIS_DBG_TIME
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def convert_graph(xadj, adjncy, adjwgt=None, numbering=0):
+    """Validate an adjacency structure and convert it to arrays of idx_t's
+    with self-loops removed.
+
+    The input arrays are shared rather than copied whenever they are already
+    C-contiguous arrays of idx_t's and contain no self-loops. METIS temporarily
+    renumbers the adjacency structure in place when one-based numbering is
+    used, so copies are always made in that case.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph.
+
+    adjwgt : sequence or buffer of ints, optional
+        Weights of the edges. Entries of self-loops are removed together with
+        the self-loops.
+
+    numbering : int
+        Numbering scheme of ``xadj`` and ``adjncy``. Default value: 0.
+
+    Returns
+    -------
+    xadj, adjncy, adjwgt : NumPy arrays
+        The converted adjacency structure. ``adjwgt`` is None if None is
+        given.
     """
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _adjwgt = None
+    cdef _api.idx_t[::1] _new_xadj
+    cdef _api.idx_t[::1] _new_adjncy
+    cdef _api.idx_t[::1] _new_adjwgt = None
     cdef _api.idx_t nvtxs
-    cdef _api.idx_t *_xadj = NULL
-    cdef _api.idx_t *_adjncy = NULL
-    cdef _api.idx_t i, j, k, l
-    try:
-        _xadj = convert_idx_array(xadj)
-        nvtxs = len(xadj) - 1
-        if nvtxs < 1:
-            raise ValueError('len(xadj) < 2')
-        if _xadj[0] != 0:
-            raise ValueError('xadj[0] != 0')
+    cdef _api.idx_t offset = numbering
+    cdef _api.idx_t nloops = 0
+    cdef _api.idx_t bad = -1
+    cdef bint weighted = adjwgt is not None
+    cdef _api.idx_t i, j, k
+
+    xadj = as_idx_array(xadj, 'xadj', numbering != 0)
+    _xadj = xadj
+    nvtxs = _xadj.shape[0] - 1
+    if nvtxs < 1:
+        raise ValueError('len(xadj) < 2')
+    if _xadj[0] != offset:
+        raise ValueError('xadj[0] != {0}'.format(offset))
+    with nogil:
         for i from 0 <= i < nvtxs:
             if _xadj[i] > _xadj[i + 1]:
-                raise ValueError('xadj[{0}] > xadj[{1}]'.format(i, i + 1))
+                bad = i
+                break
+    if bad >= 0:
+        raise ValueError('xadj[{0}] > xadj[{1}]'.format(bad, bad + 1))
+
+    adjncy = as_idx_array(adjncy, 'adjncy', numbering != 0)
+    _adjncy = adjncy
+    if _adjncy.shape[0] != _xadj[nvtxs] - offset:
+        raise ValueError('len(adjncy) != xadj[-1] - {0}'.format(offset))
+
+    if weighted:
+        adjwgt = as_idx_array(adjwgt, 'adjwgt')
+        _adjwgt = adjwgt
+        if _adjwgt.shape[0] != _adjncy.shape[0]:
+            raise ValueError('len(adjwgt) != len(adjncy)')
 
-        _adjncy = convert_idx_array(adjncy)
-        if len(adjncy) != _xadj[nvtxs]:
-            raise ValueError('len(adjncy) != xadj[-1]')
-
-    except:
-        cpython.mem.PyMem_Free(_xadj)
-        cpython.mem.PyMem_Free(_adjncy)
-        raise
     with nogil:
-        # Remove selfloops to prevent METIS crashes.
+        for i from 0 <= i < nvtxs:
+            for j from _xadj[i] - offset <= j < _xadj[i + 1] - offset:
+                if _adjncy[j] == i + offset:
+                    nloops += 1
+                elif _adjncy[j] < offset or _adjncy[j] >= nvtxs + offset:
+                    bad = j
+                    break
+            if bad >= 0:
+                break
+    if bad >= 0:
+        raise ValueError('adjncy[{0}] is not a valid node'.format(bad))
+    if nloops == 0:
+        return xadj, adjncy, adjwgt
+
+    # Remove selfloops to prevent METIS crashes.
+    new_xadj = numpy.empty(nvtxs + 1, dtype=IDX_DTYPE)
+    new_adjncy = numpy.empty(_adjncy.shape[0] - nloops, dtype=IDX_DTYPE)
+    _new_xadj = new_xadj
+    _new_adjncy = new_adjncy
+    if weighted:
+        new_adjwgt = numpy.empty(_adjncy.shape[0] - nloops, dtype=IDX_DTYPE)
+        _new_adjwgt = new_adjwgt
+    else:
+        new_adjwgt = None
+    with nogil:
         k = 0
         for i from 0 <= i < nvtxs:
-            l = k
-            for j from _xadj[i] <= j < _xadj[i + 1]:
-                if _adjncy[j] != i:
-                    _adjncy[k] = _adjncy[j]
+            _new_xadj[i] = k + offset
+            for j from _xadj[i] - offset <= j < _xadj[i + 1] - offset:
+                if _adjncy[j] != i + offset:
+                    _new_adjncy[k] = _adjncy[j]
+                    if weighted:
+                        _new_adjwgt[k] = _adjwgt[j]
                     k += 1
-            _xadj[i] = l
-        _xadj[nvtxs] = k
+        _new_xadj[nvtxs] = k + offset
+    return new_xadj, new_adjncy, new_adjwgt
+
+
+cdef int get_numbering(options):
+    return 1 if options is not None and options.numbering == 1 else 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def convert_mesh(eptr, eind, nn=None, numbering=0):
+    """Validate an element-node structure and convert it to arrays of
+    idx_t's.
+
+    As with graphs, the input arrays are shared rather than copied whenever
+    they are already C-contiguous arrays of idx_t's, except under one-based
+    numbering, which METIS applies in place.
+
+    Parameters
+    ----------
+    eptr, eind : sequences or buffers of ints
+        Element-node structure of the mesh.
 
-        nvtxs_ptr[0] = nvtxs
-        _xadj_ptr[0] = _xadj
-        _adjncy_ptr[0] = _adjncy
+    nn : int, optional
+        Number of nodes of the mesh. If None, it is inferred from the largest
+        node number in ``eind``. Default value: None.
+
+    numbering : int
+        Numbering scheme of ``eptr`` and ``eind``. Default value: 0.
+
+    Returns
+    -------
+    eptr, eind : NumPy arrays
+        The converted element-node structure.
+
+    ne, nn : int
+        Number of elements and nodes of the mesh.
+    """
+    cdef const _api.idx_t[::1] _eptr
+    cdef const _api.idx_t[::1] _eind
+    cdef _api.idx_t ne, _nn
+    cdef _api.idx_t offset = numbering
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i
+
+    eptr = as_idx_array(eptr, 'eptr', numbering != 0)
+    _eptr = eptr
+    ne = _eptr.shape[0] - 1
+    if ne < 1:
+        raise ValueError('len(eptr) < 2')
+    if _eptr[0] != offset:
+        raise ValueError('eptr[0] != {0}'.format(offset))
+    with nogil:
+        for i from 0 <= i < ne:
+            if _eptr[i] > _eptr[i + 1]:
+                bad = i
+                break
+    if bad >= 0:
+        raise ValueError('eptr[{0}] > eptr[{1}]'.format(bad, bad + 1))
+
+    eind = as_idx_array(eind, 'eind', numbering != 0)
+    _eind = eind
+    if _eind.shape[0] != _eptr[ne] - offset:
+        raise ValueError('len(eind) != eptr[-1] - {0}'.format(offset))
+
+    if nn is None:
+        _nn = eind.max() + 1 - offset if _eind.shape[0] > 0 else 0
+    else:
+        _nn = nn
+    if _nn < 1:
+        raise ValueError('nn < 1')
+    with nogil:
+        for i from 0 <= i < _eind.shape[0]:
+            if _eind[i] < offset or _eind[i] >= _nn + offset:
+                bad = i
+                break
+    if bad >= 0:
+        raise ValueError('eind[{0}] is not a valid node'.format(bad))
+
+    return eptr, eind, ne, _nn
+
+
+cdef void free_metis_array(void *ptr) nogil:
+    _api.METIS_Free(ptr)
+
+
+cdef object wrap_metis_array(_api.idx_t *ptr, _api.idx_t size):
+    """Wrap an array of idx_t's allocated by METIS in a NumPy array without
+    copying. The array is released with METIS_Free once the NumPy array is
+    garbage collected.
+    """
+    cdef view.array array
+    if size == 0:
+        _api.METIS_Free(ptr)
+        return numpy.empty(0, dtype=IDX_DTYPE)
+    array = view.array((size,), sizeof(_api.idx_t), IDX_FORMAT,
+                       allocate_buffer=False)
+    array.data = <char*> ptr
+    array.callback_free_data = free_metis_array
+    return numpy.asarray(array)
+
+
+cdef fill_stats(stats):
+    """Copy the statistics of the last METIS run of the calling thread to a
+    MetisStats object.
+    """
+    cdef _api.metis_runstats_t *runstats = _api.metis_runstats_get()
+    stats.total_time = runstats.totaltime
+    stats.coarsening_time = runstats.coarsentime
+    stats.matching_time = runstats.matchtime
+    stats.contraction_time = runstats.contracttime
+    stats.initial_partition_time = runstats.initparttime
+    stats.uncoarsening_time = runstats.uncoarsentime
+    stats.refinement_time = runstats.reftime
+    stats.projection_time = runstats.projecttime
+    stats.splitting_time = runstats.splittime
+    stats.peak_memory = runstats.maxmem
+    stats.coarsenings = runstats.ncoarsenings
+    stats.coarsening_levels = runstats.nlevels
 
 
 cdef void check_result(int result, msg) except *:
@@ -143,29 +436,37 @@ cdef void check_result(int result, msg) except *:
 
 
 def part_graph(xadj, adjncy, nparts, vwgt=None, vsize=None, adjwgt=None,
-               tpwgts=None, ubvec=None, options=None, recursive=False):
+               tpwgts=None, ubvec=None, options=None, recursive=False,
+               return_array=False, out=None, capture_output=True,
+               stats=None):
     """Partition a graph into `k` parts using either multilevel recursive
     bisection or multilevel `k`-way partitioning.
 
     Parameters
     ----------
-    xadj, adjncy : lists of ints
-        Adjacency structure of the graph.
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph. C-contiguous arrays of idx_t's
+        (NumPy arrays of the data type returned by :func:`idx_dtype` for the
+        graph) are passed to METIS without copying.
 
     nparts : int
         Number of parts to partition the graph. It should be at least 2.
 
-    vwgt : list of ints
-        Weights of the vertices. Default value: None.
+    vwgt : sequence or buffer of ints
+        Weights of the vertices. With `\text{ncon}` balancing constraints,
+        either a two-dimensional array of shape `(\text{nvtxs}, \text{ncon})`
+        or a sequence of length `\text{nvtxs} \times \text{ncon}` in which
+        the weights of vertex `i` are stored at
+        `\text{vwgt}[i \ast \text{ncon} + j]`. Default value: None.
 
-    vsize : list of ints
+    vsize : sequence or buffer of ints
         Sizes of the vertices for computing the total communication volume.
         Default value: None.
 
-    adjwgt : list of ints
+    adjwgt : sequence or buffer of ints
         Weights of the edges.
 
-    tpwgts : list of floats
+    tpwgts : sequence or buffer of floats
         List of size `\text{nparts} \times \text{ncon}` that specifies the
         desired weight for each partition and constraint. The target partition
         weight for the `i`th partition and `j`th constraint is specified at
@@ -177,7 +478,7 @@ def part_graph(xadj, adjncy, nparts, vwgt=None, vsize=None, adjwgt=None,
         If None, the graph is equally divided among the partitions. Default
         value: None.
 
-    ubvec : list of floats.
+    ubvec : sequence or buffer of floats
         List of size `\text{ncon}` that specifies the allowed load imbalance
         tolerance for each constraint. For the ith partition and jth constraint
         the allowed weight is the
@@ -192,6 +493,31 @@ def part_graph(xadj, adjncy, nparts, vwgt=None, vsize=None, adjwgt=None,
     options : MetisOptions
         Options. Default value: None
 
+    recursive : bool
+        If True, multilevel recursive bisection is used. Otherwise, multilevel
+        `k`-way partitioning is used. Default value: False.
+
+    return_array : bool
+        If True, the partition vector is returned as a NumPy array of idx_t's
+        instead of a list. Default value: False.
+
+    out : writable buffer of idx_t's, optional
+        C-contiguous buffer of length `\text{len}(\text{xadj}) - 1` into
+        which METIS writes the partition vector directly. It is returned in
+        place of a new list, so that output storage can be reused across
+        calls. Default value: None.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured in a buffer
+        private to the calling thread and included in the message of any
+        MetisError raised. If False, it is written to ``stdout``. Process-wide
+        ``stdout`` is never redirected. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
     Returns
     -------
     objval : int
@@ -199,7 +525,7 @@ def part_graph(xadj, adjncy, nparts, vwgt=None, vsize=None, adjwgt=None,
         solution. The value returned depends on the partitioning's objective
         function.
 
-    part : list of ints
+    part : list of ints, NumPy array or ``out``
         The partition vector of the graph. The numbering of this vector starts
         from either 0 or 1, depending on the value of options.numbering.
 
@@ -213,99 +539,968 @@ def part_graph(xadj, adjncy, nparts, vwgt=None, vsize=None, adjwgt=None,
     This wrapper function performs only minimal input validation to ensure
     memory safety in invocation of METIS.
     """
+    return _part_graph(xadj, adjncy, nparts, vwgt, vsize, adjwgt, tpwgts,
+                       ubvec, options,
+                       PART_RECURSIVE if recursive else PART_KWAY, None,
+                       return_array, out, capture_output, stats)
+
+
+def refine_graph(xadj, adjncy, part, nparts, vwgt=None, vsize=None,
+                 adjwgt=None, tpwgts=None, ubvec=None, options=None,
+                 return_array=False, out=None, capture_output=True,
+                 stats=None):
+    """Refine a `k`-way partitioning of a graph with the `k`-way refinement of
+    METIS, without coarsening the graph.
+
+    Vertices only move between parts to restore the balance of the parts or
+    to reduce the objective value, so a graph that changed little since it
+    was partitioned can be repartitioned much faster than from scratch, with
+    most vertices staying in their parts.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph.
+
+    part : sequence or buffer of ints
+        The partition vector to refine. Its numbering starts from either 0 or
+        1, depending on the value of options.numbering.
+
+    nparts : int
+        Number of parts of the partitioning. It should be at least 2.
+
+    vwgt, vsize, adjwgt, tpwgts, ubvec, options, return_array, out,
+    capture_output, stats
+        See :func:`part_graph`. ``out`` may be ``part`` itself to refine the
+        partition vector in place.
+
+    Returns
+    -------
+    objval : int
+        The edge-cut or the total communication volume of the refined
+        partitioning.
+
+    part : list of ints, NumPy array or ``out``
+        The refined partition vector.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid partition vector.
+
+    MetisError
+        If METIS returns an error status.
+    """
+    return _part_graph(xadj, adjncy, nparts, vwgt, vsize, adjwgt, tpwgts,
+                       ubvec, options, PART_REFINE, part, return_array, out,
+                       capture_output, stats)
+
+
+def _part_graph(xadj, adjncy, nparts, vwgt, vsize, adjwgt, tpwgts, ubvec,
+                options, int method, initial, return_array, out,
+                capture_output, stats):
     cdef _api.idx_t nvtxs
-    cdef _api.idx_t *_xadj = NULL
-    cdef _api.idx_t *_adjncy = NULL
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
     cdef _api.idx_t _nparts
-    cdef _api.idx_t *_vwgt = NULL
-    cdef _api.idx_t *_vsize = NULL
-    cdef _api.idx_t *_adjwgt = NULL
-    cdef _api.real_t *_tpwgts = NULL
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _vsize = None
+    cdef const _api.idx_t[::1] _adjwgt = None
+    cdef const _api.real_t[::1] _tpwgts = None
     cdef _api.idx_t ncon
-    cdef _api.real_t *_ubvec = NULL
+    cdef const _api.real_t[::1] _ubvec = None
     cdef _api.idx_t _options[_api.METIS_NOPTIONS]
     cdef _api.idx_t objval
-    cdef _api.idx_t *_part = NULL
-    cdef int _recursive
+    cdef _api.idx_t[::1] _part
+    cdef const _api.idx_t[::1] _initial
+    cdef _api.idx_t offset = get_numbering(options)
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i
     cdef int result
-    cdef int i
-    try:
-        convert_graph(xadj, adjncy, &nvtxs, &_xadj, &_adjncy)
-        _nparts = nparts
-        if _nparts < 2:
-            raise ValueError('nparts < 2')
-
-        if vwgt is not None:
-            _vwgt = convert_idx_array(vwgt)
-            if len(vwgt) != nvtxs:
-                raise ValueError('len(vwgt) != len(xadj) - 1')
-
-        if vsize is not None:
-            _vsize = convert_idx_array(vsize)
-            if len(vsize) != nvtxs:
-                raise ValueError('len(vsize) != len(xadj) - 1')
-
-        if adjwgt is not None:
-            _adjwgt = convert_idx_array(adjwgt)
-            if len(adjwgt) != len(adjncy):
-                raise ValueError('len(adjwgt) != len(adjncy)')
-
-        if tpwgts is not None:
-            _tpwgts = convert_real_array(tpwgts)
-            if len(tpwgts) % _nparts != 0:
-                raise ValueError('len(tpwgts) % nparts != 0')
-            ncon = len(tpwgts) / _nparts
+
+    xadj, adjncy, adjwgt = convert_graph(xadj, adjncy, adjwgt, offset)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+    _nparts = nparts
+    if _nparts < 2:
+        raise ValueError('nparts < 2')
+
+    ncon = 0
+    if vwgt is not None:
+        vwgt, ncon = as_vwgt_array(vwgt, nvtxs)
+        _vwgt = vwgt
+
+    if vsize is not None:
+        _vsize = as_idx_array(vsize, 'vsize')
+        if _vsize.shape[0] != nvtxs:
+            raise ValueError('len(vsize) != len(xadj) - 1')
+
+    if adjwgt is not None:
+        _adjwgt = adjwgt
+
+    if tpwgts is not None:
+        _tpwgts = as_real_array(tpwgts, 'tpwgts')
+        if _tpwgts.shape[0] % _nparts != 0:
+            raise ValueError('len(tpwgts) % nparts != 0')
+        if ncon == 0:
+            ncon = _tpwgts.shape[0] / _nparts
+        elif _tpwgts.shape[0] != _nparts * ncon:
+            raise ValueError('len(tpwgts) != nparts * ncon')
+    elif ncon == 0:
+        ncon = 1
+
+    if ubvec is not None:
+        _ubvec = as_real_array(ubvec, 'ubvec')
+        if _ubvec.shape[0] != ncon:
+            raise ValueError('len(ubvec) != ncon')
+
+    convert_options(options, _options, stats is not None)
+    if method == PART_REFINE:
+        _initial = as_idx_array(initial, 'part')
+        if _initial.shape[0] != nvtxs:
+            raise ValueError('len(part) != len(xadj) - 1')
+        with nogil:
+            for i from 0 <= i < nvtxs:
+                if _initial[i] < offset or _initial[i] >= _nparts + offset:
+                    bad = i
+                    break
+        if bad >= 0:
+            raise ValueError('part[{0}] is not a valid part'.format(bad))
+    part = output_idx_array(out, nvtxs)
+    _part = part
+    if method == PART_REFINE:
+        _part[:] = _initial
+
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        if method == PART_RECURSIVE:
+            result = _api.METIS_PartGraphRecursive(
+                &nvtxs, &ncon, idx_ptr(_xadj), idx_ptr(_adjncy),
+                idx_ptr(_vwgt), idx_ptr(_vsize), idx_ptr(_adjwgt),
+                &_nparts, real_ptr(_tpwgts), real_ptr(_ubvec),
+                _options, &objval, &_part[0])
+        elif method == PART_REFINE:
+            result = _api.METIS_RefineGraphKway(
+                &nvtxs, &ncon, idx_ptr(_xadj), idx_ptr(_adjncy),
+                idx_ptr(_vwgt), idx_ptr(_vsize), idx_ptr(_adjwgt),
+                &_nparts, real_ptr(_tpwgts), real_ptr(_ubvec),
+                _options, &objval, &_part[0])
         else:
-            ncon = 1
-
-        if ubvec is not None:
-            _ubvec = convert_real_array(ubvec)
-            if len(ubvec) != ncon:
-                raise ValueError('len(ubvec) != ncon')
-
-        convert_options(options, _options)
-        _part = <_api.idx_t*> checked_malloc(sizeof(_api.idx_t) * nvtxs)
-        _recursive = bool(recursive)
-
-        with tempfile.TemporaryFile() as tmp:
-            with redirect_stdout(tmp), nogil:
-                if _recursive:
-                    result = _api.METIS_PartGraphRecursive(
-                        &nvtxs, &ncon, _xadj, _adjncy, _vwgt, _vsize, _adjwgt,
-                        &_nparts, _tpwgts, _ubvec, _options, &objval, _part)
-                else:
-                    result = _api.METIS_PartGraphKway(
-                        &nvtxs, &ncon, _xadj, _adjncy, _vwgt, _vsize, _adjwgt,
-                        &_nparts, _tpwgts, _ubvec, _options, &objval, _part)
-            tmp.seek(0)
-            msg = tmp.read().decode('ascii')
+            result = _api.METIS_PartGraphKway(
+                &nvtxs, &ncon, idx_ptr(_xadj), idx_ptr(_adjncy),
+                idx_ptr(_vwgt), idx_ptr(_vsize), idx_ptr(_adjwgt),
+                &_nparts, real_ptr(_tpwgts), real_ptr(_ubvec),
+                _options, &objval, &_part[0])
+    msg = end_capture(capture_output)
 
-        check_result(result, msg)
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
 
-        part = [_part[i] for i from 0 <= i < nvtxs]
-        return objval, part
-    finally:
-        cpython.mem.PyMem_Free(_xadj)
-        cpython.mem.PyMem_Free(_adjncy)
-        cpython.mem.PyMem_Free(_vwgt)
-        cpython.mem.PyMem_Free(_vsize)
-        cpython.mem.PyMem_Free(_adjwgt)
-        cpython.mem.PyMem_Free(_tpwgts)
-        cpython.mem.PyMem_Free(_ubvec)
-        cpython.mem.PyMem_Free(_part)
+    if not return_array and out is None:
+        part = part.tolist()
+    return objval, part
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def evaluate_partition(xadj, adjncy, part, nparts, vwgt=None, vsize=None,
+                       adjwgt=None):
+    """Compute the quality metrics of a partitioning of a graph, in the way
+    of ``ComputeCut`` and ``ComputeVolume`` of METIS.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph, with zero-based numbering.
+
+    part : sequence or buffer of ints
+        Partition vector, with zero-based numbering.
+
+    nparts : int
+        Number of parts of the partitioning.
+
+    vwgt, vsize, adjwgt : sequences or buffers of ints, optional
+        Weights and sizes of the vertices and weights of the edges. See
+        :func:`part_graph`. Default value: None.
+
+    Returns
+    -------
+    edgecut : int
+        Total weight of the edges between parts.
+
+    volume : int
+        Total communication volume: the sum over the vertices of their sizes
+        times the number of other parts among their neighbors.
+
+    pwgts : NumPy array of idx_t's
+        Weights of the parts, of shape ``(nparts, ncon)``.
+
+    nbnd : NumPy array of idx_t's
+        Number of vertices of each part with neighbors in other parts.
+
+    cxadj, cadjncy, cadjwgt : NumPy arrays of idx_t's
+        Subdomain graph in compressed sparse row format, as computed by
+        ``ComputeSubDomainGraph`` of METIS: the parts adjacent to part `p`
+        are ``cadjncy[cxadj[p]:cxadj[p + 1]]`` in increasing order, and the
+        total weights of the edges to them are the matching entries of
+        ``cadjwgt``. Its size is linear in the number of pairs of adjacent
+        parts rather than quadratic in ``nparts``.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid partition vector.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _part
+    cdef _api.idx_t _nparts = nparts
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _vsize = None
+    cdef const _api.idx_t[::1] _adjwgt = None
+    cdef _api.idx_t ncon = 1
+    cdef _api.idx_t[:, ::1] _pwgts
+    cdef _api.idx_t[::1] _nbnd
+    cdef _api.idx_t[::1] _marker
+    cdef _api.idx_t[::1] _order
+    cdef _api.idx_t[::1] _starts
+    cdef _api.idx_t[::1] _cxadj
+    cdef _api.idx_t[::1] _cadjncy
+    cdef _api.idx_t[::1] _cadjwgt
+    # The totals may exceed idx_t.
+    cdef long long edgecut = 0
+    cdef long long volume = 0
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i, j, k, p, q, w, v
+    cdef bint boundary
+
+    xadj, adjncy, adjwgt = convert_graph(xadj, adjncy, adjwgt)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+    if _nparts < 1:
+        raise ValueError('nparts < 1')
+    _part = as_idx_array(part, 'part')
+    if _part.shape[0] != nvtxs:
+        raise ValueError('len(part) != len(xadj) - 1')
+    if vwgt is not None:
+        vwgt, ncon = as_vwgt_array(vwgt, nvtxs)
+        _vwgt = vwgt
+    if vsize is not None:
+        _vsize = as_idx_array(vsize, 'vsize')
+        if _vsize.shape[0] != nvtxs:
+            raise ValueError('len(vsize) != len(xadj) - 1')
+    if adjwgt is not None:
+        _adjwgt = adjwgt
+
+    pwgts = numpy.zeros((_nparts, ncon), dtype=IDX_DTYPE)
+    nbnd = numpy.zeros(_nparts, dtype=IDX_DTYPE)
+    marker = numpy.full(_nparts, -1, dtype=IDX_DTYPE)
+    _pwgts = pwgts
+    _nbnd = nbnd
+    _marker = marker
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            if p < 0 or p >= _nparts:
+                bad = i
+                break
+    if bad >= 0:
+        raise ValueError('part[{0}] is not a valid part'.format(bad))
+
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            if _vwgt is None:
+                _pwgts[p, 0] += 1
+            else:
+                for j from 0 <= j < ncon:
+                    _pwgts[p, j] += _vwgt[i * ncon + j]
+            boundary = False
+            # The marker of a part is i once it has been counted in the
+            # volume of vertex i.
+            for k from _xadj[i] <= k < _xadj[i + 1]:
+                q = _part[_adjncy[k]]
+                if q == p:
+                    continue
+                boundary = True
+                w = 1 if _adjwgt is None else _adjwgt[k]
+                edgecut += w
+                if _marker[q] != i:
+                    _marker[q] = i
+                    volume += 1 if _vsize is None else _vsize[i]
+            if boundary:
+                _nbnd[p] += 1
+
+    # Subdomain graph: walk the vertices part by part, and count the distinct
+    # adjacent parts of each part before filling in their edge weights. The
+    # marker of a part is its position among the neighbors of the current
+    # part once it has been seen, which is at least cxadj[p].
+    order, starts = group_vertices(numpy.asarray(_part), _nparts)
+    _order = order
+    _starts = starts
+    cxadj = numpy.zeros(_nparts + 1, dtype=IDX_DTYPE)
+    _cxadj = cxadj
+    _marker[:] = -1
+    with nogil:
+        for p from 0 <= p < _nparts:
+            _cxadj[p + 1] = _cxadj[p]
+            for v from _starts[p] <= v < _starts[p + 1]:
+                i = _order[v]
+                for k from _xadj[i] <= k < _xadj[i + 1]:
+                    q = _part[_adjncy[k]]
+                    if q != p and _marker[q] < _cxadj[p]:
+                        _marker[q] = _cxadj[p + 1]
+                        _cxadj[p + 1] += 1
+    cadjncy = numpy.empty(_cxadj[_nparts], dtype=IDX_DTYPE)
+    cadjwgt = numpy.zeros(_cxadj[_nparts], dtype=IDX_DTYPE)
+    _cadjncy = cadjncy
+    _cadjwgt = cadjwgt
+    _marker[:] = -1
+    with nogil:
+        for p from 0 <= p < _nparts:
+            j = _cxadj[p]
+            for v from _starts[p] <= v < _starts[p + 1]:
+                i = _order[v]
+                for k from _xadj[i] <= k < _xadj[i + 1]:
+                    q = _part[_adjncy[k]]
+                    if q == p:
+                        continue
+                    if _marker[q] < _cxadj[p]:
+                        _marker[q] = j
+                        _cadjncy[j] = q
+                        j += 1
+                    _cadjwgt[_marker[q]] += 1 if _adjwgt is None else \
+                        _adjwgt[k]
+    sort = numpy.lexsort((cadjncy, numpy.repeat(numpy.arange(_nparts),
+                                                numpy.diff(cxadj))))
+    return (edgecut // 2, volume, pwgts, nbnd, cxadj, cadjncy[sort],
+            cadjwgt[sort])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def group_vertices(part, nparts):
+    """Group the vertices of a graph by their parts with a counting sort.
+
+    Parameters
+    ----------
+    part : sequence or buffer of ints
+        Partition vector, with zero-based numbering.
+
+    nparts : int
+        Number of parts of the partitioning.
+
+    Returns
+    -------
+    order : NumPy array of idx_t's
+        The vertices sorted by part, in increasing order within each part.
+
+    starts : NumPy array of idx_t's
+        Array of length ``nparts + 1`` such that the vertices of part `i` are
+        ``order[starts[i]:starts[i + 1]]``.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid partition vector.
+    """
+    cdef const _api.idx_t[::1] _part = as_idx_array(part, 'part')
+    cdef _api.idx_t nvtxs = _part.shape[0]
+    cdef _api.idx_t _nparts = nparts
+    cdef _api.idx_t[::1] _order
+    cdef _api.idx_t[::1] _starts
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i, p
+
+    if _nparts < 1:
+        raise ValueError('nparts < 1')
+    order = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    starts = numpy.zeros(_nparts + 1, dtype=IDX_DTYPE)
+    _order = order
+    _starts = starts
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            if p < 0 or p >= _nparts:
+                bad = i
+                break
+            _starts[p + 1] += 1
+        if bad < 0:
+            for p from 0 <= p < _nparts:
+                _starts[p + 1] += _starts[p]
+            # Place the vertices using starts as cursors, then shift it back.
+            for i from 0 <= i < nvtxs:
+                p = _part[i]
+                _order[_starts[p]] = i
+                _starts[p] += 1
+            for p from _nparts >= p >= 1:
+                _starts[p] = _starts[p - 1]
+            _starts[0] = 0
+    if bad >= 0:
+        raise ValueError('part[{0}] is not a valid part'.format(bad))
+    return order, starts
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def group_nodes(nodes, part, nparts):
+    """Group the nodes of a graph into lists by their parts.
+
+    The lists are allocated at their final sizes with a counting pass, then
+    filled in a single pass over ``nodes`` in order.
+
+    Parameters
+    ----------
+    nodes : sequence
+        The nodes labelling the vertices, in order.
+
+    part : sequence or buffer of ints
+        Partition vector, with zero-based numbering.
+
+    nparts : int
+        Number of parts of the partitioning.
+
+    Returns
+    -------
+    groups : list of lists
+        The nodes of each part, in the order of ``nodes``.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid partition vector.
+    """
+    cdef const _api.idx_t[::1] _part = as_idx_array(part, 'part')
+    cdef list _nodes = nodes if type(nodes) is list else list(nodes)
+    cdef _api.idx_t nvtxs = _part.shape[0]
+    cdef _api.idx_t _nparts = nparts
+    cdef _api.idx_t[::1] _cursors
+    cdef list groups
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i, p
+    cdef object u
+
+    if _nparts < 1:
+        raise ValueError('nparts < 1')
+    if len(_nodes) != nvtxs:
+        raise ValueError('len(nodes) != len(part)')
+    cursors = numpy.zeros(_nparts, dtype=IDX_DTYPE)
+    _cursors = cursors
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            if p < 0 or p >= _nparts:
+                bad = i
+                break
+            _cursors[p] += 1
+    if bad >= 0:
+        raise ValueError('part[{0}] is not a valid part'.format(bad))
+
+    groups = [PyList_New(_cursors[p]) for p in range(_nparts)]
+    _cursors[:] = 0
+    for i from 0 <= i < nvtxs:
+        p = _part[i]
+        u = _nodes[i]
+        # PyList_SET_ITEM steals the reference.
+        Py_INCREF(u)
+        PyList_SET_ITEM(groups[p], _cursors[p], u)
+        _cursors[p] += 1
+    return groups
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def connected_components(xadj, adjncy):
+    """Find the connected components of a graph with a breadth-first search.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph, with zero-based numbering.
+
+    Returns
+    -------
+    ncomps : int
+        The number of connected components.
+
+    comp : NumPy array of idx_t's
+        The component of each vertex. Components are numbered in the order of
+        their first vertices.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef _api.idx_t[::1] _comp
+    cdef _api.idx_t[::1] _queue
+    cdef _api.idx_t ncomps = 0
+    cdef _api.idx_t head, tail, i, j, u, v
+
+    xadj, adjncy, _ = convert_graph(xadj, adjncy)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+    comp = numpy.full(nvtxs, -1, dtype=IDX_DTYPE)
+    queue = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    _comp = comp
+    _queue = queue
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            if _comp[i] >= 0:
+                continue
+            _comp[i] = ncomps
+            _queue[0] = i
+            head = 0
+            tail = 1
+            while head < tail:
+                u = _queue[head]
+                head += 1
+                for j from _xadj[u] <= j < _xadj[u + 1]:
+                    v = _adjncy[j]
+                    if _comp[v] < 0:
+                        _comp[v] = ncomps
+                        _queue[tail] = v
+                        tail += 1
+            ncomps += 1
+    return ncomps, comp
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def split_graph(xadj, adjncy, part, nparts, vwgt=None, vsize=None,
+                adjwgt=None):
+    """Split a graph into the subgraphs induced by the parts of a
+    partitioning.
+
+    The subgraphs are extracted in a single pass over the adjacency
+    structure, without converting the graph to another representation. The
+    edges between parts are dropped.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph, with zero-based numbering.
+
+    part : sequence or buffer of ints
+        Partition vector, with zero-based numbering.
+
+    nparts : int
+        Number of parts of the partitioning.
+
+    vwgt, vsize, adjwgt : sequences or buffers of ints, optional
+        Weights and sizes of the vertices and weights of the edges, which
+        are split with the graph. See :func:`part_graph`. Default value:
+        None.
+
+    Returns
+    -------
+    subgraphs : list of tuples
+        For each part, a tuple ``(vertices, xadj, adjncy, vwgt, vsize,
+        adjwgt)`` of NumPy arrays of idx_t's. ``vertices`` holds the vertices
+        of the part in increasing order, the `i`-th of which is vertex `i` of
+        the subgraph. The weights are None if they are not given.
+        ``vwgt`` holds the weights of the vertices of the subgraph stored
+        contiguously, as returned by ``as_vwgt_array``.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid partition vector.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _part
+    cdef _api.idx_t _nparts = nparts
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _vsize = None
+    cdef const _api.idx_t[::1] _adjwgt = None
+    cdef _api.idx_t ncon = 1
+    cdef _api.idx_t[::1] _vstart
+    cdef _api.idx_t[::1] _estart
+    cdef _api.idx_t[::1] _vertices
+    cdef _api.idx_t[::1] _local
+    cdef _api.idx_t[::1] _new_xadj
+    cdef _api.idx_t[::1] _new_adjncy
+    cdef _api.idx_t[::1] _new_vwgt = None
+    cdef _api.idx_t[::1] _new_vsize = None
+    cdef _api.idx_t[::1] _new_adjwgt = None
+    cdef _api.idx_t bad = -1
+    cdef _api.idx_t i, j, k, p, v, u
+
+    xadj, adjncy, adjwgt = convert_graph(xadj, adjncy, adjwgt)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+    if _nparts < 1:
+        raise ValueError('nparts < 1')
+    _part = as_idx_array(part, 'part')
+    if _part.shape[0] != nvtxs:
+        raise ValueError('len(part) != len(xadj) - 1')
+    if vwgt is not None:
+        vwgt, ncon = as_vwgt_array(vwgt, nvtxs)
+        _vwgt = vwgt
+    if vsize is not None:
+        _vsize = as_idx_array(vsize, 'vsize')
+        if _vsize.shape[0] != nvtxs:
+            raise ValueError('len(vsize) != len(xadj) - 1')
+    if adjwgt is not None:
+        _adjwgt = adjwgt
+
+    # Count the vertices and the internal adjacency entries of each part.
+    vstart = numpy.zeros(_nparts + 1, dtype=IDX_DTYPE)
+    estart = numpy.zeros(_nparts + 1, dtype=IDX_DTYPE)
+    _vstart = vstart
+    _estart = estart
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            if p < 0 or p >= _nparts:
+                bad = i
+                break
+            _vstart[p + 1] += 1
+            for j from _xadj[i] <= j < _xadj[i + 1]:
+                if _part[_adjncy[j]] == p:
+                    _estart[p + 1] += 1
+        if bad < 0:
+            for p from 0 <= p < _nparts:
+                _vstart[p + 1] += _vstart[p]
+                _estart[p + 1] += _estart[p]
+    if bad >= 0:
+        raise ValueError('part[{0}] is not a valid part'.format(bad))
+
+    # The subgraphs are stored one after the other in shared arrays, the
+    # xadj of part p starting at vstart[p] + p.
+    vertices = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    local = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    new_xadj = numpy.empty(nvtxs + _nparts, dtype=IDX_DTYPE)
+    new_adjncy = numpy.empty(_estart[_nparts], dtype=IDX_DTYPE)
+    _vertices = vertices
+    _local = local
+    _new_xadj = new_xadj
+    _new_adjncy = new_adjncy
+    new_vwgt = new_vsize = new_adjwgt = None
+    if _vwgt is not None:
+        new_vwgt = numpy.empty(nvtxs * ncon, dtype=IDX_DTYPE)
+        _new_vwgt = new_vwgt
+    if _vsize is not None:
+        new_vsize = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+        _new_vsize = new_vsize
+    if _adjwgt is not None:
+        new_adjwgt = numpy.empty(_estart[_nparts], dtype=IDX_DTYPE)
+        _new_adjwgt = new_adjwgt
+
+    with nogil:
+        # Number the vertices of each part, using vstart as cursors.
+        for i from 0 <= i < nvtxs:
+            p = _part[i]
+            v = _vstart[p]
+            _vertices[v] = i
+            _local[i] = v
+            _vstart[p] += 1
+        for p from _nparts > p >= 1:
+            _vstart[p] = _vstart[p - 1]
+        _vstart[0] = 0
+        for p from 0 <= p < _nparts:
+            k = _estart[p]
+            _new_xadj[_vstart[p] + p] = 0
+            for v from _vstart[p] <= v < _vstart[p + 1]:
+                i = _vertices[v]
+                for j from _xadj[i] <= j < _xadj[i + 1]:
+                    u = _adjncy[j]
+                    if _part[u] == p:
+                        _new_adjncy[k] = _local[u] - _vstart[p]
+                        if _adjwgt is not None:
+                            _new_adjwgt[k] = _adjwgt[j]
+                        k += 1
+                _new_xadj[v + p + 1] = k - _estart[p]
+                if _vwgt is not None:
+                    for j from 0 <= j < ncon:
+                        _new_vwgt[v * ncon + j] = _vwgt[i * ncon + j]
+                if _vsize is not None:
+                    _new_vsize[v] = _vsize[i]
+
+    subgraphs = []
+    for p in range(_nparts):
+        vs = slice(vstart[p], vstart[p + 1])
+        es = slice(estart[p], estart[p + 1])
+        subgraphs.append((
+            vertices[vs], new_xadj[vstart[p] + p:vstart[p + 1] + p + 1],
+            new_adjncy[es],
+            None if new_vwgt is None else
+            new_vwgt[vstart[p] * ncon:vstart[p + 1] * ncon],
+            None if new_vsize is None else new_vsize[vs],
+            None if new_adjwgt is None else new_adjwgt[es]))
+    return subgraphs
+
+
+cdef inline unsigned long long hash_vertex(_api.idx_t v) nogil:
+    """Scramble the number of a vertex, so that sums of the hashes of
+    different sets of vertices rarely collide.
+    """
+    cdef unsigned long long h = <unsigned long long>(v + 1)
+    h *= 0x9E3779B97F4A7C15ULL
+    return h ^ (h >> 29)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def compress_graph(xadj, adjncy, vwgt=None, vsize=None, adjwgt=None,
+                   maxvwgt=None):
+    """Merge the vertices of a graph with identical adjacency into weighted
+    super-vertices.
+
+    Two vertices are merged if they have the same neighbors besides each
+    other, with the same edge weights, whether they are adjacent or not. As
+    in the compression of METIS for nested dissection, candidates are found
+    by sorting the vertices by degree and by a key summing their neighbors,
+    and the adjacency list of each vertex is compared with those of the
+    following vertices with the same key.
+
+    The weights and sizes of the vertices of each super-vertex are summed, as
+    are the weights of the edges between two super-vertices, while the edges
+    inside a super-vertex are dropped. The edge-cut, the communication volume
+    and the part weights of a partitioning of the compressed graph are thus
+    those of the partitioning of the graph that gives each vertex the part of
+    its super-vertex.
+
+    Twins are merged in order until the weight of their super-vertex would
+    exceed ``maxvwgt``, and the remaining twins start super-vertices of their
+    own. This keeps the isolated vertices, which are all twins, or the leaves
+    of a hub from collapsing into a single vertex too heavy to balance.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph, with zero-based numbering.
+
+    vwgt, vsize, adjwgt : sequences or buffers of ints, optional
+        Weights and sizes of the vertices and weights of the edges. See
+        :func:`part_graph`. If None, they are all one. Default value: None.
+
+    maxvwgt : sequence of ints, optional
+        Largest weight of a super-vertex for each constraint. If None, the
+        weights are not limited. Default value: None.
+
+    Returns
+    -------
+    cmap : NumPy array of idx_t's
+        The super-vertex of each vertex. Super-vertices are numbered in the
+        order of their first vertices.
+
+    xadj, adjncy, vwgt, vsize, adjwgt : NumPy arrays of idx_t's
+        The compressed graph, with the weights of each super-vertex stored
+        contiguously, as returned by ``as_vwgt_array``.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _vsize = None
+    cdef const _api.idx_t[::1] _adjwgt = None
+    cdef _api.idx_t ncon = 1
+    cdef unsigned long long[::1] _keys
+    cdef const _api.idx_t[::1] _order
+    cdef _api.idx_t[::1] _rep
+    cdef _api.idx_t[::1] _mark
+    cdef _api.idx_t[::1] _wmark = None
+    cdef _api.idx_t[::1] _maxvwgt = None
+    cdef _api.idx_t[::1] _gwgt = None
+    cdef _api.idx_t[::1] _cmap
+    cdef _api.idx_t[::1] _cstart
+    cdef _api.idx_t[::1] _members
+    cdef _api.idx_t[::1] _cxadj
+    cdef _api.idx_t[::1] _cadjncy
+    cdef _api.idx_t[::1] _cvwgt
+    cdef _api.idx_t[::1] _cvsize
+    cdef _api.idx_t[::1] _cadjwgt
+    cdef bint closed, twin
+    cdef unsigned long long key
+    cdef _api.idx_t ncvtxs = 0
+    cdef _api.idx_t a, b, c, i, j, k, l, m, u, v, w, deg
+
+    xadj, adjncy, adjwgt = convert_graph(xadj, adjncy, adjwgt)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+    if vwgt is not None:
+        vwgt, ncon = as_vwgt_array(vwgt, nvtxs)
+        _vwgt = vwgt
+    if vsize is not None:
+        _vsize = as_idx_array(vsize, 'vsize')
+        if _vsize.shape[0] != nvtxs:
+            raise ValueError('len(vsize) != len(xadj) - 1')
+    if adjwgt is not None:
+        _adjwgt = adjwgt
+        wmark = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+        _wmark = wmark
+    if maxvwgt is not None:
+        if len(maxvwgt) != ncon:
+            raise ValueError('len(maxvwgt) != ncon')
+        _maxvwgt = numpy.minimum(maxvwgt, numpy.iinfo(IDX_DTYPE).max).astype(
+            IDX_DTYPE)
+        # gwgt holds the weights of the super-vertex of each first vertex.
+        if vwgt is None:
+            gwgt = numpy.ones(nvtxs, dtype=IDX_DTYPE)
+        else:
+            gwgt = numpy.array(vwgt, dtype=IDX_DTYPE)
+        _gwgt = gwgt
+
+    keys = numpy.empty(nvtxs, dtype=numpy.uint64)
+    _keys = keys
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            key = 0
+            for j from _xadj[i] <= j < _xadj[i + 1]:
+                key += hash_vertex(_adjncy[j])
+            _keys[i] = key
+    degrees = numpy.diff(xadj)
+
+    # rep holds the first vertex found of the super-vertex of each vertex.
+    # Adjacent twins are found with keys including the vertices themselves,
+    # then non-adjacent twins with keys of their neighbors only. No vertex
+    # has twins of both kinds.
+    rep = numpy.arange(nvtxs, dtype=IDX_DTYPE)
+    mark = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    _rep = rep
+    _mark = mark
+    for closed in (True, False):
+        if closed:
+            _keys = keys.copy()
+            with nogil:
+                for i from 0 <= i < nvtxs:
+                    _keys[i] += hash_vertex(i)
+        else:
+            _keys = keys
+        order = numpy.lexsort((numpy.asarray(_keys), degrees))
+        _order = order.astype(IDX_DTYPE)
+        mark.fill(-1)
+        with nogil:
+            for a from 0 <= a < nvtxs:
+                i = _order[a]
+                if _rep[i] != i:
+                    continue
+                if closed:
+                    _mark[i] = a
+                for j from _xadj[i] <= j < _xadj[i + 1]:
+                    _mark[_adjncy[j]] = a
+                    if _adjwgt is not None:
+                        _wmark[_adjncy[j]] = _adjwgt[j]
+                deg = _xadj[i + 1] - _xadj[i]
+                for b from a < b < nvtxs:
+                    c = _order[b]
+                    if (_keys[c] != _keys[i] or
+                            _xadj[c + 1] - _xadj[c] != deg):
+                        break
+                    if _rep[c] != c:
+                        continue
+                    twin = True
+                    for j from _xadj[c] <= j < _xadj[c + 1]:
+                        u = _adjncy[j]
+                        if _mark[u] != a or (_adjwgt is not None and u != i and
+                                             _wmark[u] != _adjwgt[j]):
+                            twin = False
+                            break
+                    if twin and _gwgt is not None:
+                        for j from 0 <= j < ncon:
+                            if (_gwgt[i * ncon + j] >
+                                    _maxvwgt[j] - _gwgt[c * ncon + j]):
+                                twin = False
+                                break
+                        if twin:
+                            for j from 0 <= j < ncon:
+                                _gwgt[i * ncon + j] += _gwgt[c * ncon + j]
+                    if twin:
+                        _rep[c] = i
+
+    # Number the super-vertices and list their vertices.
+    cmap = numpy.full(nvtxs, -1, dtype=IDX_DTYPE)
+    _cmap = cmap
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            if _cmap[_rep[i]] < 0:
+                _cmap[_rep[i]] = ncvtxs
+                ncvtxs += 1
+            _cmap[i] = _cmap[_rep[i]]
+    cstart = numpy.zeros(ncvtxs + 1, dtype=IDX_DTYPE)
+    members = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    cxadj = numpy.empty(ncvtxs + 1, dtype=IDX_DTYPE)
+    cadjncy = numpy.empty(_adjncy.shape[0], dtype=IDX_DTYPE)
+    cvwgt = numpy.zeros(ncvtxs * ncon, dtype=IDX_DTYPE)
+    cvsize = numpy.zeros(ncvtxs, dtype=IDX_DTYPE)
+    cadjwgt = numpy.empty(_adjncy.shape[0], dtype=IDX_DTYPE)
+    _cstart = cstart
+    _members = members
+    _cxadj = cxadj
+    _cadjncy = cadjncy
+    _cvwgt = cvwgt
+    _cvsize = cvsize
+    _cadjwgt = cadjwgt
+    mark.fill(-1)
+
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            _cstart[_cmap[i] + 1] += 1
+        for c from 0 <= c < ncvtxs:
+            _cstart[c + 1] += _cstart[c]
+        for i from 0 <= i < nvtxs:
+            c = _cmap[i]
+            _members[_cstart[c]] = i
+            _cstart[c] += 1
+        for c from ncvtxs > c >= 1:
+            _cstart[c] = _cstart[c - 1]
+        _cstart[0] = 0
+
+        # Merge the adjacency lists of the vertices of each super-vertex,
+        # with mark holding the position of each neighbor in the merged list.
+        l = 0
+        _cxadj[0] = 0
+        for c from 0 <= c < ncvtxs:
+            k = l
+            for m from _cstart[c] <= m < _cstart[c + 1]:
+                i = _members[m]
+                for j from _xadj[i] <= j < _xadj[i + 1]:
+                    v = _cmap[_adjncy[j]]
+                    if v == c:
+                        continue
+                    w = 1 if _adjwgt is None else _adjwgt[j]
+                    if _mark[v] < k:
+                        _mark[v] = l
+                        _cadjncy[l] = v
+                        _cadjwgt[l] = w
+                        l += 1
+                    else:
+                        _cadjwgt[_mark[v]] += w
+                if _vwgt is None:
+                    _cvwgt[c] += 1
+                else:
+                    for j from 0 <= j < ncon:
+                        _cvwgt[c * ncon + j] += _vwgt[i * ncon + j]
+                _cvsize[c] += 1 if _vsize is None else _vsize[i]
+            _cxadj[c + 1] = l
+
+    return (cmap, cxadj, cadjncy[:l].copy(), cvwgt, cvsize,
+            cadjwgt[:l].copy())
 
 
-def node_nd(xadj, adjncy, vwgt=None, options=None):
+def node_nd(xadj, adjncy, vwgt=None, options=None, return_array=False,
+            out=None, capture_output=True, stats=None, return_tree=False):
     """Computes fill reducing orderings of sparse matrices using the multilevel
     nested dissection algorithm.
 
     Parameters
     ----------
 
-    xadj, adjncy : lists of ints
-        Adjacency structure of the graph.
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph. C-contiguous arrays of idx_t's
+        (NumPy arrays of the data type returned by :func:`idx_dtype` for the
+        graph) are passed to METIS without copying.
 
-    vwgt : list of ints, optional
+    vwgt : sequence or buffer of ints, optional
         Weights of the vertices. If the graph is weighted, the nested
         dissection ordering computes vertex separators that minimize the sum of
         the weights of the vertices on the separators. Default value: None.
@@ -313,9 +1508,34 @@ def node_nd(xadj, adjncy, vwgt=None, options=None):
     options : MetisOptions
         Options. Default value: None
 
+    return_array : bool
+        If True, the permutations are returned as NumPy arrays of idx_t's
+        instead of lists. Default value: False.
+
+    out : pair of writable buffers of idx_t's, optional
+        C-contiguous buffers of length `\text{len}(\text{xadj}) - 1` into
+        which METIS writes perm and iperm directly. They are returned in place
+        of new lists, so that output storage can be reused across calls.
+        Default value: None.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured in a buffer
+        private to the calling thread and included in the message of any
+        MetisError raised. If False, it is written to ``stdout``. Process-wide
+        ``stdout`` is never redirected. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
+    return_tree : bool
+        If True, the separator tree of the nested dissection is also returned.
+        Default value: False.
+
     Returns
     -------
-    perm, iperm : lists of ints
+    perm, iperm : lists of ints, NumPy arrays or ``out``
         Upon successful completion, they store the fill-reducing permutation
         and inverse permutation. Let A be the original matrix and `A'` be the
         permuted matrix. The arrays perm and iperm are defined as follows. Row
@@ -324,6 +1544,18 @@ def node_nd(xadj, adjncy, vwgt=None, options=None):
         numbering of this vector starts from either 0 or 1, depending on the
         value of options.numbering.
 
+    tree : list of lists of four ints or NumPy array of shape (nnodes, 4)
+        Only returned if ``return_tree`` is True. The nodes of the separator
+        tree in pre-order, each given as ``[first, sep, last, parent]``. The
+        subtree of the node is ordered in positions ``first`` to
+        ``last - 1`` of perm, and its own vertices in positions ``sep`` to
+        ``last - 1``. These are the vertices of a separator, which is ordered
+        after the subtrees of its children, or the vertices of a leaf ordered
+        by minimum degree, for which ``sep == first``. ``parent`` is the index
+        of the parent node, or -1 for the root. The positions start from 0
+        regardless of options.numbering. Disjoint subtrees can be factored
+        independently.
+
     Raises
     ------
     MetisError
@@ -335,46 +1567,65 @@ def node_nd(xadj, adjncy, vwgt=None, options=None):
     memory safety in invocation of METIS.
     """
     cdef _api.idx_t nvtxs
-    cdef _api.idx_t *_xadj = NULL
-    cdef _api.idx_t *_adjncy = NULL
-    cdef _api.idx_t *_vwgt = NULL
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _vwgt = None
     cdef _api.idx_t _options[_api.METIS_NOPTIONS]
-    cdef _api.idx_t *_perm = NULL
-    cdef _api.idx_t *_iperm = NULL
+    cdef _api.idx_t[::1] _perm
+    cdef _api.idx_t[::1] _iperm
+    cdef _api.idx_t nnodes = 0
+    cdef _api.idx_t *_tree = NULL
+    cdef bint _return_tree = return_tree
     cdef int result
-    cdef _api.idx_t i
-    try:
-        convert_graph(xadj, adjncy, &nvtxs, &_xadj, &_adjncy)
-
-        if vwgt is not None:
-            _vwgt = convert_idx_array(vwgt)
-            if len(vwgt) != nvtxs:
-                raise ValueError(
-                    'length of vwgt is not equal to len(xadj) - 1')
-
-        convert_options(options, _options)
-
-        _perm = <_api.idx_t*> checked_malloc(sizeof(_api.idx_t) * nvtxs)
-        _iperm = <_api.idx_t*> checked_malloc(sizeof(_api.idx_t) * nvtxs)
-
-        with tempfile.TemporaryFile() as tmp:
-            with redirect_stdout(tmp), nogil:
-                result = _api.METIS_NodeND(&nvtxs, _xadj, _adjncy, _vwgt, _options,
-                                           _perm, _iperm)
-            tmp.seek(0)
-            msg = tmp.read().decode('ascii')
-
-        check_result(result, msg)
 
-        perm = [_perm[i] for i from 0 <= i < nvtxs]
-        iperm = [_iperm[i] for i from 0 <= i < nvtxs]
+    xadj, adjncy, _ = convert_graph(xadj, adjncy, None, get_numbering(options))
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+
+    if vwgt is not None:
+        _vwgt = as_idx_array(vwgt, 'vwgt')
+        if _vwgt.shape[0] != nvtxs:
+            raise ValueError(
+                'length of vwgt is not equal to len(xadj) - 1')
+
+    convert_options(options, _options, stats is not None)
+
+    if out is not None:
+        perm, iperm = out
+    else:
+        perm = iperm = None
+    perm = output_idx_array(perm, nvtxs, 'perm')
+    iperm = output_idx_array(iperm, nvtxs, 'iperm')
+    _perm = perm
+    _iperm = iperm
+
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        if _return_tree:
+            result = _api.METIS_NodeNDTree(
+                &nvtxs, idx_ptr(_xadj), idx_ptr(_adjncy), idx_ptr(_vwgt),
+                _options, &_perm[0], &_iperm[0], &nnodes, &_tree)
+        else:
+            result = _api.METIS_NodeND(
+                &nvtxs, idx_ptr(_xadj), idx_ptr(_adjncy), idx_ptr(_vwgt),
+                _options, &_perm[0], &_iperm[0])
+    msg = end_capture(capture_output)
+
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
+
+    if not return_array and out is None:
+        perm = perm.tolist()
+        iperm = iperm.tolist()
+    if not return_tree:
         return perm, iperm
-    finally:
-        cpython.mem.PyMem_Free(_xadj)
-        cpython.mem.PyMem_Free(_adjncy)
-        cpython.mem.PyMem_Free(_vwgt)
-        cpython.mem.PyMem_Free(_perm)
-        cpython.mem.PyMem_Free(_iperm)
+    tree = wrap_metis_array(_tree, 4 * nnodes).reshape(nnodes, 4)
+    if not return_array:
+        tree = tree.tolist()
+    return perm, iperm, tree
 
 
 def set_default_options(options):
@@ -407,40 +1658,693 @@ def set_default_options(options):
     options.dbglvl    = _options[<_api.idx_t> _api.METIS_OPTION_DBGLVL]
 
 
-def compute_vertex_separator(xadj, adjncy, vwgt=None, options=None):
+def compute_vertex_separator(xadj, adjncy, vwgt=None, options=None,
+                             return_array=False, out=None,
+                             capture_output=True, stats=None):
+    """Compute a vertex separator that bisects a graph.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph. C-contiguous arrays of idx_t's
+        (NumPy arrays of the data type returned by :func:`idx_dtype` for the
+        graph) are passed to METIS without copying.
+
+    vwgt : sequence or buffer of ints, optional
+        Weights of the vertices. Default value: None.
+
+    options : MetisOptions
+        Options. Default value: None
+
+    return_array : bool
+        If True, the partition vector is returned as a NumPy array of idx_t's
+        instead of a list. Default value: False.
+
+    out : writable buffer of idx_t's, optional
+        C-contiguous buffer of length `\text{len}(\text{xadj}) - 1` into
+        which METIS writes the partition vector directly. It is returned in
+        place of a new list. Default value: None.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured in a buffer
+        private to the calling thread and included in the message of any
+        MetisError raised. If False, it is written to ``stdout``. Process-wide
+        ``stdout`` is never redirected. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
+    Returns
+    -------
+    sepsize : int
+        The total weight of the vertices in the separator.
+
+    part : list of ints, NumPy array or ``out``
+        The partition vector of the graph. Vertices in the two parts are
+        labeled 0 and 1, and vertices in the separator are labeled 2.
+
+    Raises
+    ------
+    MetisError
+        If METIS returns an error status.
+    """
     cdef _api.idx_t nvtxs
-    cdef _api.idx_t *_xadj = NULL
-    cdef _api.idx_t *_adjncy = NULL
-    cdef _api.idx_t *_vwgt = NULL
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _vwgt = None
     cdef _api.idx_t _options[_api.METIS_NOPTIONS]
     cdef _api.idx_t sepsize
-    cdef _api.idx_t *_part = NULL
+    cdef _api.idx_t[::1] _part
     cdef int result
-    cdef int i
-    try:
-        convert_graph(xadj, adjncy, &nvtxs, &_xadj, &_adjncy)
 
-        if vwgt is not None:
-            _vwgt = convert_idx_array(vwgt)
-            if len(vwgt) != nvtxs:
-                raise ValueError('len(vwgt) != len(xadj) - 1')
+    xadj, adjncy, _ = convert_graph(xadj, adjncy, None, get_numbering(options))
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
 
-        convert_options(options, _options)
-        _part = <_api.idx_t*> checked_malloc(sizeof(_api.idx_t) * nvtxs)
+    if vwgt is not None:
+        _vwgt = as_idx_array(vwgt, 'vwgt')
+        if _vwgt.shape[0] != nvtxs:
+            raise ValueError('len(vwgt) != len(xadj) - 1')
 
-        with tempfile.TemporaryFile() as tmp:
-            with redirect_stdout(tmp), nogil:
-                result = _api.METIS_ComputeVertexSeparator(
-                    &nvtxs, _xadj, _adjncy, _vwgt, _options, &sepsize, _part)
-            tmp.seek(0)
-            msg = tmp.read().decode('ascii')
+    convert_options(options, _options, stats is not None)
+    part = output_idx_array(out, nvtxs)
+    _part = part
 
-        check_result(result, msg)
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        result = _api.METIS_ComputeVertexSeparator(
+            &nvtxs, idx_ptr(_xadj), idx_ptr(_adjncy), idx_ptr(_vwgt),
+            _options, &sepsize, &_part[0])
+    msg = end_capture(capture_output)
 
-        part = [_part[i] for i from 0 <= i < nvtxs]
-        return sepsize, part
-    finally:
-        cpython.mem.PyMem_Free(_xadj)
-        cpython.mem.PyMem_Free(_adjncy)
-        cpython.mem.PyMem_Free(_vwgt)
-        cpython.mem.PyMem_Free(_part)
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
+
+    if not return_array and out is None:
+        part = part.tolist()
+    return sepsize, part
+
+
+def node_ndp(xadj, adjncy, npes, vwgt=None, options=None, return_array=False,
+             capture_output=True, stats=None):
+    """Compute a fill reducing ordering with at least `\log_2 \text{npes}`
+    levels of nested dissection, and the sizes of the top levels of the
+    separator tree.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph. C-contiguous arrays of idx_t's
+        (NumPy arrays of the data type returned by :func:`idx_dtype` for the
+        graph) are passed to METIS without copying.
+
+    npes : int
+        Number of subdomains at the bottom of the top levels of the separator
+        tree. It should be a power of 2 and at least 2.
+
+    vwgt : sequence or buffer of ints, optional
+        Weights of the vertices. Default value: None.
+
+    options : MetisOptions
+        Options. Default value: None
+
+    return_array : bool
+        If True, the vectors are returned as NumPy arrays of idx_t's instead
+        of lists. Default value: False.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured in a buffer
+        private to the calling thread and included in the message of any
+        MetisError raised. If False, it is written to ``stdout``. Process-wide
+        ``stdout`` is never redirected. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
+    Returns
+    -------
+    perm, iperm : lists of ints or NumPy arrays
+        The fill-reducing permutation and inverse permutation, as returned by
+        :func:`node_nd`.
+
+    sizes : list of ints or NumPy array
+        List of length `2 \times \text{npes} - 1`. Its first ``npes`` entries
+        are the sizes of the subdomains, followed by the sizes of the
+        separators, level by level from the bottom of the tree to the
+        top-level separator, which comes last. Subdomains and separators are
+        listed in the order of their vertices in ``perm``. The sizes are total
+        vertex weights, which are vertex counts if ``vwgt`` is None.
+
+    Raises
+    ------
+    ValueError
+        If ``npes`` is not a power of 2.
+
+    MetisError
+        If METIS returns an error status.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef _api.idx_t _npes = npes
+    cdef _api.idx_t _options[_api.METIS_NOPTIONS]
+    cdef _api.idx_t offset = get_numbering(options)
+    cdef _api.idx_t[::1] _perm
+    cdef _api.idx_t[::1] _iperm
+    cdef _api.idx_t[::1] _sizes
+    cdef int result
+
+    if _npes < 2 or _npes & (_npes - 1):
+        raise ValueError('npes is not a power of 2')
+
+    xadj, adjncy, _ = convert_graph(xadj, adjncy, None, offset)
+    if offset:
+        # METIS_NodeNDP only supports zero-based numbering, and the arrays
+        # are copies in this case.
+        xadj -= offset
+        adjncy -= offset
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+
+    if vwgt is not None:
+        _vwgt = as_idx_array(vwgt, 'vwgt')
+        if _vwgt.shape[0] != nvtxs:
+            raise ValueError('len(vwgt) != len(xadj) - 1')
+
+    convert_options(options, _options, stats is not None)
+    _options[<_api.idx_t> _api.METIS_OPTION_NUMBERING] = 0
+    perm = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    iperm = numpy.empty(nvtxs, dtype=IDX_DTYPE)
+    sizes = numpy.empty(2 * _npes - 1, dtype=IDX_DTYPE)
+    _perm = perm
+    _iperm = iperm
+    _sizes = sizes
+
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        result = _api.METIS_NodeNDP(
+            nvtxs, idx_ptr(_xadj), idx_ptr(_adjncy), idx_ptr(_vwgt), _npes,
+            _options, &_perm[0], &_iperm[0], &_sizes[0])
+    msg = end_capture(capture_output)
+
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
+
+    if offset:
+        perm += offset
+        iperm += offset
+    if not return_array:
+        perm = perm.tolist()
+        iperm = iperm.tolist()
+        sizes = sizes.tolist()
+    return perm, iperm, sizes
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def node_refine(xadj, adjncy, part, vwgt=None, hmarker=None, ubfactor=1.05,
+                return_array=False, out=None, capture_output=True,
+                stats=None):
+    """Refine a vertex separator that bisects a graph.
+
+    Vertices in the separator are moved into one of the parts when this
+    reduces the total weight of the separator, pulling their neighbors in the
+    other part into the separator.
+
+    Parameters
+    ----------
+    xadj, adjncy : sequences or buffers of ints
+        Adjacency structure of the graph, with zero-based numbering.
+
+    part : sequence or buffer of ints
+        The partition vector of the separator to refine, as returned by
+        :func:`compute_vertex_separator`. Vertices in the two parts are
+        labeled 0 and 1, and vertices in the separator are labeled 2. No edge
+        may join the two parts.
+
+    vwgt : sequence or buffer of ints, optional
+        Weights of the vertices. Default value: None.
+
+    hmarker : sequence or buffer of ints, optional
+        Restrictions on the moves of the separator vertices. Vertex `i` may
+        only move to part `\text{hmarker}[i]` if it is 0 or 1, may move to
+        either part if it is -1, and stays in the separator otherwise. If
+        None, all vertices may move to either part. Default value: None.
+
+    ubfactor : float
+        Allowed imbalance of the parts. No part may grow beyond ``ubfactor``
+        times the weight of the heavier part of ``part``. Default value:
+        1.05.
+
+    return_array : bool
+        If True, the partition vector is returned as a NumPy array of idx_t's
+        instead of a list. Default value: False.
+
+    out : writable buffer of idx_t's, optional
+        C-contiguous buffer of length `\text{len}(\text{xadj}) - 1` into
+        which the refined partition vector is written. It may be ``part``
+        itself to refine the separator in place. Default value: None.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured in a buffer
+        private to the calling thread and included in the message of any
+        MetisError raised. If False, it is written to ``stdout``. Process-wide
+        ``stdout`` is never redirected. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. METIS
+        does not time separator refinement, so only the memory statistics are
+        set. Default value: None.
+
+    Returns
+    -------
+    sepsize : int
+        The total weight of the vertices in the refined separator.
+
+    part : list of ints, NumPy array or ``out``
+        The refined partition vector.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is not a valid vertex separator.
+
+    MetisError
+        If METIS returns an error status.
+    """
+    cdef _api.idx_t nvtxs
+    cdef const _api.idx_t[::1] _xadj
+    cdef const _api.idx_t[::1] _adjncy
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _initial
+    cdef const _api.idx_t[::1] _hmarker
+    cdef _api.idx_t[::1] _part
+    cdef _api.real_t _ubfactor = ubfactor
+    cdef _api.idx_t sepsize = 0
+    cdef _api.idx_t bad = -1
+    cdef bint badedge = False
+    cdef _api.idx_t i, j
+    cdef int result
+
+    xadj, adjncy, _ = convert_graph(xadj, adjncy)
+    _xadj = xadj
+    _adjncy = adjncy
+    nvtxs = _xadj.shape[0] - 1
+
+    if vwgt is not None:
+        _vwgt = as_idx_array(vwgt, 'vwgt')
+        if _vwgt.shape[0] != nvtxs:
+            raise ValueError('len(vwgt) != len(xadj) - 1')
+
+    _initial = as_idx_array(part, 'part')
+    if _initial.shape[0] != nvtxs:
+        raise ValueError('len(part) != len(xadj) - 1')
+    with nogil:
+        for i from 0 <= i < nvtxs:
+            if _initial[i] < 0 or _initial[i] > 2:
+                bad = i
+                break
+            if _initial[i] != 2:
+                for j from _xadj[i] <= j < _xadj[i + 1]:
+                    if _initial[_adjncy[j]] == 1 - _initial[i]:
+                        bad = i
+                        badedge = True
+                        break
+                if badedge:
+                    break
+    if badedge:
+        raise ValueError(
+            'part[{0}] is adjacent to the other part'.format(bad))
+    if bad >= 0:
+        raise ValueError('part[{0}] is not 0, 1 or 2'.format(bad))
+
+    if hmarker is None:
+        hmarker = numpy.full(nvtxs, -1, dtype=IDX_DTYPE)
+    _hmarker = as_idx_array(hmarker, 'hmarker')
+    if _hmarker.shape[0] != nvtxs:
+        raise ValueError('len(hmarker) != len(xadj) - 1')
+
+    part = output_idx_array(out, nvtxs)
+    _part = part
+    _part[:] = _initial
+
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        result = _api.METIS_NodeRefine(
+            nvtxs, idx_ptr(_xadj), idx_ptr(_vwgt), idx_ptr(_adjncy),
+            &_part[0], <_api.idx_t*> idx_ptr(_hmarker), _ubfactor)
+        if result == _api.METIS_OK:
+            for i from 0 <= i < nvtxs:
+                if _part[i] == 2:
+                    sepsize += 1 if _vwgt is None else _vwgt[i]
+    msg = end_capture(capture_output)
+
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
+
+    if not return_array and out is None:
+        part = part.tolist()
+    return sepsize, part
+
+
+def part_mesh_nodal(eptr, eind, nparts, nn=None, vwgt=None, vsize=None,
+                    tpwgts=None, options=None, return_array=False,
+                    capture_output=True, stats=None):
+    """Partition a mesh into `k` parts by partitioning its nodal graph.
+
+    Parameters
+    ----------
+    eptr, eind : sequences or buffers of ints
+        Element-node structure of the mesh. The nodes of the `i`-th element
+        are stored in `\text{eind}[\text{eptr}[i]:\text{eptr}[i + 1]]`.
+        C-contiguous arrays of idx_t's are passed to METIS without copying.
+
+    nparts : int
+        Number of parts to partition the mesh. It should be at least 2.
+
+    nn : int, optional
+        Number of nodes of the mesh. If None, it is inferred from the largest
+        node number in ``eind``. Default value: None.
+
+    vwgt : sequence or buffer of ints, optional
+        Weights of the nodes. Default value: None.
+
+    vsize : sequence or buffer of ints, optional
+        Sizes of the nodes for computing the total communication volume.
+        Default value: None.
+
+    tpwgts : sequence or buffer of floats, optional
+        List of size `\text{nparts}` that specifies the desired weight for
+        each partition. If None, the mesh is equally divided among the
+        partitions. Default value: None.
+
+    options : MetisOptions
+        Options. Default value: None
+
+    return_array : bool
+        If True, the partition vectors are returned as NumPy arrays of idx_t's
+        instead of lists. Default value: False.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured and included in
+        the message of any MetisError raised. If False, it is written to
+        ``stdout``. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
+    Returns
+    -------
+    objval : int
+        The edge-cut or the total communication volume of the partitioning
+        solution of the nodal graph.
+
+    epart, npart : lists of ints or NumPy arrays
+        The partition vectors of the elements and the nodes of the mesh.
+
+    Raises
+    ------
+    MetisError
+        If METIS returns an error status.
+    """
+    return _part_mesh(eptr, eind, nparts, False, 0, nn, vwgt, vsize, tpwgts,
+                      options, return_array, capture_output, stats)
+
+
+def part_mesh_dual(eptr, eind, nparts, ncommon=1, nn=None, vwgt=None,
+                   vsize=None, tpwgts=None, options=None, return_array=False,
+                   capture_output=True, stats=None):
+    """Partition a mesh into `k` parts by partitioning its dual graph.
+
+    Parameters
+    ----------
+    eptr, eind : sequences or buffers of ints
+        Element-node structure of the mesh. The nodes of the `i`-th element
+        are stored in `\text{eind}[\text{eptr}[i]:\text{eptr}[i + 1]]`.
+        C-contiguous arrays of idx_t's are passed to METIS without copying.
+
+    nparts : int
+        Number of parts to partition the mesh. It should be at least 2.
+
+    ncommon : int
+        Number of common nodes that two elements must have in order to be
+        adjacent in the dual graph. Default value: 1.
+
+    nn : int, optional
+        Number of nodes of the mesh. If None, it is inferred from the largest
+        node number in ``eind``. Default value: None.
+
+    vwgt : sequence or buffer of ints, optional
+        Weights of the elements. Default value: None.
+
+    vsize : sequence or buffer of ints, optional
+        Sizes of the elements for computing the total communication volume.
+        Default value: None.
+
+    tpwgts : sequence or buffer of floats, optional
+        List of size `\text{nparts}` that specifies the desired weight for
+        each partition. If None, the mesh is equally divided among the
+        partitions. Default value: None.
+
+    options : MetisOptions
+        Options. Default value: None
+
+    return_array : bool
+        If True, the partition vectors are returned as NumPy arrays of idx_t's
+        instead of lists. Default value: False.
+
+    capture_output : bool
+        If True, the diagnostic output of METIS is captured and included in
+        the message of any MetisError raised. If False, it is written to
+        ``stdout``. Default value: True.
+
+    stats : MetisStats, optional
+        If not None, it is filled with the statistics of the METIS run. The
+        timers of METIS are turned on for the run, so their report is written
+        to ``stdout`` unless the output is captured. Default value: None.
+
+    Returns
+    -------
+    objval : int
+        The edge-cut or the total communication volume of the partitioning
+        solution of the dual graph.
+
+    epart, npart : lists of ints or NumPy arrays
+        The partition vectors of the elements and the nodes of the mesh.
+
+    Raises
+    ------
+    MetisError
+        If METIS returns an error status.
+    """
+    return _part_mesh(eptr, eind, nparts, True, ncommon, nn, vwgt, vsize,
+                      tpwgts, options, return_array, capture_output, stats)
+
+
+def _part_mesh(eptr, eind, nparts, bint dual, ncommon, nn, vwgt, vsize,
+               tpwgts, options, return_array, capture_output, stats):
+    cdef const _api.idx_t[::1] _eptr
+    cdef const _api.idx_t[::1] _eind
+    cdef _api.idx_t ne, _nn
+    cdef _api.idx_t _nparts
+    cdef _api.idx_t _ncommon
+    cdef const _api.idx_t[::1] _vwgt = None
+    cdef const _api.idx_t[::1] _vsize = None
+    cdef const _api.real_t[::1] _tpwgts = None
+    cdef _api.idx_t _options[_api.METIS_NOPTIONS]
+    cdef _api.idx_t objval
+    cdef _api.idx_t[::1] _epart
+    cdef _api.idx_t[::1] _npart
+    cdef int result
+
+    eptr, eind, ne, _nn = convert_mesh(eptr, eind, nn, get_numbering(options))
+    _eptr = eptr
+    _eind = eind
+    nweights = ne if dual else _nn
+    _nparts = nparts
+    if _nparts < 2:
+        raise ValueError('nparts < 2')
+    _ncommon = ncommon
+    if dual and _ncommon < 1:
+        raise ValueError('ncommon < 1')
+
+    if vwgt is not None:
+        _vwgt = as_idx_array(vwgt, 'vwgt')
+        if _vwgt.shape[0] != nweights:
+            raise ValueError('len(vwgt) != {0}'.format(
+                'len(eptr) - 1' if dual else 'nn'))
+
+    if vsize is not None:
+        _vsize = as_idx_array(vsize, 'vsize')
+        if _vsize.shape[0] != nweights:
+            raise ValueError('len(vsize) != {0}'.format(
+                'len(eptr) - 1' if dual else 'nn'))
+
+    if tpwgts is not None:
+        _tpwgts = as_real_array(tpwgts, 'tpwgts')
+        if _tpwgts.shape[0] != _nparts:
+            raise ValueError('len(tpwgts) != nparts')
+
+    convert_options(options, _options, stats is not None)
+    epart = numpy.empty(ne, dtype=IDX_DTYPE)
+    npart = numpy.empty(_nn, dtype=IDX_DTYPE)
+    _epart = epart
+    _npart = npart
+
+    begin_capture(capture_output)
+    with nogil:
+        _api.metis_runstats_reset()
+        if dual:
+            result = _api.METIS_PartMeshDual(
+                &ne, &_nn, idx_ptr(_eptr), idx_ptr(_eind), idx_ptr(_vwgt),
+                idx_ptr(_vsize), &_ncommon, &_nparts, real_ptr(_tpwgts),
+                _options, &objval, &_epart[0], &_npart[0])
+        else:
+            result = _api.METIS_PartMeshNodal(
+                &ne, &_nn, idx_ptr(_eptr), idx_ptr(_eind), idx_ptr(_vwgt),
+                idx_ptr(_vsize), &_nparts, real_ptr(_tpwgts), _options,
+                &objval, &_epart[0], &_npart[0])
+    msg = end_capture(capture_output)
+
+    check_result(result, msg)
+    if stats is not None:
+        fill_stats(stats)
+
+    if not return_array:
+        epart = epart.tolist()
+        npart = npart.tolist()
+    return objval, epart, npart
+
+
+def mesh_to_dual(eptr, eind, ncommon=1, nn=None, numbering=0,
+                 return_array=False):
+    """Convert a mesh into its dual graph, in which the elements are the
+    vertices and two elements are adjacent if they share at least
+    ``ncommon`` nodes.
+
+    Parameters
+    ----------
+    eptr, eind : sequences or buffers of ints
+        Element-node structure of the mesh.
+
+    ncommon : int
+        Number of common nodes that two elements must have in order to be
+        adjacent in the dual graph. Default value: 1.
+
+    nn : int, optional
+        Number of nodes of the mesh. If None, it is inferred from the largest
+        node number in ``eind``. Default value: None.
+
+    numbering : int
+        Numbering scheme of the element-node structure and of the returned
+        adjacency structure, either 0 or 1. Default value: 0.
+
+    return_array : bool
+        If True, the adjacency structure is returned as NumPy arrays that take
+        over the memory allocated by METIS, instead of lists. Default value:
+        False.
+
+    Returns
+    -------
+    xadj, adjncy : lists of ints or NumPy arrays
+        Adjacency structure of the dual graph.
+
+    Raises
+    ------
+    MetisError
+        If METIS returns an error status.
+    """
+    return _mesh_to_graph(eptr, eind, True, ncommon, nn, numbering,
+                          return_array)
+
+
+def mesh_to_nodal(eptr, eind, nn=None, numbering=0, return_array=False):
+    """Convert a mesh into its nodal graph, in which the nodes are the
+    vertices and two nodes are adjacent if they belong to a common element.
+
+    Parameters
+    ----------
+    eptr, eind : sequences or buffers of ints
+        Element-node structure of the mesh.
+
+    nn : int, optional
+        Number of nodes of the mesh. If None, it is inferred from the largest
+        node number in ``eind``. Default value: None.
+
+    numbering : int
+        Numbering scheme of the element-node structure and of the returned
+        adjacency structure, either 0 or 1. Default value: 0.
+
+    return_array : bool
+        If True, the adjacency structure is returned as NumPy arrays that take
+        over the memory allocated by METIS, instead of lists. Default value:
+        False.
+
+    Returns
+    -------
+    xadj, adjncy : lists of ints or NumPy arrays
+        Adjacency structure of the nodal graph.
+
+    Raises
+    ------
+    MetisError
+        If METIS returns an error status.
+    """
+    return _mesh_to_graph(eptr, eind, False, 0, nn, numbering, return_array)
+
+
+def _mesh_to_graph(eptr, eind, bint dual, ncommon, nn, numbering,
+                   return_array):
+    cdef const _api.idx_t[::1] _eptr
+    cdef const _api.idx_t[::1] _eind
+    cdef _api.idx_t ne, _nn, nvtxs
+    cdef _api.idx_t _ncommon = ncommon
+    cdef _api.idx_t numflag = numbering
+    cdef _api.idx_t *_xadj = NULL
+    cdef _api.idx_t *_adjncy = NULL
+    cdef int result
+
+    if numflag != 0 and numflag != 1:
+        raise ValueError('numbering is neither 0 nor 1')
+    if dual and _ncommon < 1:
+        raise ValueError('ncommon < 1')
+    eptr, eind, ne, _nn = convert_mesh(eptr, eind, nn, numflag)
+    _eptr = eptr
+    _eind = eind
+    nvtxs = ne if dual else _nn
+
+    begin_capture(True)
+    with nogil:
+        if dual:
+            result = _api.METIS_MeshToDual(
+                &ne, &_nn, idx_ptr(_eptr), idx_ptr(_eind), &_ncommon,
+                &numflag, &_xadj, &_adjncy)
+        else:
+            result = _api.METIS_MeshToNodal(
+                &ne, &_nn, idx_ptr(_eptr), idx_ptr(_eind), &numflag, &_xadj,
+                &_adjncy)
+    msg = end_capture(True)
+
+    check_result(result, msg)
+
+    xadj = wrap_metis_array(_xadj, nvtxs + 1)
+    adjncy = wrap_metis_array(_adjncy, xadj[nvtxs] - numflag)
+    if not return_array:
+        xadj = xadj.tolist()
+        adjncy = adjncy.tolist()
+    return xadj, adjncy
@@ -0,0 +1,2 @@
+# The wrappers of _metis.pyx, built against METIS with 32-bit idx_t.
+include "_metis.pyx"
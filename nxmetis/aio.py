@@ -0,0 +1,136 @@
+"""
+Awaitable wrappers of the METIS functions for asyncio applications.
+
+Each coroutine runs the whole call, including the conversion of the graph and
+the grouping of the result, on a pool of threads, so that the event loop is
+not blocked. METIS runs with the GIL released and its output is captured per
+thread, so the calls proceed in parallel with each other and with the event
+loop.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+
+import nxmetis
+
+__all__ = ['apartition', 'anode_nested_dissection', 'avertex_separator']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor():
+    """Return the pool of threads shared by the calls without an executor,
+    with one thread per CPU.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1)
+        return _executor
+
+
+async def _run(executor, func, *args, **kwargs):
+    if executor is None:
+        executor = _default_executor()
+    loop = asyncio.get_running_loop()
+    # Cancelling the awaiting task cancels the job if it is still queued.
+    return await loop.run_in_executor(
+        executor, functools.partial(func, *args, **kwargs))
+
+
+async def apartition(G, nparts, *args, executor=None, **kwargs):
+    """Partition a graph without blocking the event loop.
+
+    The call is queued on ``executor``, whose number of workers limits the
+    number of graphs partitioned at once. If the awaiting task is cancelled
+    while the call is queued, the call is dropped. A call that has started
+    runs to completion, but its result is discarded.
+
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        The graph to partition.
+
+    nparts : int
+        Number of parts to partition the graph.
+
+    executor : concurrent.futures.Executor, optional
+        Pool of threads running the call. If None, a pool shared by all the
+        coroutines of this module, with one thread per CPU, is used. Default
+        value: None.
+
+    *args, **kwargs
+        Further arguments passed to :func:`nxmetis.partition`.
+
+    Returns
+    -------
+    result : tuple
+        The result of :func:`nxmetis.partition`.
+
+    Example
+    -------
+    >>> executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    >>> objval, parts = await apartition(G, 8, executor=executor)
+
+    """
+    return await _run(executor, nxmetis.partition, G, nparts, *args,
+                      **kwargs)
+
+
+async def anode_nested_dissection(G, *args, executor=None, **kwargs):
+    """Compute a node ordering of a graph without blocking the event loop.
+
+    The call is queued and cancelled as in :func:`apartition`.
+
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        The graph to order.
+
+    executor : concurrent.futures.Executor, optional
+        Pool of threads running the call. If None, a pool shared by all the
+        coroutines of this module, with one thread per CPU, is used. Default
+        value: None.
+
+    *args, **kwargs
+        Further arguments passed to :func:`nxmetis.node_nested_dissection`.
+
+    Returns
+    -------
+    result : list or tuple
+        The result of :func:`nxmetis.node_nested_dissection`.
+    """
+    return await _run(executor, nxmetis.node_nested_dissection, G, *args,
+                      **kwargs)
+
+
+async def avertex_separator(G, *args, executor=None, **kwargs):
+    """Compute a vertex separator of a graph without blocking the event loop.
+
+    The call is queued and cancelled as in :func:`apartition`.
+
+    Parameters
+    ----------
+    G : NetworkX graph or MetisGraph
+        The graph to separate.
+
+    executor : concurrent.futures.Executor, optional
+        Pool of threads running the call. If None, a pool shared by all the
+        coroutines of this module, with one thread per CPU, is used. Default
+        value: None.
+
+    *args, **kwargs
+        Further arguments passed to :func:`nxmetis.vertex_separator`.
+
+    Returns
+    -------
+    result : tuple
+        The result of :func:`nxmetis.vertex_separator`.
+    """
+    return await _run(executor, nxmetis.vertex_separator, G, *args,
+                      **kwargs)
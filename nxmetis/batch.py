@@ -0,0 +1,220 @@
+"""
+Partitioning of many independent graphs at once.
+"""
+
+import concurrent.futures
+import functools
+
+import networkx as nx
+import numpy
+
+import nxmetis
+from nxmetis import enums
+from nxmetis import exceptions
+from nxmetis import metis
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8, where only the thread backend is available
+    shared_memory = None
+
+__all__ = ['partition_many']
+
+# Alignment of the arrays in the shared memory of a graph
+_ALIGNMENT = 8
+
+
+def partition_many(graphs, nparts, n_jobs=None, backend='thread', **kwargs):
+    """Partition many independent graphs concurrently on a pool of threads
+    or processes.
+
+    With the thread backend, METIS runs with the GIL released, so the graphs
+    are partitioned in parallel without the cost of pickling them to other
+    processes.
+
+    With the process backend, each graph is converted in the calling process
+    and its adjacency structure and weights are copied once into shared
+    memory, from which a worker process partitions it and into which it
+    writes the partition vector. Neither the graphs nor the results are
+    pickled. Each METIS run is isolated in its worker: a run that fails, even
+    by aborting its process, fails only its own graph.
+
+    Parameters
+    ----------
+    graphs : iterable of NetworkX graphs or MetisGraphs
+        The graphs to partition.
+
+    nparts : int
+        Number of parts to partition each graph.
+
+    n_jobs : int, optional
+        Maximum number of threads or processes to use. If None, the default
+        of ``concurrent.futures.ThreadPoolExecutor`` or
+        ``concurrent.futures.ProcessPoolExecutor`` is used. Default value:
+        None.
+
+    backend : string, optional
+        'thread' or 'process'. The process backend requires Python 3.8 or
+        later. Default value: 'thread'.
+
+    **kwargs
+        Further arguments passed to :func:`nxmetis.partition`. With the
+        process backend, only ``node_weight``, ``node_size``, ``edge_weight``,
+        ``tpwgts``, ``ubvec``, ``options`` and ``recursive`` are accepted.
+
+    Returns
+    -------
+    results : list
+        For each graph, in the order of ``graphs``:
+
+        - with the thread backend, the ``(objval, parts)`` result of
+          :func:`nxmetis.partition`;
+        - with the process backend, a pair ``(objval, part)`` where ``part``
+          is a NumPy array holding the part of each node in the order of the
+          graph, or a MetisError if METIS failed on the graph or its worker
+          terminated abruptly.
+
+    Raises
+    ------
+    NetworkXError
+        If any of the graphs cannot be partitioned, or, with the process
+        backend, cannot be converted to valid METIS input format or shared
+        memory is not available.
+
+    Example
+    -------
+    >>> graphs = [nx.cycle_graph(n) for n in range(10, 100)]
+    >>> results = partition_many(graphs, 2, n_jobs=4)
+
+    """
+    if backend == 'process':
+        if shared_memory is None:
+            raise nx.NetworkXError(
+                'the process backend requires Python 3.8 or later.')
+        return _partition_processes(graphs, nparts, n_jobs, **kwargs)
+    if backend != 'thread':
+        raise nx.NetworkXError('unknown backend {0!r}.'.format(backend))
+    func = functools.partial(nxmetis.partition, nparts=nparts, **kwargs)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(func, graphs))
+
+
+class _SharedGraph(object):
+    """The arrays of a MetisGraph and its partition vector, in a block of
+    shared memory.
+    """
+
+    def __init__(self, G):
+        arrays = [G.xadj, G.adjncy, G.vwgt, G.vsize, G.adjwgt,
+                  numpy.empty(len(G), dtype=G.xadj.dtype)]
+        self.layout = []
+        size = 0
+        for array in arrays:
+            if array is None:
+                self.layout.append(None)
+                continue
+            self.layout.append((size, array.dtype.str, array.shape))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        views = _views(self.shm.buf, self.layout)
+        for view, array in zip(views, arrays[:-1]):
+            if view is not None:
+                view[...] = array
+
+    @property
+    def part(self):
+        """A copy of the partition vector."""
+        return numpy.array(_views(self.shm.buf, self.layout)[-1])
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _views(buf, layout):
+    """Return the arrays laid out in a buffer."""
+    return [None if item is None else
+            numpy.ndarray(item[2], item[1], buf, item[0])
+            for item in layout]
+
+
+def _part_graph_shared(name, layout, nparts, tpwgts, ubvec, options,
+                       recursive):
+    """Partition a graph held in shared memory, writing the partition vector
+    in place, and return the objective value.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        views = _views(shm.buf, layout)
+        xadj, adjncy, vwgt, vsize, adjwgt, part = views
+        objval = metis.part_graph(xadj, adjncy, nparts, vwgt, vsize, adjwgt,
+                                  tpwgts, ubvec, options, recursive,
+                                  out=part)[0]
+        # The views must be released before the memory is unmapped.
+        del views, xadj, adjncy, vwgt, vsize, adjwgt, part
+    finally:
+        shm.close()
+    return objval
+
+
+@nxmetis._convert_exceptions(nx.NetworkXError, (ValueError, TypeError))
+def _partition_processes(graphs, nparts, n_jobs, node_weight='weight',
+                         node_size='size', edge_weight='weight', tpwgts=None,
+                         ubvec=None, options=None, recursive=False):
+    """Partition graphs on a pool of processes. See partition_many."""
+    if nparts < 1:
+        raise nx.NetworkXError('nparts is less than one.')
+    tpwgts = nxmetis._flatten_tpwgts(tpwgts, ubvec, nparts)
+    options = nxmetis._zero_numbering(options)
+
+    results = []
+    shared = {}
+    try:
+        for G in graphs:
+            G = nxmetis._metis_graph(G, node_weight, node_size, edge_weight)
+            if nparts == 1 or len(G) == 0:
+                results.append((0, numpy.zeros(len(G),
+                                               dtype=G.xadj.dtype)))
+            else:
+                results.append(None)
+                shared[len(results) - 1] = _SharedGraph(G)
+        jobs = dict((i, (graph.shm.name, graph.layout, nparts, tpwgts, ubvec,
+                         options, recursive))
+                    for i, graph in shared.items())
+
+        crashed = []
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_jobs) as pool:
+            futures = dict((i, pool.submit(_part_graph_shared, *job))
+                           for i, job in jobs.items())
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except concurrent.futures.process.BrokenProcessPool:
+                    crashed.append(i)
+                except exceptions.MetisError as e:
+                    results[i] = e
+
+        # A worker terminating abruptly fails every job that has not
+        # completed, so these are run again one at a time, each in a fresh
+        # worker, to single out the ones that crash.
+        for i in crashed:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    results[i] = pool.submit(_part_graph_shared,
+                                             *jobs[i]).result()
+                except concurrent.futures.process.BrokenProcessPool:
+                    results[i] = exceptions.MetisError(
+                        enums.MetisRStatus.error,
+                        'worker process terminated abruptly.')
+                except exceptions.MetisError as e:
+                    results[i] = e
+
+        for i, graph in shared.items():
+            if not isinstance(results[i], exceptions.MetisError):
+                results[i] = results[i], graph.part
+    finally:
+        for graph in shared.values():
+            graph.close()
+    return results
@@ -0,0 +1,236 @@
+"""
+Caching of the results of METIS for graphs that are partitioned or ordered
+repeatedly.
+"""
+import collections
+import hashlib
+import numbers
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import numpy
+
+from nxmetis import types
+
+__all__ = ['MetisCache']
+
+# Names of the directories of the graphs in the store on disk
+_FINGERPRINT = re.compile('^[0-9a-f]{40}$')
+
+
+def _fingerprint_graph(G):
+    """Return a hash of the adjacency structure and the weights of a
+    MetisGraph, computed on the first call and kept on the graph, whose
+    arrays are read-only.
+    """
+    fingerprint = getattr(G, '_fingerprint', None)
+    if fingerprint is None:
+        fingerprint = G._fingerprint = _hash_arrays(
+            G.xadj, G.adjncy, G.vwgt, G.vsize, G.adjwgt)
+    return fingerprint
+
+
+def _hash_arrays(*arrays):
+    """Return a hash of the types, shapes and contents of arrays."""
+    h = hashlib.sha1()
+    for array in arrays:
+        if array is None:
+            h.update(b'-')
+            continue
+        array = numpy.ascontiguousarray(array)
+        h.update('{0}{1}'.format(array.dtype.str, array.shape).encode())
+        h.update(array)
+    return h.hexdigest()
+
+
+def _normalize(value):
+    """Return a form of a parameter of a call that is equal for equivalent
+    values: NumPy arrays and scalars are converted to Python ones, sequences
+    to tuples, and MetisOptions to the tuple of their options, or None if
+    they are all left to METIS, as when no options are given.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, numpy.bool_)):
+        return bool(value)
+    if isinstance(value, types.MetisOptions):
+        options = tuple((name, int(getattr(value, name)))
+                        for name in sorted(vars(value)))
+        if all(option == -1 or name == '_numbering' and option == 0
+               for name, option in options):
+            return None
+        return options
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, numpy.ndarray):
+        value = value.tolist()
+    return tuple(_normalize(item) for item in value)
+
+
+class MetisCache(object):
+    """A bounded cache of the results of METIS, optionally backed by a
+    directory on disk.
+
+    A MetisCache passed as the ``cache`` argument of
+    :func:`nxmetis.partition`, :func:`nxmetis.node_nested_dissection` or
+    :func:`nxmetis.vertex_separator` returns the result of an earlier call on
+    a graph with the same adjacency structure, weights and parameters
+    (including all of the MetisOptions) without running METIS again. METIS
+    is deterministic for a given seed, so the cached results are those that
+    METIS would compute. The nodes of the graph may be labelled differently
+    from those of the earlier call, as long as they are in the same order.
+    The fingerprint of the arrays of a MetisGraph is computed on its first
+    lookup and kept on the graph, so that later lookups on the same
+    MetisGraph do not pass over the graph again.
+
+    The results are kept in memory up to ``maxsize`` entries, the least
+    recently used being evicted first. If ``path`` is given, the results are
+    also written to that directory, and read back from it on misses in
+    memory, so they outlive the process and can be shared between processes.
+    The cache can be used by several threads at once.
+    """
+
+    def __init__(self, maxsize=128, path=None):
+        """Initializes a MetisCache object.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of results held in memory. Default value: 128.
+
+        path : string, optional
+            Directory in which the results are stored on disk, created if it
+            does not exist. Results are stored as NumPy ``.npz`` files and
+            loaded without unpickling. If None, results are only held in
+            memory. Default value: None.
+
+        Example
+        -------
+        >>> cache = MetisCache(path='metis-cache')
+        >>> objval, parts = nxmetis.partition(G, 8, cache=cache)
+
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize is less than one.')
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '{0}(maxsize={1}, path={2}, hits={3}, misses={4})'.format(
+            self.__class__.__name__, self.maxsize, repr(self.path), self.hits,
+            self.misses)
+
+    def _key(self, G, *params):
+        """Return the key of a call with the given parameters on a
+        MetisGraph.
+        """
+        h = hashlib.sha1(repr(_normalize(params)).encode())
+        return _fingerprint_graph(G), h.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[0], key[1] + '.npz')
+
+    def _get(self, key):
+        """Return the result stored under a key, as a tuple of NumPy arrays,
+        or None.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+                self.hits += 1
+                return value
+        if self.path is not None:
+            try:
+                with numpy.load(self._file(key), allow_pickle=False) as data:
+                    value = tuple(data['arr_{0}'.format(i)]
+                                  for i in range(len(data.files)))
+            except (IOError, OSError, KeyError, ValueError,
+                    zipfile.BadZipfile):
+                # Missing or unreadable
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                self._put_memory(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put(self, key, value):
+        """Store a result, given as a tuple of NumPy arrays, under a key."""
+        self._put_memory(key, value)
+        if self.path is None:
+            return
+        directory = os.path.join(self.path, key[0])
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created concurrently
+                pass
+        # Write to a temporary file first, so that readers never see
+        # partially written results.
+        fd, name = tempfile.mkstemp(suffix='.npz', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                numpy.savez(f, *value)
+            os.replace(name, self._file(key))
+        except BaseException:
+            os.remove(name)
+            raise
+
+    def _put_memory(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, G=None):
+        """Remove results from the cache, in memory and on disk.
+
+        Parameters
+        ----------
+        G : NetworkX graph or MetisGraph, optional
+            If not None, only the results computed on this graph are removed.
+            A NetworkX graph is converted with the default data keys; pass a
+            MetisGraph to designate results computed with other keys. If
+            None, all results are removed. Default value: None.
+        """
+        if G is None:
+            with self._lock:
+                self._entries.clear()
+            if self.path is not None:
+                for name in os.listdir(self.path):
+                    if _FINGERPRINT.match(name):
+                        shutil.rmtree(os.path.join(self.path, name),
+                                      ignore_errors=True)
+            return
+
+        if not isinstance(G, types.MetisGraph):
+            G = types.MetisGraph(G)
+        fingerprint = _fingerprint_graph(G)
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == fingerprint:
+                    del self._entries[key]
+        if self.path is not None:
+            shutil.rmtree(os.path.join(self.path, fingerprint),
+                          ignore_errors=True)
@@ -18,3 +18,10 @@ class MetisError(Exception):
         """
         super(MetisError, self).__init__('{0}: {1}'.format(
             enums.MetisRStatus(rstatus).name, msg))
+        self.rstatus = rstatus
+        self.msg = msg
+
+    def __reduce__(self):
+        # Rebuild from both arguments so that errors raised in worker
+        # processes can be sent back.
+        return self.__class__, (self.rstatus, self.msg)
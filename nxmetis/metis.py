@@ -2,23 +2,270 @@
     This module is a wrapper of the ``_metis`` extension generated
     from ``_metis.pyx``. This is to let sphinx import the module for
     documentation builds with or without the ``_metis`` extension.
+
+    The extension is built twice, as ``_metis`` against METIS with 64-bit
+    idx_t and as ``_metis32`` against METIS with 32-bit idx_t. Each function
+    of this module calls the narrowest build that can handle its arguments,
+    which halves the memory and bandwidth used by METIS on graphs with fewer
+    than `2^{31}` adjacency entries. Adjacency structures given as 64-bit
+    integer buffers are passed to the 64-bit build as they are, rather than
+    copied to narrower arrays.
 """
+import functools
+
+import numpy
+
+# The largest size and total weight handled by METIS with 32-bit idx_t
+_IDX32_MAX = 2 ** 31 - 1
+
+# Parameters holding the adjacency structure of a graph or a mesh
+_STRUCTURE = ('xadj', 'adjncy', 'eptr', 'eind')
+
+
+def _buffer_dtype(array):
+    """Return the data type of an array if it is a one-dimensional,
+    C-contiguous buffer of native 32-bit or 64-bit integers, which METIS can
+    use without copying, or None.
+    """
+    try:
+        view = memoryview(array)
+        dtype = numpy.dtype(view.format)
+    except (TypeError, ValueError):
+        return None
+    if (view.ndim == 1 and view.c_contiguous and dtype.kind == 'i' and
+            dtype.isnative and dtype.itemsize in (4, 8)):
+        return dtype
+    return None
+
+
+def _is_wide(arrays):
+    """Return True if any of the arrays is a buffer of 64-bit integers."""
+    for array in arrays:
+        dtype = _buffer_dtype(array)
+        if dtype is not None and dtype.itemsize == 8:
+            return True
+    return False
+
+
+def _total(weights):
+    """Return the total of an array of weights, or 0 if it is None."""
+    if weights is None:
+        return 0
+    return int(numpy.sum(weights, dtype=numpy.int64))
+
+
+def _graph_size(xadj, adjncy, *weights):
+    """Return the size and total weights of a graph."""
+    return max(len(xadj), len(adjncy)), weights
+
+
+def _mesh_size(eptr, eind, *weights):
+    """Return a bound on the size of the graphs derived from a mesh, and its
+    total weights.
+    """
+    try:
+        eind = numpy.asarray(eind, dtype=numpy.int64)
+        # Each element is adjacent to at most the elements sharing each of its
+        # nodes, and each node to at most the nodes of each of its elements.
+        nodal = numpy.sum(numpy.diff(eptr) ** 2, dtype=numpy.int64)
+        dual = numpy.sum(numpy.bincount(eind) ** 2, dtype=numpy.int64)
+    except (TypeError, ValueError):
+        return _IDX32_MAX + 1, weights
+    return max(len(eptr), len(eind), nodal, dual), weights
+
+
+def _dispatch(name, params, size):
+    """Return a function calling ``name`` in the narrowest build that can
+    handle the arguments given for ``params``, which are passed to ``size``.
+
+    If an ``out`` buffer is given, the build whose idx_t matches its item size
+    is called instead, so that it is written in place. If the adjacency
+    structure (or the partition vector, for functions taking no adjacency
+    structure) is a buffer of 64-bit integers, the 64-bit build is called
+    without computing the size and the total weights of the graph.
+    """
+    func64 = getattr(_metis, name)
+    func32 = getattr(_metis32, name, None)
+
+    @functools.wraps(func64)
+    def func(*args, **kwargs):
+        if func32 is None:
+            return func64(*args, **kwargs)
+        out = kwargs.get('out')
+        if out is not None:
+            if isinstance(out, tuple):
+                out = out[0]
+            if memoryview(out).itemsize == _metis32.IDX_DTYPE.itemsize:
+                return func32(*args, **kwargs)
+            return func64(*args, **kwargs)
+        values = list(args[:len(params)])
+        values += [kwargs.get(param) for param in params[len(values):]]
+        arrays = ([value for param, value in zip(params, values)
+                   if param in _STRUCTURE] or
+                  [value for param, value in zip(params, values)
+                   if param == 'part'])
+        if _is_wide(arrays):
+            return func64(*args, **kwargs)
+        try:
+            dtype = idx_dtype(*size(*values))
+        except (TypeError, ValueError):
+            # Invalid arguments are reported by the 64-bit build.
+            dtype = _metis.IDX_DTYPE
+        if dtype == _metis32.IDX_DTYPE:
+            return func32(*args, **kwargs)
+        return func64(*args, **kwargs)
+
+    return func
+
+
 try:
     from nxmetis import _metis
 except ImportError:
+    def idx_dtype(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
     def node_nd(*args, **kwargs):
         raise Exception("NetworkX-METIS not installed!")
 
     def part_graph(*args, **kwargs):
         raise Exception("NetworkX-METIS not installed!")
 
+    def evaluate_partition(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def group_vertices(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def group_nodes(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def connected_components(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def split_graph(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def compress_graph(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def node_ndp(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
     def compute_vertex_separator(*args, **kwargs):
         raise Exception("NetworkX-METIS not installed!")
 
+    def node_refine(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
     def set_default_options(*args, **kwargs):
         raise Exception("NetworkX-METIS not installed!")
+
+    def convert_graph(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def refine_graph(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def part_mesh_nodal(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def part_mesh_dual(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def mesh_to_dual(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
+
+    def mesh_to_nodal(*args, **kwargs):
+        raise Exception("NetworkX-METIS not installed!")
 else:
-    node_nd = _metis.node_nd
-    part_graph = _metis.part_graph
-    compute_vertex_separator = _metis.compute_vertex_separator
+    try:
+        from nxmetis import _metis32
+    except ImportError:
+        _metis32 = None
+
+    def idx_dtype(size, weights=(), arrays=()):
+        """Return the NumPy data type of idx_t in the build of METIS that
+        handles a graph.
+
+        Parameters
+        ----------
+        size : int
+            Number of vertices plus one, or number of adjacency entries of the
+            graph, whichever is larger.
+
+        weights : sequence of arrays of ints or Nones, optional
+            Weights of the graph. Their totals must fit in idx_t. Default
+            value: ().
+
+        arrays : sequence of arrays of ints, optional
+            Adjacency structure of the graph. If any of them is a buffer of
+            64-bit integers, ``numpy.int64`` is returned so that it is not
+            copied. Default value: ().
+
+        Returns
+        -------
+        dtype : NumPy data type
+            ``numpy.int32`` if the sizes and total weights of the graph fit in
+            32 bits and its adjacency structure is not held in 64-bit
+            buffers, and ``numpy.int64`` otherwise. Arrays of this type are
+            passed to METIS without copying.
+        """
+        if _is_wide(arrays):
+            return _metis.IDX_DTYPE
+        if (_metis32 is not None and size <= _IDX32_MAX and
+                all(_total(w) <= _IDX32_MAX for w in weights)):
+            return _metis32.IDX_DTYPE
+        return _metis.IDX_DTYPE
+
+    node_nd = _dispatch('node_nd', ('xadj', 'adjncy', 'vwgt'), _graph_size)
+    part_graph = _dispatch(
+        'part_graph',
+        ('xadj', 'adjncy', 'nparts', 'vwgt', 'vsize', 'adjwgt'),
+        lambda xadj, adjncy, nparts, *weights: _graph_size(xadj, adjncy,
+                                                           *weights))
+    evaluate_partition = _dispatch(
+        'evaluate_partition',
+        ('xadj', 'adjncy', 'part', 'nparts', 'vwgt', 'vsize', 'adjwgt'),
+        lambda xadj, adjncy, part, nparts, *weights: _graph_size(
+            xadj, adjncy, *weights))
+    group_vertices = _dispatch('group_vertices', ('part',),
+                               lambda part: (len(part), ()))
+    group_nodes = _dispatch('group_nodes', ('nodes', 'part'),
+                            lambda nodes, part: (len(part), ()))
+    connected_components = _dispatch('connected_components',
+                                     ('xadj', 'adjncy'), _graph_size)
+    split_graph = _dispatch(
+        'split_graph',
+        ('xadj', 'adjncy', 'part', 'nparts', 'vwgt', 'vsize', 'adjwgt'),
+        lambda xadj, adjncy, part, nparts, *weights: _graph_size(
+            xadj, adjncy, *weights))
+    compress_graph = _dispatch(
+        'compress_graph', ('xadj', 'adjncy', 'vwgt', 'vsize', 'adjwgt'),
+        _graph_size)
+    node_ndp = _dispatch(
+        'node_ndp', ('xadj', 'adjncy', 'npes', 'vwgt'),
+        lambda xadj, adjncy, npes, vwgt: _graph_size(xadj, adjncy, vwgt))
+    compute_vertex_separator = _dispatch(
+        'compute_vertex_separator', ('xadj', 'adjncy', 'vwgt'), _graph_size)
+    node_refine = _dispatch(
+        'node_refine', ('xadj', 'adjncy', 'part', 'vwgt'),
+        lambda xadj, adjncy, part, vwgt: _graph_size(xadj, adjncy, vwgt))
     set_default_options = _metis.set_default_options
+    convert_graph = _dispatch(
+        'convert_graph', ('xadj', 'adjncy', 'adjwgt'), _graph_size)
+    refine_graph = _dispatch(
+        'refine_graph',
+        ('xadj', 'adjncy', 'part', 'nparts', 'vwgt', 'vsize', 'adjwgt'),
+        lambda xadj, adjncy, part, nparts, *weights: _graph_size(
+            xadj, adjncy, *weights))
+    part_mesh_nodal = _dispatch(
+        'part_mesh_nodal', ('eptr', 'eind', 'nparts', 'nn', 'vwgt', 'vsize'),
+        lambda eptr, eind, nparts, nn, *weights: _mesh_size(eptr, eind,
+                                                            *weights))
+    part_mesh_dual = _dispatch(
+        'part_mesh_dual',
+        ('eptr', 'eind', 'nparts', 'ncommon', 'nn', 'vwgt', 'vsize'),
+        lambda eptr, eind, nparts, ncommon, nn, *weights: _mesh_size(
+            eptr, eind, *weights))
+    mesh_to_dual = _dispatch('mesh_to_dual', ('eptr', 'eind'), _mesh_size)
+    mesh_to_nodal = _dispatch('mesh_to_nodal', ('eptr', 'eind'), _mesh_size)
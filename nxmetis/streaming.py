@@ -0,0 +1,292 @@
+"""
+Online assignment of nodes that join a graph after it was partitioned.
+"""
+import heapq
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import types
+
+__all__ = ['StreamingAssigner']
+
+
+class StreamingAssigner(object):
+    """Assign nodes to the parts of an existing partitioning as they arrive.
+
+    Each arriving node goes to the part holding the largest weight of edges
+    to its neighbors among the parts that stay within the balance bound, or
+    to the part furthest below its target weight if there is none. This costs
+    `O(\\text{degree} + \\log \\text{nparts})` per node, so nodes can be
+    assigned one by one between full runs of :func:`nxmetis.partition`, whose
+    results degrade as the graph grows. The edge-cut and the load imbalance
+    are kept up to date, and :meth:`degraded` tells when they have drifted
+    far enough from those of the initial partitioning to partition again.
+
+    Attributes
+    ----------
+    part_of : dict
+        The part of each node assigned so far.
+
+    part_weights : list of ints
+        The weight of each part.
+
+    edgecut : int
+        The total weight of the edges between parts.
+
+    total_edge_weight : int
+        The total weight of the edges.
+
+    initial_cut_ratio, initial_imbalance : float
+        The values of :attr:`cut_ratio` and :attr:`imbalance` for the initial
+        partitioning.
+    """
+
+    def __init__(self, G, parts, node_weight='weight', edge_weight='weight',
+                 tpwgts=None, ubvec=None):
+        """Initializes a StreamingAssigner object.
+
+        Parameters
+        ----------
+        G : NetworkX graph or MetisGraph
+            The graph that was partitioned.
+
+        parts : lists of nodes, dict or NumPy array
+            The partitioning of ``G``, in any of the forms returned by
+            :func:`nxmetis.partition`.
+
+        node_weight, edge_weight : object, optional
+            The data keys used to determine the weights of the nodes and of
+            the edges of ``G`` and of the graphs passed to
+            :meth:`assign_from`. Default value: 'weight'.
+
+        tpwgts : list of lists of floats, optional
+            The target weights of the parts, with a single constraint. If
+            None, the parts have equal targets. Default value: None.
+
+        ubvec : list of one float, optional
+            The load imbalance tolerance that assignments keep to. If None,
+            1.03, the default of METIS for `k`-way partitioning. Default
+            value: None.
+
+        Raises
+        ------
+        NetworkXError
+            If the partitioning is not a partitioning of ``G``, or the nodes
+            have several weights.
+
+        Example
+        -------
+        >>> objval, parts = nxmetis.partition(G, 8)
+        >>> assigner = StreamingAssigner(G, parts)
+        >>> assigner.assign('new', ['a', 'b'])
+        3
+
+        """
+        if not isinstance(G, types.MetisGraph):
+            G = types.MetisGraph(G, node_weight, None, edge_weight)
+        if G.vwgt is not None and G.vwgt.ndim > 1 and G.vwgt.shape[1] > 1:
+            raise nx.NetworkXError('nodes have more than one weight.')
+        metrics = nxmetis.evaluate(G, parts, tpwgts=tpwgts)
+        nparts = len(metrics.part_weights)
+        if tpwgts is None:
+            self._targets = [1.0 / nparts] * nparts
+        else:
+            self._targets = [float(w[0]) for w in tpwgts]
+        self._ub = 1.03 if ubvec is None else float(ubvec[0])
+        self.node_weight = node_weight
+        self.edge_weight = edge_weight
+
+        if isinstance(parts, dict):
+            self.part_of = dict((u, parts[u]) for u in G)
+        else:
+            if not hasattr(parts, 'tolist'):
+                parts = nxmetis._part_vector(G, parts)
+            self.part_of = dict(zip(G, parts.tolist()))
+        self.part_weights = metrics.part_weights[:, 0].tolist()
+        self._total_weight = sum(self.part_weights)
+        self.edgecut = int(metrics.edgecut)
+        if G.adjwgt is None:
+            self.total_edge_weight = len(G.adjncy) // 2
+        else:
+            self.total_edge_weight = int(G.adjwgt.sum()) // 2
+        self.initial_cut_ratio = self.cut_ratio
+        self.initial_imbalance = self.imbalance
+
+        self._rebuild_heap()
+
+    def __len__(self):
+        return len(self.part_of)
+
+    def __repr__(self):
+        return '{0}(nodes={1}, edgecut={2}, imbalance={3:.4f})'.format(
+            self.__class__.__name__, len(self), self.edgecut, self.imbalance)
+
+    def _load(self, p):
+        return self.part_weights[p] / self._targets[p]
+
+    def _rebuild_heap(self):
+        # Parts by increasing load relative to their targets. Entries are
+        # replaced lazily when their parts gain weight, and the heap is
+        # rebuilt when stale entries make up most of it, which keeps it
+        # within a small multiple of nparts at an amortized constant cost.
+        self._heap = [(self._load(p), p) for p in range(len(self._targets))]
+        heapq.heapify(self._heap)
+
+    @property
+    def cut_ratio(self):
+        """The fraction of the total edge weight that is cut."""
+        if self.total_edge_weight == 0:
+            return 0.0
+        return float(self.edgecut) / self.total_edge_weight
+
+    @property
+    def imbalance(self):
+        """The largest ratio of the weight of a part to its target weight."""
+        if self._total_weight == 0:
+            return 1.0
+        return max(self._load(p) for p in range(len(self._targets))) / \
+            self._total_weight
+
+    def assign(self, u, neighbors=(), weight=1):
+        """Assign a new node to a part.
+
+        Parameters
+        ----------
+        u : node
+            The new node. A node that is already assigned keeps its part.
+
+        neighbors : iterable of nodes or dict, optional
+            The neighbors of ``u``, or a dict mapping them to the weights of
+            their edges to ``u``. Neighbors that are not assigned yet are
+            ignored; their edges are counted when they are assigned with
+            ``u`` among their neighbors. Default value: ().
+
+        weight : int, optional
+            The weight of ``u``. Default value: 1.
+
+        Returns
+        -------
+        part : int
+            The part of ``u``.
+        """
+        part = self.part_of.get(u)
+        if part is not None:
+            return part
+        if not isinstance(neighbors, dict):
+            neighbors = dict.fromkeys(neighbors, 1)
+
+        # Weights of the edges from u to each part
+        conn = {}
+        degree = 0
+        for v, w in neighbors.items():
+            p = self.part_of.get(v)
+            if p is not None and v != u:
+                conn[p] = conn.get(p, 0) + w
+                degree += w
+
+        total = self._total_weight + weight
+        best = None
+        for p, w in conn.items():
+            if (self.part_weights[p] + weight <=
+                    self._ub * self._targets[p] * total and
+                    (best is None or w > conn[best])):
+                best = p
+        if best is None:
+            heap = self._heap
+            while heap[0][0] != self._load(heap[0][1]):
+                heapq.heappop(heap)
+            best = heap[0][1]
+
+        self.part_of[u] = best
+        self.part_weights[best] += weight
+        self._total_weight = total
+        self.edgecut += degree - conn.get(best, 0)
+        self.total_edge_weight += degree
+        heapq.heappush(self._heap, (self._load(best), best))
+        if len(self._heap) > 4 * len(self._targets):
+            self._rebuild_heap()
+        return best
+
+    def assign_from(self, G, nodes=None):
+        """Assign the nodes of a graph that are not assigned yet, in order.
+
+        Parameters
+        ----------
+        G : NetworkX graph
+            The graph, with the nodes already assigned and the new nodes. The
+            weights of the nodes and edges are read with the data keys given
+            at initialization.
+
+        nodes : iterable of nodes, optional
+            The nodes to assign. If None, all the nodes of ``G`` not assigned
+            yet. Default value: None.
+
+        Returns
+        -------
+        parts : list of ints
+            The parts of the nodes, in order.
+        """
+        if nodes is None:
+            nodes = [u for u in G if u not in self.part_of]
+        parts = []
+        for u in nodes:
+            weight = 1 if self.node_weight is None else \
+                G.nodes[u].get(self.node_weight, 1)
+            if self.edge_weight is None:
+                neighbors = G[u]
+            else:
+                neighbors = dict((v, d.get(self.edge_weight, 1))
+                                 for v, d in G[u].items())
+            parts.append(self.assign(u, neighbors, weight))
+        return parts
+
+    def add_edge(self, u, v, weight=1):
+        """Account for a new edge between two assigned nodes.
+
+        Parameters
+        ----------
+        u, v : nodes
+            The ends of the edge.
+
+        weight : int, optional
+            The weight of the edge. Default value: 1.
+
+        Raises
+        ------
+        NetworkXError
+            If ``u`` or ``v`` is not assigned.
+        """
+        try:
+            cut = self.part_of[u] != self.part_of[v]
+        except KeyError as e:
+            raise nx.NetworkXError(
+                'node {0!r} is not assigned.'.format(e.args[0]))
+        self.total_edge_weight += weight
+        if cut:
+            self.edgecut += weight
+
+    def degraded(self, max_cut_growth=0.1, max_imbalance=None):
+        """Tell whether the partitioning has degraded enough to partition the
+        graph again.
+
+        Parameters
+        ----------
+        max_cut_growth : float, optional
+            The largest relative growth of :attr:`cut_ratio` over its initial
+            value that is tolerated. Default value: 0.1.
+
+        max_imbalance : float, optional
+            The largest :attr:`imbalance` that is tolerated. If None, the
+            tolerance given at initialization, or the initial imbalance if it
+            is higher. Default value: None.
+
+        Returns
+        -------
+        degraded : bool
+            True if either bound is exceeded.
+        """
+        if max_imbalance is None:
+            max_imbalance = max(self._ub, self.initial_imbalance)
+        return (self.cut_ratio > self.initial_cut_ratio * (1 + max_cut_growth)
+                or self.imbalance > max_imbalance)
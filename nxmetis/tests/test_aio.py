@@ -0,0 +1,65 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import nose.tools
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import aio
+from nxmetis import types
+
+
+class TestAio(object):
+
+    def setUp(self):
+        self.G = nx.grid_2d_graph(20, 20)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_functions(self):
+        async def run():
+            return await asyncio.gather(
+                aio.apartition(self.G, 4),
+                aio.anode_nested_dissection(self.G, return_tree=True),
+                aio.avertex_separator(self.G, executor=self.executor))
+
+        results = asyncio.run(run())
+        nose.tools.assert_equal(results, [
+            nxmetis.partition(self.G, 4),
+            nxmetis.node_nested_dissection(self.G, return_tree=True),
+            nxmetis.vertex_separator(self.G)])
+
+        nose.tools.assert_raises(nx.NetworkXNotImplemented, asyncio.run,
+                                 aio.apartition(nx.DiGraph([(0, 1)]), 2))
+
+    def test_cancel(self):
+        release = threading.Event()
+        stats = types.MetisStats()
+
+        async def run():
+            # Occupy the only worker so that the call stays queued.
+            busy = asyncio.get_running_loop().run_in_executor(
+                self.executor, release.wait)
+            task = asyncio.ensure_future(
+                aio.apartition(self.G, 4, executor=self.executor,
+                               stats=stats))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                cancelled = True
+            else:
+                cancelled = False
+            release.set()
+            await busy
+            return cancelled
+
+        nose.tools.assert_true(asyncio.run(run()))
+        # The call has never run
+        self.executor.submit(lambda: None).result()
+        nose.tools.assert_equal(stats.peak_memory, 0)
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+
+import nose.tools
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import batch
+from nxmetis import exceptions
+from nxmetis import metis
+from nxmetis import types
+
+
+def require_shared_memory():
+    if batch.shared_memory is None:
+        raise nose.SkipTest('shared memory requires Python 3.8 or later')
+
+
+class TestBatch(object):
+
+    def setUp(self):
+        self.graphs = [nx.random_regular_graph(3, n, seed=n)
+                       for n in range(20, 120, 4)]
+
+    def test_partition_many(self):
+        options = types.MetisOptions(seed=7, numbering=1)
+        results = batch.partition_many(self.graphs, 3, n_jobs=4,
+                                       options=options)
+        nose.tools.assert_equal(len(results), len(self.graphs))
+        for G, result in zip(self.graphs, results):
+            # Concurrent calls are as deterministic as sequential ones
+            nose.tools.assert_equal(result,
+                                    nxmetis.partition(G, 3, options=options))
+        # Shared options are not modified
+        nose.tools.assert_equal(options.numbering, 1)
+
+    def test_partition_many_error(self):
+        graphs = self.graphs + [nx.DiGraph([(0, 1)])]
+        nose.tools.assert_raises(nx.NetworkXNotImplemented,
+                                 batch.partition_many, graphs, 2)
+
+        shared_memory = batch.shared_memory
+        batch.shared_memory = None
+        try:
+            nose.tools.assert_raises(nx.NetworkXError, batch.partition_many,
+                                     self.graphs, 2, backend='process')
+        finally:
+            batch.shared_memory = shared_memory
+
+    def test_partition_many_processes(self):
+        require_shared_memory()
+        options = types.MetisOptions(seed=7)
+        graphs = self.graphs + [types.MetisGraph(self.graphs[0]), nx.Graph()]
+        results = batch.partition_many(graphs, 3, n_jobs=2, backend='process',
+                                       options=options)
+        nose.tools.assert_equal(len(results), len(graphs))
+        nose.tools.assert_equal(results[-1][0], 0)
+        nose.tools.assert_equal(len(results[-1][1]), 0)
+        for G, (objval, part) in zip(graphs[:-1], results):
+            G = types.MetisGraph(G) if isinstance(G, nx.Graph) else G
+            # Same result as METIS run in this process
+            expected = metis.part_graph(G.xadj, G.adjncy, 3, options=options,
+                                        return_array=True)
+            nose.tools.assert_equal(objval, expected[0])
+            nose.tools.assert_equal(part.tolist(), expected[1].tolist())
+
+        results = batch.partition_many(self.graphs[:2], 1, backend='process')
+        nose.tools.assert_equal([part.tolist() for objval, part in results],
+                                [[0] * len(G) for G in self.graphs[:2]])
+
+        nose.tools.assert_raises(nx.NetworkXNotImplemented,
+                                 batch.partition_many, [nx.DiGraph([(0, 1)])],
+                                 2, backend='process')
+        nose.tools.assert_raises(nx.NetworkXError, batch.partition_many,
+                                 self.graphs, 2, backend='fork')
+
+    def test_partition_many_processes_error(self):
+        require_shared_memory()
+        G = nx.cycle_graph(10)
+        results = batch.partition_many([G, G], 2, backend='process',
+                                       tpwgts=[[0.5], [0.5]], ubvec=[0.5])
+        nose.tools.assert_equal(len(results), 2)
+        for result in results:
+            nose.tools.assert_is_instance(result, exceptions.MetisError)
+
+    def test_partition_many_processes_abort(self):
+        require_shared_memory()
+        if multiprocessing.get_start_method() != 'fork':
+            raise nose.SkipTest('workers do not inherit the patched module')
+        part_graph = metis.part_graph
+
+        def abort(xadj, *args, **kwargs):
+            if len(xadj) == 25:
+                os.abort()
+            return part_graph(xadj, *args, **kwargs)
+
+        metis.part_graph = abort
+        try:
+            results = batch.partition_many(self.graphs[:4], 2, n_jobs=2,
+                                           backend='process')
+        finally:
+            metis.part_graph = part_graph
+        # Only the graph on which the worker aborted fails
+        nose.tools.assert_is_instance(results[1], exceptions.MetisError)
+        for G, result in zip(self.graphs[:4:2] + self.graphs[3:4],
+                             results[:1] + results[2:]):
+            nose.tools.assert_equal(len(result[1]), len(G))
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+
+import nose.tools
+import numpy
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import cache as cache_module
+from nxmetis import types
+
+
+class TestCache(object):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.edges = list(nx.grid_2d_graph(20, 20).edges())
+        self.G = nx.Graph(self.edges)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_partition(self):
+        cache = nxmetis.MetisCache()
+        result = nxmetis.partition(self.G, 4, cache=cache)
+        nose.tools.assert_equal((cache.hits, cache.misses), (0, 1))
+        nose.tools.assert_equal(nxmetis.partition(self.G, 4, cache=cache),
+                                result)
+        nose.tools.assert_equal((cache.hits, cache.misses), (1, 1))
+
+        # Statistics are only filled by METIS runs
+        stats = types.MetisStats()
+        nxmetis.partition(self.G, 4, cache=cache, stats=stats)
+        nose.tools.assert_equal(stats.peak_memory, 0)
+
+        # Nodes are relabelled
+        H = nx.Graph((str(u), str(v)) for u, v in self.edges)
+        objval, parts = nxmetis.partition(H, 4, cache=cache)
+        nose.tools.assert_equal(cache.hits, 3)
+        nose.tools.assert_equal(
+            (result[0], [[str(u) for u in part] for part in result[1]]),
+            (objval, parts))
+
+        # Any change of parameters or weights is a miss
+        options = types.MetisOptions(seed=7)
+        nose.tools.assert_equal(
+            nxmetis.partition(self.G, 4, options=options, cache=cache),
+            nxmetis.partition(self.G, 4, options=options))
+        nxmetis.partition(self.G, 3, cache=cache)
+        nxmetis.partition(self.G, 4, trials=2, cache=cache)
+        self.G.nodes[(0, 0)]['weight'] = 2
+        nxmetis.partition(self.G, 4, cache=cache)
+        nose.tools.assert_equal((cache.hits, cache.misses), (3, 5))
+
+        result = nxmetis.partition(self.G, 4, trials=3, return_trials=True,
+                                   cache=cache)
+        nose.tools.assert_equal(
+            nxmetis.partition(self.G, 4, trials=3, return_trials=True,
+                              cache=cache), result)
+
+    def test_key(self):
+        cache = nxmetis.MetisCache()
+        G = types.MetisGraph(self.G)
+        result = nxmetis.partition(G, 4, cache=cache)
+        # Equivalent parameters give the same key
+        nose.tools.assert_equal(
+            nxmetis.partition(G, 4, recursive=0, options=types.MetisOptions(),
+                              trials=1, cache=cache), result)
+        nose.tools.assert_equal((cache.hits, cache.misses), (1, 1))
+        nose.tools.assert_equal(
+            nxmetis.partition(G, 4, ubvec=[1.5], cache=cache),
+            nxmetis.partition(G, 4, ubvec=numpy.array([1.5]), cache=cache))
+        nose.tools.assert_equal((cache.hits, cache.misses), (2, 2))
+
+        # The fingerprint of a MetisGraph is computed once
+        hash_arrays = cache_module._hash_arrays
+        calls = []
+        cache_module._hash_arrays = lambda *arrays: calls.append(arrays) or \
+            hash_arrays(*arrays)
+        try:
+            for nparts in [2, 2, 3]:
+                nxmetis.partition(G, nparts, cache=cache)
+        finally:
+            cache_module._hash_arrays = hash_arrays
+        nose.tools.assert_equal(calls, [])
+        nose.tools.assert_equal(cache.hits, 3)
+
+    def test_node_nested_dissection(self):
+        cache = nxmetis.MetisCache()
+        perm = nxmetis.node_nested_dissection(self.G, cache=cache)
+        nose.tools.assert_equal(
+            nxmetis.node_nested_dissection(self.G, cache=cache), perm)
+        perm, tree = nxmetis.node_nested_dissection(self.G, cache=cache,
+                                                    return_tree=True)
+        nose.tools.assert_equal(
+            nxmetis.node_nested_dissection(self.G, cache=cache,
+                                           return_tree=True), (perm, tree))
+
+        result = nxmetis.vertex_separator(self.G, cache=cache)
+        nose.tools.assert_equal(
+            nxmetis.vertex_separator(self.G, cache=cache), result)
+        nose.tools.assert_equal((cache.hits, cache.misses), (3, 3))
+
+    def test_lru(self):
+        cache = nxmetis.MetisCache(maxsize=2)
+        for nparts in [2, 3, 4, 2]:
+            nxmetis.partition(self.G, nparts, cache=cache)
+        nose.tools.assert_equal(len(cache), 2)
+        nose.tools.assert_equal(cache.misses, 4)
+        nxmetis.partition(self.G, 4, cache=cache)
+        nose.tools.assert_equal(cache.hits, 1)
+
+        nose.tools.assert_raises(ValueError, nxmetis.MetisCache, 0)
+
+    def test_disk(self):
+        path = os.path.join(self.dir, 'cache')
+        cache = nxmetis.MetisCache(path=path)
+        result = nxmetis.partition(self.G, 4, cache=cache)
+        H = nx.path_graph(10)
+        nxmetis.partition(H, 2, cache=cache)
+        nose.tools.assert_equal(len(os.listdir(path)), 2)
+
+        # Results outlive the cache in memory
+        cache = nxmetis.MetisCache(path=path)
+        nose.tools.assert_equal(nxmetis.partition(self.G, 4, cache=cache),
+                                result)
+        nose.tools.assert_equal(cache.hits, 1)
+
+        # Invalidation of the results of one graph
+        cache.invalidate(self.G)
+        nose.tools.assert_equal(len(cache), 0)
+        nose.tools.assert_equal(len(os.listdir(path)), 1)
+        nose.tools.assert_equal(nxmetis.partition(self.G, 4, cache=cache),
+                                result)
+        nose.tools.assert_equal(cache.misses, 1)
+
+        # Unreadable results are misses
+        for name in os.listdir(path):
+            for entry in os.listdir(os.path.join(path, name)):
+                with open(os.path.join(path, name, entry), 'w') as f:
+                    f.write('x')
+        cache = nxmetis.MetisCache(path=path)
+        nose.tools.assert_equal(nxmetis.partition(self.G, 4, cache=cache),
+                                result)
+        nose.tools.assert_equal(cache.misses, 1)
+
+        # Invalidation of all results, leaving other files untouched
+        with open(os.path.join(path, 'README'), 'w') as f:
+            f.write('x')
+        cache.invalidate()
+        nose.tools.assert_equal(len(cache), 0)
+        nose.tools.assert_equal(os.listdir(path), ['README'])
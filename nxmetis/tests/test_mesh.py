@@ -0,0 +1,77 @@
+import nose.tools
+import numpy
+
+from nxmetis import metis
+from nxmetis import types
+
+
+def make_quad_mesh(n):
+    """Return the element-node structure of an n-by-n grid of quadrilaterals.
+    """
+    eptr = list(range(0, 4 * n * n + 1, 4))
+    eind = []
+    for i in range(n):
+        for j in range(n):
+            u = i * (n + 1) + j
+            eind.extend([u, u + 1, u + n + 2, u + n + 1])
+    return eptr, eind
+
+
+class TestMesh(object):
+
+    def setUp(self):
+        self.n = 4
+        self.eptr, self.eind = make_quad_mesh(self.n)
+
+    def test_mesh_to_dual(self):
+        xadj, adjncy = metis.mesh_to_dual(self.eptr, self.eind, ncommon=2)
+        # Interior elements have four neighbors sharing an edge
+        degrees = numpy.diff(xadj)
+        nose.tools.assert_equal(sorted(degrees)[-1], 4)
+        nose.tools.assert_equal(len(adjncy), 2 * 2 * self.n * (self.n - 1))
+
+        # Elements sharing a corner are adjacent too with ncommon=1
+        xadj, adjncy = metis.mesh_to_dual(self.eptr, self.eind,
+                                          return_array=True)
+        nose.tools.ok_(isinstance(xadj, numpy.ndarray))
+        nose.tools.assert_equal(numpy.diff(xadj).max(), 8)
+
+        # One-based numbering
+        xadj1, adjncy1 = metis.mesh_to_dual(
+            [i + 1 for i in self.eptr], [i + 1 for i in self.eind],
+            numbering=1, return_array=True)
+        nose.tools.assert_equal(list(xadj1), list(xadj + 1))
+        nose.tools.assert_equal(list(adjncy1), list(adjncy + 1))
+
+    def test_mesh_to_nodal(self):
+        xadj, adjncy = metis.mesh_to_nodal(self.eptr, self.eind)
+        nose.tools.assert_equal(len(xadj), (self.n + 1) ** 2 + 1)
+        # Corner nodes are adjacent to the three other nodes of their element
+        nose.tools.assert_equal(xadj[1] - xadj[0], 3)
+
+    def test_part_mesh(self):
+        ne = self.n * self.n
+        nn = (self.n + 1) ** 2
+        for objval, epart, npart in [
+                metis.part_mesh_dual(self.eptr, self.eind, 2, ncommon=2),
+                metis.part_mesh_nodal(self.eptr, self.eind, 2)]:
+            nose.tools.assert_equal(len(epart), ne)
+            nose.tools.assert_equal(len(npart), nn)
+            nose.tools.assert_equal(set(epart), set([0, 1]))
+            nose.tools.assert_equal(set(npart), set([0, 1]))
+
+        # The dual graph of the mesh is partitioned by METIS directly
+        xadj, adjncy = metis.mesh_to_dual(self.eptr, self.eind, ncommon=2)
+        options = types.MetisOptions(seed=3)
+        nose.tools.assert_equal(
+            metis.part_mesh_dual(self.eptr, self.eind, 4, ncommon=2,
+                                 options=options)[:2],
+            metis.part_graph(xadj, adjncy, 4, options=options))
+
+    def test_invalid_mesh(self):
+        nose.tools.assert_raises(ValueError, metis.part_mesh_nodal,
+                                 self.eptr, self.eind, 2, nn=10)
+        nose.tools.assert_raises(ValueError, metis.mesh_to_dual,
+                                 self.eptr, self.eind[:-1])
+        nose.tools.assert_raises(ValueError, metis.mesh_to_dual,
+                                 self.eptr, self.eind, ncommon=0)
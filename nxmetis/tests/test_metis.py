@@ -1,5 +1,8 @@
+import array
 import itertools
 import nose.tools
+import numpy
+import threading
 
 import networkx as nx
 
@@ -97,6 +100,15 @@ class TestMetis(object):
         nose.tools.ok_(nx.is_connected(self.G.subgraph(part2)))
 
     def test_MetisOptions(self):
+        # Default options leave the choices to METIS
+        options = types.MetisOptions()
+        nose.tools.assert_equal(options.contig, -1)
+        G = nx.disjoint_union(nx.cycle_graph(30), nx.path_graph(30))
+        nose.tools.assert_equal(nxmetis.partition(G, 3, options=options),
+                                nxmetis.partition(G, 3))
+        options.contig = 0
+        nose.tools.assert_false(options.contig)
+
         n = 16
         xadj, adjncy = make_cycle(n)
         options = types.MetisOptions(niter=-2)
@@ -104,3 +116,698 @@ class TestMetis(object):
                                         'Input Error: Incorrect niter.',
                                         metis.part_graph, xadj, adjncy, 2,
                                         options=options)
+
+    def test_part_graph_buffers(self):
+        n = 16
+        xadj, adjncy = make_cycle(n)
+        expected = metis.part_graph(xadj, adjncy, 2)
+        for conv in (numpy.array,
+                     lambda a: numpy.array(a, dtype=numpy.int32),
+                     lambda a: memoryview(array.array('q', a))):
+            nose.tools.assert_equal(
+                metis.part_graph(conv(xadj), conv(adjncy), 2), expected)
+
+        nose.tools.assert_raises(TypeError, metis.part_graph, xadj,
+                                 [0.5] * len(adjncy), 2)
+        nose.tools.assert_raises(ValueError, metis.part_graph,
+                                 numpy.array([xadj]), adjncy, 2)
+
+    def test_convert_graph(self):
+        xadj = numpy.array([0, 2, 4, 5], dtype=numpy.intp)
+        adjncy = numpy.array([1, 2, 0, 2, 0], dtype=numpy.intp)
+        _xadj, _adjncy, _ = metis.convert_graph(xadj, adjncy)
+        # No copies are made for matching arrays without self-loops
+        nose.tools.ok_(_xadj is xadj)
+        nose.tools.ok_(_adjncy is adjncy)
+
+        # Self-loops are removed together with their weights
+        _xadj, _adjncy, _adjwgt = metis.convert_graph(
+            [0, 3, 5, 6], [0, 1, 2, 0, 1, 0], [9, 1, 2, 1, 8, 2])
+        nose.tools.assert_equal(list(_xadj), [0, 2, 3, 4])
+        nose.tools.assert_equal(list(_adjncy), [1, 2, 0, 0])
+        nose.tools.assert_equal(list(_adjwgt), [1, 2, 1, 2])
+
+    def test_array_output(self):
+        n = 16
+        xadj, adjncy = make_cycle(n)
+        objval, part = metis.part_graph(xadj, adjncy, 2)
+        objval_, part_ = metis.part_graph(xadj, adjncy, 2, return_array=True)
+        nose.tools.ok_(isinstance(part_, numpy.ndarray))
+        nose.tools.assert_equal(objval_, objval)
+        nose.tools.assert_equal(part_.tolist(), part)
+
+        out = numpy.empty(n, dtype=numpy.intp)
+        nose.tools.ok_(metis.part_graph(xadj, adjncy, 2, out=out)[1] is out)
+        nose.tools.assert_equal(out.tolist(), part)
+        nose.tools.assert_raises(ValueError, metis.part_graph, xadj, adjncy,
+                                 2, out=numpy.empty(n - 1, dtype=numpy.intp))
+
+        perm, iperm = metis.node_nd(xadj, adjncy)
+        out = (numpy.empty(n, dtype=numpy.intp),
+               numpy.empty(n, dtype=numpy.intp))
+        perm_, iperm_ = metis.node_nd(xadj, adjncy, out=out)
+        nose.tools.ok_(perm_ is out[0] and iperm_ is out[1])
+        nose.tools.assert_equal(perm_.tolist(), perm)
+        nose.tools.assert_equal(iperm_.tolist(), iperm)
+
+        sepsize, part = metis.compute_vertex_separator(xadj, adjncy)
+        part_ = metis.compute_vertex_separator(xadj, adjncy,
+                                               return_array=True)[1]
+        nose.tools.assert_equal(part_.tolist(), part)
+
+    def test_convert_graph_weights(self):
+        G = nx.Graph()
+        G.add_node(0, weight=2, size=3)
+        G.add_edge(0, 1, weight=4)
+        G.add_edge(1, 2)
+        G.add_edge(2, 2, weight=5)
+        xadj, adjncy, vwgt, vsize, adjwgt = types._convert_graph(
+            G, 'weight', 'size', 'weight')
+        nose.tools.assert_equal(list(xadj), [0, 1, 3, 5])
+        nose.tools.assert_equal(list(adjncy), [1, 0, 2, 1, 2])
+        nose.tools.assert_equal(list(vwgt), [2, 1, 1])
+        nose.tools.assert_equal(list(vsize), [3, 1, 1])
+        nose.tools.assert_equal(list(adjwgt), [4, 4, 1, 1, 5])
+
+        # All-one weights are omitted
+        _, _, vwgt, vsize, adjwgt = types._convert_graph(
+            self.G, 'weight', 'size', 'weight')
+        nose.tools.ok_(vwgt is None and vsize is None and adjwgt is None)
+
+        G.nodes[1]['weight'] = 0.5
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 2)
+
+    def test_MetisGraph(self):
+        self.G.add_edge(1, 1)
+        G = nxmetis.MetisGraph(self.G)
+        nose.tools.assert_equal(len(G), len(self.G))
+        nose.tools.assert_equal(G.nodes, list(self.G))
+        # Self-loops are removed once at construction
+        nose.tools.assert_equal(len(G.adjncy), 2 * len(self.node_list))
+        nose.tools.assert_false(G.xadj.flags.writeable)
+
+        nose.tools.assert_equal(nxmetis.partition(G, 4),
+                                nxmetis.partition(self.G, 4))
+        nose.tools.assert_equal(nxmetis.node_nested_dissection(G),
+                                nxmetis.node_nested_dissection(self.G))
+        nose.tools.assert_equal(nxmetis.vertex_separator(G),
+                                nxmetis.vertex_separator(self.G))
+
+        nose.tools.assert_raises(nx.NetworkXNotImplemented,
+                                 nxmetis.MetisGraph, nx.DiGraph())
+        nose.tools.assert_equal(len(nxmetis.MetisGraph(nx.Graph())), 0)
+
+    def test_concurrent_output_capture(self):
+        n = 16
+        xadj, adjncy = make_cycle(n)
+        options = types.MetisOptions(niter=-2)
+        errors = []
+
+        def run():
+            for i in range(20):
+                try:
+                    metis.part_graph(xadj, adjncy, 2, options=options)
+                except exceptions.MetisError as e:
+                    errors.append(str(e))
+
+        threads = [threading.Thread(target=run) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Each call sees exactly its own output
+        nose.tools.assert_equal(len(errors), 80)
+        for error in errors:
+            nose.tools.assert_equal(error.count('Incorrect niter.'), 1)
+
+    def test_partition_trials(self):
+        G = nx.random_regular_graph(3, 200, seed=1)
+        objval, parts, trials = nxmetis.partition(
+            G, 4, trials=8, n_jobs=4, return_trials=True)
+        nose.tools.assert_equal([seed for seed, _ in trials], list(range(8)))
+        nose.tools.assert_equal(objval, min(cut for _, cut in trials))
+
+        # The best trial is reproducible from its seed
+        seed = [seed for seed, cut in trials if cut == objval][0]
+        options = types.MetisOptions(seed=seed)
+        nose.tools.assert_equal(nxmetis.partition(G, 4, options=options),
+                                (objval, parts))
+        nose.tools.assert_less_equal(
+            nxmetis.partition(G, 4, trials=8, options=options)[0], objval)
+
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 4,
+                                 trials=0)
+
+    def test_stats(self):
+        G = nx.grid_2d_graph(60, 60)
+        stats = nxmetis.MetisStats()
+        objval, parts = nxmetis.partition(G, 4, stats=stats)
+        nose.tools.assert_greater(stats.peak_memory, 0)
+        nose.tools.assert_greater(stats.coarsening_levels, 0)
+        nose.tools.assert_greater_equal(stats.coarsenings, 1)
+        nose.tools.assert_greater_equal(stats.total_time,
+                                        stats.coarsening_time)
+        nose.tools.assert_greater_equal(
+            stats.coarsening_time, 0.99 * stats.matching_time)
+        # Collecting statistics does not change the result
+        nose.tools.assert_equal(nxmetis.partition(G, 4), (objval, parts))
+
+        stats = nxmetis.MetisStats()
+        nxmetis.partition(G, 4, trials=3, stats=stats)
+        nose.tools.assert_greater(stats.coarsening_levels, 0)
+
+        for func in [nxmetis.node_nested_dissection,
+                     nxmetis.vertex_separator]:
+            stats = nxmetis.MetisStats()
+            func(G, stats=stats)
+            nose.tools.assert_greater(stats.peak_memory, 0)
+            nose.tools.assert_greater(stats.coarsenings, 0)
+
+        # Statistics are those of the last run of the calling thread
+        stats = types.MetisStats()
+        metis.part_mesh_dual([0, 3, 6], [0, 1, 2, 1, 2, 3], 2, stats=stats)
+        nose.tools.assert_greater(stats.peak_memory, 0)
+        nose.tools.ok_(str(stats).startswith('MetisStats('))
+
+    def test_repartition(self):
+        G = nx.grid_2d_graph(40, 40)
+        options = types.MetisOptions(seed=3)
+        objval, parts = nxmetis.partition(G, 4, options=options)
+
+        # An unchanged graph keeps most of its partitioning
+        objval2, parts2, migration = nxmetis.repartition(G, parts)
+        nose.tools.assert_less_equal(objval2, objval)
+        nose.tools.assert_less(migration, len(G) // 20)
+
+        # Small changes move few nodes
+        G.remove_nodes_from([(0, 0), (20, 20)])
+        G.add_edges_from([((1, 1), (30, 30)), ((41, 0), (39, 0)),
+                          ((42, 0), (41, 0)), ((43, 43), (44, 44))])
+        objval2, parts2, migration = nxmetis.repartition(G, parts)
+        nose.tools.assert_equal(sorted(itertools.chain(*parts2), key=str),
+                                sorted(G, key=str))
+        nose.tools.assert_less(migration, len(G) // 10)
+        nose.tools.assert_less(max(map(len, parts2)),
+                               1.05 * len(G) / 4)
+        part_of = dict((u, i) for i, part in enumerate(parts2) for u in part)
+        nose.tools.assert_equal(part_of[(42, 0)], part_of[(39, 0)])
+        nose.tools.assert_equal(part_of[(43, 43)], part_of[(44, 44)])
+        cut = sum(1 for u, v in G.edges() if part_of[u] != part_of[v])
+        nose.tools.assert_equal(cut, objval2)
+
+        # Migration is weighted by node sizes
+        for u in G:
+            G.nodes[u]['size'] = 2
+        nose.tools.assert_equal(nxmetis.repartition(G, parts)[2],
+                                2 * migration)
+
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.repartition, G,
+                                 [[(1, 1)], [(1, 1)]])
+        nose.tools.assert_equal(nxmetis.repartition(G, [list(G)]),
+                                (0, [list(G)], 0))
+
+        xadj, adjncy = make_cycle(16)
+        part = [0] * 8 + [1] * 8
+        nose.tools.assert_equal(metis.refine_graph(xadj, adjncy, part, 2),
+                                (2, part))
+        nose.tools.assert_raises(ValueError, metis.refine_graph, xadj, adjncy,
+                                 [0] * 15 + [2], 2)
+        nose.tools.assert_raises(ValueError, metis.refine_graph, xadj, adjncy,
+                                 part[1:], 2)
+
+    def test_node_ndp(self):
+        G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(20, 20))
+        M = types.MetisGraph(G)
+        perm, iperm, sizes = metis.node_ndp(M.xadj, M.adjncy, 4)
+        nose.tools.assert_equal(sorted(perm), list(range(len(G))))
+        nose.tools.assert_equal([perm[i] for i in iperm], list(range(len(G))))
+        nose.tools.assert_equal(len(sizes), 7)
+        nose.tools.assert_equal(sum(sizes), len(G))
+
+        # The top-level separator comes last in perm and in sizes
+        top = set(perm[-sizes[-1]:])
+        H = G.copy()
+        H.remove_nodes_from(top)
+        nose.tools.assert_false(nx.is_connected(H))
+
+        options = types.MetisOptions(numbering=1)
+        perm1, iperm1, sizes1 = metis.node_ndp(
+            numpy.array(M.xadj) + 1, numpy.array(M.adjncy) + 1, 4,
+            options=options, return_array=True)
+        nose.tools.assert_equal((perm1 - 1).tolist(), perm)
+        nose.tools.assert_equal(sizes1.tolist(), sizes)
+
+        nose.tools.assert_raises(ValueError, metis.node_ndp, M.xadj,
+                                 M.adjncy, 3)
+        nose.tools.assert_raises(ValueError, metis.node_ndp, M.xadj,
+                                 M.adjncy, 1)
+
+    def test_node_refine(self):
+        G = nx.grid_2d_graph(20, 20)
+        M = types.MetisGraph(nx.convert_node_labels_to_integers(G))
+        # A separator three columns wide
+        part = numpy.array([0 if j < 8 else 1 if j > 10 else 2
+                            for i, j in G], dtype=M.xadj.dtype)
+        sepsize, part2 = metis.node_refine(M.xadj, M.adjncy, part)
+        nose.tools.assert_less(sepsize, 60)
+        nose.tools.assert_equal(part2.count(2), sepsize)
+        for i in range(len(part2)):
+            if part2[i] != 2:
+                for j in M.adjncy[M.xadj[i]:M.xadj[i + 1]]:
+                    nose.tools.assert_not_equal(part2[j], 1 - part2[i])
+
+        # Separator vertices that may not move stay in place
+        hmarker = numpy.full(len(part), -2)
+        nose.tools.assert_equal(
+            metis.node_refine(M.xadj, M.adjncy, part, hmarker=hmarker)[0],
+            60)
+
+        # In-place refinement
+        sepsize2, out = metis.node_refine(M.xadj, M.adjncy, part, out=part)
+        nose.tools.ok_(out is part)
+        nose.tools.assert_equal((sepsize2, part.tolist()), (sepsize, part2))
+
+        nose.tools.assert_raises(ValueError, metis.node_refine, M.xadj,
+                                 M.adjncy, [3] * len(part))
+        nose.tools.assert_raises(ValueError, metis.node_refine, M.xadj,
+                                 M.adjncy, [0] * 200 + [1] * 200)
+        nose.tools.assert_raises(ValueError, metis.node_refine, M.xadj,
+                                 M.adjncy, part[1:])
+        nose.tools.assert_raises(ValueError, metis.node_refine, M.xadj,
+                                 M.adjncy, part, hmarker=hmarker[1:])
+
+    def test_node_nested_dissection_tree(self):
+        G = nx.grid_2d_graph(50, 50)
+        perm, tree = nxmetis.node_nested_dissection(G, return_tree=True)
+        nose.tools.assert_equal(
+            perm, nxmetis.node_nested_dissection(G))
+        nose.tools.assert_equal(tree[0], [0, tree[0][1], len(G), -1])
+
+        children = dict((i, []) for i in range(len(tree)))
+        for i, (first, sep, last, parent) in enumerate(tree):
+            nose.tools.ok_(first <= sep <= last)
+            if parent >= 0:
+                nose.tools.assert_less(parent, i)
+                children[parent].append((first, last))
+        for i, (first, sep, last, parent) in enumerate(tree):
+            # The subtrees of the children are ordered before the separator
+            # and are disconnected by it
+            ranges = sorted(children[i])
+            nose.tools.assert_equal(
+                [first] + [end for start, end in ranges],
+                [start for start, end in ranges] + [sep])
+            if len(ranges) == 2:
+                left = set(perm[ranges[0][0]:ranges[0][1]])
+                right = set(perm[ranges[1][0]:ranges[1][1]])
+                nose.tools.ok_(all(v not in right
+                                   for u in left for v in G[u]))
+            if not ranges:
+                nose.tools.assert_equal(first, sep)
+
+        # Pruned dense nodes form a separator at the root
+        G.add_edges_from(('x', u) for u in list(G))
+        options = types.MetisOptions(pfactor=10)
+        perm, tree = nxmetis.node_nested_dissection(G, options=options,
+                                                    return_tree=True)
+        nose.tools.assert_equal(tree[0], [0, len(G) - 1, len(G), -1])
+        nose.tools.assert_equal(perm[-1], 'x')
+
+        nose.tools.assert_equal(
+            nxmetis.node_nested_dissection(nx.Graph(), return_tree=True),
+            ([], []))
+
+    def test_idx_dtype(self):
+        nose.tools.assert_equal(metis.idx_dtype(100), numpy.int32)
+        nose.tools.assert_equal(metis.idx_dtype(2 ** 31), numpy.int64)
+        nose.tools.assert_equal(
+            metis.idx_dtype(100, [None, [2 ** 30, 2 ** 30]]), numpy.int64)
+
+        xadj, adjncy = make_cycle(16)
+        objval, part = metis.part_graph(xadj, adjncy, 2, return_array=True)
+        nose.tools.assert_equal(part.dtype, numpy.int32)
+
+        # Buffers of either width are written in place
+        for dtype in [numpy.int32, numpy.int64]:
+            out = numpy.empty(16, dtype=dtype)
+            nose.tools.ok_(metis.part_graph(xadj, adjncy, 2, out=out)[1]
+                           is out)
+            nose.tools.assert_equal(out.tolist(), part.tolist())
+
+        # Weights whose total does not fit in 32 bits
+        adjwgt = [2 ** 28] * len(adjncy)
+        objval, part = metis.part_graph(xadj, adjncy, 2, adjwgt=adjwgt,
+                                        return_array=True)
+        nose.tools.assert_equal(part.dtype, numpy.int64)
+        nose.tools.assert_equal(objval, 2 ** 29)
+
+        # Buffers of 64-bit integers are used as they are
+        xadj = numpy.array(xadj, dtype=numpy.int64)
+        adjncy = numpy.array(adjncy, dtype=numpy.int64)
+        nose.tools.assert_equal(metis.idx_dtype(17, (), (xadj, adjncy)),
+                                numpy.int64)
+        _xadj, _adjncy, _ = metis.convert_graph(xadj, adjncy)
+        nose.tools.ok_(_xadj is xadj and _adjncy is adjncy)
+        G = types.MetisGraph.from_arrays(xadj, adjncy)
+        nose.tools.ok_(numpy.shares_memory(G.adjncy, adjncy))
+        objval, part = metis.part_graph(xadj, adjncy, 2, return_array=True)
+        nose.tools.assert_equal(part.dtype, numpy.int64)
+
+    def test_builds(self):
+        # Both builds load in one process, each with its own METIS
+        from nxmetis import _metis
+        from nxmetis import _metis32
+        nose.tools.assert_equal(_metis.IDX_DTYPE, numpy.int64)
+        nose.tools.assert_equal(_metis32.IDX_DTYPE, numpy.int32)
+        xadj, adjncy = make_cycle(16)
+        results = [module.part_graph(xadj, adjncy, 2, return_array=True)
+                   for module in [_metis, _metis32]]
+        nose.tools.assert_equal([part.dtype for objval, part in results],
+                                [numpy.int64, numpy.int32])
+        nose.tools.assert_equal([objval for objval, part in results], [2, 2])
+        for objval, part in results:
+            nose.tools.assert_equal(numpy.bincount(part).tolist(), [8, 8])
+
+    def test_partition_multiconstraint(self):
+        G = nx.grid_2d_graph(30, 30)
+        for u in G:
+            G.nodes[u]['cpu'] = 1
+            if u[0] < 5:
+                G.nodes[u]['mem'] = 10
+
+        # Both constraints are balanced
+        objval, parts = nxmetis.partition(G, 4, node_weight=['cpu', 'mem'])
+        for key in ['cpu', 'mem']:
+            total = sum(G.nodes[u].get(key, 1) for u in G)
+            for part in parts:
+                nose.tools.assert_less(
+                    sum(G.nodes[u].get(key, 1) for u in part),
+                    1.1 * total / 4)
+
+        vwgt = numpy.array([[G.nodes[u]['cpu'], G.nodes[u].get('mem', 1)]
+                            for u in G])
+        nose.tools.assert_equal(nxmetis.partition(G, 4, node_weight=vwgt),
+                                (objval, parts))
+        M = types.MetisGraph(G, node_weight=['cpu', 'mem'])
+        nose.tools.assert_equal(M.vwgt.shape, (len(G), 2))
+        nose.tools.assert_equal(nxmetis.partition(M, 4), (objval, parts))
+
+        # Interleaved weights are accepted by the low-level wrapper
+        nose.tools.assert_equal(
+            metis.part_graph(M.xadj, M.adjncy, 4, M.vwgt)[1],
+            metis.part_graph(M.xadj, M.adjncy, 4, M.vwgt.ravel())[1])
+
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 4,
+                                 node_weight=['cpu', 'mem'],
+                                 tpwgts=[[0.25]] * 4)
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 4,
+                                 node_weight=vwgt[1:])
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 4,
+                                 node_weight=vwgt[:, :0])
+        nose.tools.assert_raises(ValueError, metis.part_graph, M.xadj,
+                                 M.adjncy, 4, M.vwgt.ravel()[1:])
+
+    def test_partition_hierarchical(self):
+        G = nx.grid_2d_graph(16, 16)
+        for u, v in G.edges():
+            G[u][v]['weight'] = 1 + (u[0] + v[1]) % 3
+        objvals, parts = nxmetis.partition_hierarchical(
+            G, [2, 3, 4], ubvecs=[[1.01], None, [1.2]])
+        nose.tools.assert_equal(len(objvals), 3)
+        nose.tools.assert_equal([len(parts)] + [len(p) for p in parts],
+                                [2, 3, 3])
+        part_of = dict((u, (i, j, k))
+                       for i, p in enumerate(parts)
+                       for j, q in enumerate(p)
+                       for k, r in enumerate(q) for u in r)
+        nose.tools.assert_equal(sorted(part_of), sorted(G))
+        # The cut of each level is between parts with a common parent
+        for level in range(3):
+            cut = sum(d['weight'] for u, v, d in G.edges(data=True)
+                      if part_of[u][:level] == part_of[v][:level] and
+                      part_of[u][level] != part_of[v][level])
+            nose.tools.assert_equal(cut, objvals[level])
+        # Tolerances are per level
+        sizes = [sum(map(len, q)) for p in parts for q in p]
+        nose.tools.assert_less_equal(max(sizes), 1.001 * len(G) / 6 + 1)
+
+        # A single level is a plain partitioning
+        nose.tools.assert_equal(nxmetis.partition_hierarchical(G, [4]),
+                                ([nxmetis.partition(G, 4)[0]],
+                                 nxmetis.partition(G, 4)[1]))
+        nose.tools.assert_equal(
+            nxmetis.partition_hierarchical(nx.Graph(), [2, 1]),
+            ([0, 0], [[[]], [[]]]))
+        nose.tools.assert_raises(nx.NetworkXError,
+                                 nxmetis.partition_hierarchical, G, [])
+        nose.tools.assert_raises(nx.NetworkXError,
+                                 nxmetis.partition_hierarchical, G, [2, 0])
+        nose.tools.assert_raises(nx.NetworkXError,
+                                 nxmetis.partition_hierarchical, G, [2, 2],
+                                 ubvecs=[None])
+
+        xadj, adjncy = make_cycle(8)
+        subgraphs = metis.split_graph(xadj, adjncy, [0, 0, 1, 1, 1, 0, 0, 0],
+                                      2, vsize=range(8))
+        nose.tools.assert_equal(
+            [[None if a is None else a.tolist() for a in s]
+             for s in subgraphs],
+            [[[0, 1, 5, 6, 7], [0, 2, 3, 4, 6, 8], [4, 1, 0, 3, 2, 4, 3, 0],
+              None, [0, 1, 5, 6, 7], None],
+             [[2, 3, 4], [0, 1, 3, 4], [1, 0, 2, 1], None, [2, 3, 4], None]])
+        nose.tools.assert_raises(ValueError, metis.split_graph, xadj, adjncy,
+                                 [0] * 7 + [2], 2)
+
+    def test_output(self):
+        G = nx.grid_2d_graph(10, 10)
+        objval, parts = nxmetis.partition(G, 3)
+        part_of = dict((u, i) for i, part in enumerate(parts) for u in part)
+        nose.tools.assert_equal(nxmetis.partition(G, 3, output='dict'),
+                                (objval, part_of))
+        objval2, part = nxmetis.partition(G, 3, output='array')
+        nose.tools.assert_equal(objval2, objval)
+        nose.tools.assert_equal(part.tolist(), [part_of[u] for u in G])
+        nose.tools.assert_equal(nxmetis.partition(G, 1, output='array')[1]
+                                .tolist(), [0] * len(G))
+        nose.tools.assert_equal(nxmetis.partition(nx.Graph(), 2,
+                                                  output='dict'), (0, {}))
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 3,
+                                 output='set')
+
+        # Cached arrays are not returned
+        cache = nxmetis.MetisCache()
+        part = nxmetis.partition(G, 3, output='array', cache=cache)[1]
+        part[:] = 0
+        nose.tools.assert_equal(
+            nxmetis.partition(G, 3, output='dict', cache=cache)[1], part_of)
+
+        sep, part1, part2 = nxmetis.vertex_separator(G)
+        part_of = dict((u, i) for i, part in enumerate([part1, part2, sep])
+                       for u in part)
+        nose.tools.assert_equal(nxmetis.vertex_separator(G, output='dict'),
+                                part_of)
+        nose.tools.assert_equal(
+            nxmetis.vertex_separator(G, output='array').tolist(),
+            [part_of[u] for u in G])
+        nose.tools.assert_equal(
+            len(nxmetis.vertex_separator(nx.Graph(), output='array')), 0)
+
+        # Integer nodes of MetisGraphs built from arrays
+        H = types.MetisGraph.from_arrays(*make_cycle(8))
+        nose.tools.assert_equal(nxmetis.partition(H, 2)[1],
+                                [[4, 5, 6, 7], [0, 1, 2, 3]])
+        nose.tools.assert_equal(nxmetis.node_nested_dissection(H),
+                                metis.node_nd(*make_cycle(8))[0])
+
+        nose.tools.assert_equal(metis.group_nodes('abcde', [1, 0, 1, 2, 1],
+                                                  4),
+                                [['b'], ['a', 'c', 'e'], ['d'], []])
+        order, starts = metis.group_vertices([1, 0, 1, 2, 1], 4)
+        nose.tools.assert_equal((order.tolist(), starts.tolist()),
+                                ([1, 0, 2, 4, 3], [0, 1, 4, 5, 5]))
+        nose.tools.assert_raises(ValueError, metis.group_nodes, 'ab', [0, 2],
+                                 2)
+        nose.tools.assert_raises(ValueError, metis.group_nodes, 'ab', [0], 2)
+        nose.tools.assert_raises(ValueError, metis.group_vertices, [-1], 2)
+
+    def test_evaluate(self):
+        G = nx.grid_2d_graph(12, 12)
+        for u, v in G.edges():
+            G[u][v]['weight'] = 1 + (u[0] * v[1]) % 4
+        for u in G:
+            G.nodes[u]['size'] = 1 + u[0] % 2
+        metrics = nxmetis.MetisMetrics()
+        objval, parts = nxmetis.partition(G, 5, metrics=metrics)
+        part_of = dict((u, i) for i, part in enumerate(parts) for u in part)
+
+        nose.tools.assert_equal(metrics.edgecut, objval)
+        nose.tools.assert_equal(
+            metrics.edgecut, sum(d['weight'] for u, v, d in G.edges(data=True)
+                                 if part_of[u] != part_of[v]))
+        nose.tools.assert_equal(metrics.volume, sum(
+            G.nodes[u]['size'] *
+            len(set(part_of[v] for v in G[u]) - set([part_of[u]]))
+            for u in G))
+        nose.tools.assert_equal(metrics.part_weights.tolist(),
+                                [[len(part)] for part in parts])
+        nose.tools.assert_equal(metrics.imbalance,
+                                [max(map(len, parts)) * 5.0 / len(G)])
+        nose.tools.assert_equal(metrics.boundary.tolist(), [
+            sum(1 for u in part if any(part_of[v] != i for v in G[u]))
+            for i, part in enumerate(parts)])
+        connectivity = numpy.zeros((5, 5), dtype=int)
+        for u, v, d in G.edges(data=True):
+            if part_of[u] != part_of[v]:
+                connectivity[part_of[u], part_of[v]] += d['weight']
+                connectivity[part_of[v], part_of[u]] += d['weight']
+        nose.tools.assert_equal(metrics.connectivity_matrix().tolist(),
+                                connectivity.tolist())
+        xadj, adjncy, adjwgt = metrics.connectivity
+        nose.tools.assert_equal(
+            [adjncy[xadj[i]:xadj[i + 1]].tolist() for i in range(5)],
+            [numpy.flatnonzero(row).tolist() for row in connectivity])
+        nose.tools.assert_equal(adjwgt.tolist(),
+                                connectivity[connectivity > 0].tolist())
+
+        # All the forms of partitionings give the same metrics
+        for parts in [part_of, nxmetis.partition(G, 5, output='array')[1]]:
+            nose.tools.assert_equal(nxmetis.evaluate(G, parts).edgecut,
+                                    metrics.edgecut)
+        metrics2 = nxmetis.evaluate(G, parts, nparts=6,
+                                    tpwgts=[[0.2]] * 5 + [[0.0]])
+        nose.tools.assert_equal(metrics2.part_weights[5].tolist(), [0])
+        nose.tools.assert_equal(metrics2.imbalance, metrics.imbalance)
+
+        # Multiple constraints and trivial partitionings
+        metrics = nxmetis.evaluate(
+            G, [list(G)], node_weight=numpy.ones((len(G), 2), dtype=int))
+        nose.tools.assert_equal(
+            (metrics.edgecut, metrics.volume, metrics.imbalance),
+            (0, 0, [1.0, 1.0]))
+        metrics = nxmetis.MetisMetrics()
+        nxmetis.partition(nx.Graph(), 3, metrics=metrics)
+        nose.tools.assert_equal(metrics.part_weights.tolist(),
+                                [[0], [0], [0]])
+        nose.tools.assert_equal(metrics.connectivity_matrix().tolist(),
+                                [[0] * 3] * 3)
+
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.evaluate, G,
+                                 [list(G)[1:]])
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.evaluate, G,
+                                 [list(G), list(G)[:1]])
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.evaluate, G,
+                                 {(0, 0): 0})
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.evaluate, G,
+                                 -numpy.ones(len(G), dtype=int))
+
+    def test_partition_split_components(self):
+        G = nx.disjoint_union_all(
+            [nx.grid_2d_graph(30, 30), nx.cycle_graph(100),
+             nx.cycle_graph(60)] +
+            [nx.path_graph(i % 7 + 1) for i in range(500)])
+        metrics = nxmetis.MetisMetrics()
+        objval, parts = nxmetis.partition(G, 6, split_components=True,
+                                          metrics=metrics)
+        nose.tools.assert_equal(sorted(itertools.chain(*parts)), sorted(G))
+        nose.tools.assert_equal(objval, metrics.edgecut)
+        nose.tools.assert_less(objval, nxmetis.partition(G, 6)[0])
+        nose.tools.assert_less_equal(metrics.imbalance[0], 1.01)
+        # Only the grid is cut
+        part_of = dict((u, i) for i, part in enumerate(parts) for u in part)
+        for nodes in nx.connected_components(G):
+            if len(nodes) < 900:
+                nose.tools.assert_equal(
+                    len(set(part_of[u] for u in nodes)), 1)
+
+        # Target weights are respected
+        tpwgts = [[0.1], [0.2], [0.3], [0.4]]
+        nxmetis.partition(G, 4, tpwgts=tpwgts, split_components=True,
+                          metrics=metrics)
+        nose.tools.assert_less_equal(metrics.imbalance[0], 1.01)
+
+        # Components larger than every part are split
+        G = nx.disjoint_union(nx.grid_2d_graph(20, 20), nx.path_graph(10))
+        objval, parts = nxmetis.partition(G, 4, split_components=True,
+                                          metrics=metrics)
+        nose.tools.assert_greater(objval, 0)
+        nose.tools.assert_less_equal(metrics.imbalance[0], 1.03)
+
+        # Connected graphs are partitioned as usual
+        G = nx.grid_2d_graph(10, 10)
+        nose.tools.assert_equal(
+            nxmetis.partition(G, 3, split_components=True),
+            nxmetis.partition(G, 3))
+        nose.tools.assert_raises(nx.NetworkXError, nxmetis.partition, G, 3,
+                                 trials=2, split_components=True)
+
+        ncomps, comp = metis.connected_components([0, 1, 2, 2, 3, 4, 4],
+                                                  [1, 0, 4, 3])
+        nose.tools.assert_equal((ncomps, comp.tolist()),
+                                (4, [0, 0, 1, 2, 2, 3]))
+
+    def test_partition_compress(self):
+        # Five replicas of each service of a grid, connected to all the
+        # replicas of the neighboring services
+        services = nx.grid_2d_graph(20, 20)
+        G = nx.Graph()
+        for u, v in services.edges():
+            G.add_edges_from((u + (i,), v + (j,))
+                             for i in range(5) for j in range(5))
+        metrics = nxmetis.MetisMetrics()
+        objval, parts = nxmetis.partition(G, 4, compress=True,
+                                          metrics=metrics)
+        nose.tools.assert_equal(sorted(itertools.chain(*parts)), sorted(G))
+        nose.tools.assert_equal(objval, metrics.edgecut)
+        nose.tools.assert_less_equal(metrics.imbalance[0], 1.03)
+        part_of = dict((u, i) for i, part in enumerate(parts) for u in part)
+        for u in services:
+            nose.tools.assert_equal(
+                len(set(part_of[u + (i,)] for i in range(5))), 1)
+
+        parts = nxmetis.vertex_separator(G, compress=True, output='dict')
+        for u, v in G.edges():
+            nose.tools.assert_not_equal(set([parts[u], parts[v]]),
+                                        set([0, 1]))
+        for u in services:
+            nose.tools.assert_equal(
+                len(set(parts[u + (i,)] for i in range(5))), 1)
+
+        # Graphs without twins are partitioned as usual
+        G = nx.grid_2d_graph(10, 10)
+        nose.tools.assert_equal(nxmetis.partition(G, 3, compress=True),
+                                nxmetis.partition(G, 3))
+
+        # Leaves of a star, joined by edges of the same weight, and the
+        # nodes of a triangle are twins.
+        G = nx.star_graph(4)
+        G[0][4]['weight'] = 2
+        G.add_edges_from([(5, 6), (6, 7), (7, 5)])
+        G = types.MetisGraph(G)
+        cmap, xadj, adjncy, vwgt, vsize, adjwgt = metis.compress_graph(
+            G.xadj, G.adjncy, None, None, G.adjwgt)
+        nose.tools.assert_equal(cmap.tolist(), [0, 1, 1, 1, 2, 3, 3, 3])
+        nose.tools.assert_equal(xadj.tolist(), [0, 2, 3, 4, 4])
+        nose.tools.assert_equal(adjncy.tolist(), [1, 2, 0, 0])
+        nose.tools.assert_equal(adjwgt.tolist(), [3, 2, 3, 2])
+        nose.tools.assert_equal(vwgt.tolist(), [1, 3, 1, 3])
+        nose.tools.assert_equal(vsize.tolist(), [1, 3, 1, 3])
+
+        # Super-vertices are kept within maxvwgt
+        cmap = metis.compress_graph(G.xadj, G.adjncy, None, None, G.adjwgt,
+                                    [2])[0]
+        nose.tools.assert_equal(cmap.tolist(), [0, 1, 1, 2, 3, 4, 4, 5])
+        nose.tools.assert_raises(ValueError, metis.compress_graph, G.xadj,
+                                 G.adjncy, maxvwgt=[2, 2])
+
+        # The leaves of a star and isolated nodes, which are all twins, stay
+        # balanced.
+        G = nx.star_graph(200)
+        G.add_nodes_from(range(201, 401))
+        for compress in [False, True]:
+            metrics = nxmetis.MetisMetrics()
+            nxmetis.partition(G, 4, compress=compress, metrics=metrics)
+            nose.tools.assert_less_equal(metrics.imbalance[0], 1.03)
+        metrics = nxmetis.evaluate(
+            G, nxmetis.vertex_separator(G, compress=True, output='array'))
+        nose.tools.assert_less_equal(metrics.part_weights[:2].max(),
+                                     0.6 * len(G))
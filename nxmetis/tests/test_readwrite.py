@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+
+import nose.tools
+import numpy
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import metis
+from nxmetis import readwrite
+from nxmetis import types
+
+
+class TestReadWrite(object):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.G = nx.grid_2d_graph(6, 5)
+        for i, (u, v) in enumerate(self.G.edges()):
+            self.G[u][v]['weight'] = i % 3 + 1
+        for i, u in enumerate(self.G):
+            self.G.nodes[u]['weight'] = i % 2 + 1
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def write_graph(self, G):
+        index = dict(zip(G, range(len(G))))
+        lines = ['% grid graph', '{0} {1} 011'.format(len(G),
+                                                      G.number_of_edges())]
+        for u in G:
+            values = [G.nodes[u]['weight']]
+            for v, data in G[u].items():
+                values.extend([index[v] + 1, data['weight']])
+            lines.append(' '.join(map(str, values)))
+        return self.write('grid.graph', '\n'.join(lines) + '\n')
+
+    def test_read_metis_graph(self):
+        path = self.write_graph(self.G)
+        H = nxmetis.read_metis_graph(path)
+        expected = types.MetisGraph(self.G)
+        nose.tools.assert_equal(len(H), len(self.G))
+        for name in ['xadj', 'adjncy', 'vwgt', 'adjwgt']:
+            nose.tools.assert_equal(list(getattr(H, name)),
+                                    list(getattr(expected, name)))
+        nose.tools.assert_is_none(H.vsize)
+
+        options = types.MetisOptions(seed=5)
+        objval, parts = nxmetis.partition(H, 3, options=options)
+        index = dict(zip(self.G, range(len(self.G))))
+        expected = nxmetis.partition(self.G, 3, options=options)
+        nose.tools.assert_equal(objval, expected[0])
+        nose.tools.assert_equal(
+            parts, [[index[u] for u in part] for part in expected[1]])
+        perm = nxmetis.node_nested_dissection(H)
+        nose.tools.assert_equal(sorted(perm), list(range(len(self.G))))
+
+    def test_read_metis_graph_formats(self):
+        # Isolated vertices have empty lines
+        path = self.write('path.graph', '%\n4 1\n2\n1\n\n\n')
+        H = nxmetis.read_metis_graph(path)
+        nose.tools.assert_equal(list(H.xadj), [0, 1, 2, 2, 2])
+        nose.tools.assert_equal(list(H.adjncy), [1, 0])
+
+        # Node sizes and multi-constraint weights
+        path = self.write('path.graph', '2 1 110 2\n3 1 2 2\n4 5 6 1\n')
+        H = nxmetis.read_metis_graph(path)
+        nose.tools.assert_equal(list(H.vsize), [3, 4])
+        nose.tools.assert_equal(H.vwgt.tolist(), [[1, 2], [5, 6]])
+
+        for text in ['', '3\n', '2 1 2\n2\n1\n', '2 1\n2\n1\n1\n',
+                     '2 2\n2\n1\n', '2 1\n3\n1\n', '2 1 1\n2\n1 1\n',
+                     '2 1\nx\n1\n']:
+            path = self.write('bad.graph', text)
+            nose.tools.assert_raises(nx.NetworkXError,
+                                     nxmetis.read_metis_graph, path)
+
+    def test_read_csr(self):
+        G = types.MetisGraph(self.G)
+        xadj = os.path.join(self.dir, 'xadj.npy')
+        numpy.save(xadj, G.xadj.astype(numpy.intp))
+        adjncy = os.path.join(self.dir, 'adjncy.bin')
+        G.adjncy.astype(numpy.intp).tofile(adjncy)
+        vwgt = os.path.join(self.dir, 'vwgt.npy')
+        numpy.save(vwgt, G.vwgt.astype(numpy.int32))
+        adjwgt = os.path.join(self.dir, 'adjwgt.bin')
+        G.adjwgt.astype(numpy.int32).tofile(adjwgt)
+
+        H = nxmetis.read_csr(xadj, adjncy)
+        # Arrays are not copied out of the memory maps
+        nose.tools.ok_(not H.xadj.flags.owndata)
+        nose.tools.ok_(not H.adjncy.flags.owndata)
+        nose.tools.assert_equal(list(H.xadj), list(G.xadj))
+        nose.tools.assert_equal(list(H.adjncy), list(G.adjncy))
+        nose.tools.assert_is_none(H.adjwgt)
+        # nor when they are passed to METIS
+        _xadj, _adjncy, _ = metis.convert_graph(H.xadj, H.adjncy)
+        nose.tools.ok_(_xadj is H.xadj)
+        nose.tools.ok_(_adjncy is H.adjncy)
+        base = H.adjncy
+        while isinstance(base.base, numpy.ndarray):
+            base = base.base
+        nose.tools.ok_(isinstance(base, numpy.memmap))
+
+        # Weights stored with other integer types are converted
+        H = readwrite.read_csr(xadj, adjncy, vwgt=vwgt)
+        nose.tools.assert_equal(list(H.vwgt), list(G.vwgt))
+        adjncy32 = os.path.join(self.dir, 'adjncy32.bin')
+        G.adjncy.astype(numpy.int32).tofile(adjncy32)
+        H = readwrite.read_csr(xadj, adjncy32, adjwgt=adjwgt,
+                               dtype=numpy.int32)
+        nose.tools.assert_equal(list(H.adjncy), list(G.adjncy))
+        nose.tools.assert_equal(list(H.adjwgt), list(G.adjwgt))
+
+        options = types.MetisOptions(seed=5)
+        H = readwrite.read_csr(xadj, adjncy32, vwgt=vwgt, adjwgt=adjwgt,
+                               dtype=numpy.int32)
+        nose.tools.assert_equal(nxmetis.partition(H, 3, options=options)[0],
+                                nxmetis.partition(G, 3, options=options)[0])
+
+        nose.tools.assert_raises(nx.NetworkXError, readwrite.read_csr,
+                                 adjncy, xadj)
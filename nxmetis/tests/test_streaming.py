@@ -0,0 +1,75 @@
+import nose.tools
+
+import networkx as nx
+
+import nxmetis
+from nxmetis import streaming
+
+
+class TestStreaming(object):
+
+    def setUp(self):
+        self.G = nx.grid_2d_graph(20, 20)
+        self.objval, self.parts = nxmetis.partition(self.G, 4)
+
+    def test_seed(self):
+        assigner = streaming.StreamingAssigner(self.G, self.parts)
+        metrics = nxmetis.evaluate(self.G, self.parts)
+        nose.tools.assert_equal(len(assigner), 400)
+        nose.tools.assert_equal(assigner.edgecut, self.objval)
+        nose.tools.assert_equal(assigner.total_edge_weight, 760)
+        nose.tools.assert_almost_equal(assigner.imbalance,
+                                       metrics.imbalance[0])
+        nose.tools.assert_false(assigner.degraded())
+
+        # All forms of partitionings give the same assignment
+        _, part = nxmetis.partition(self.G, 4, output='array')
+        for parts in [part, nxmetis.partition(self.G, 4, output='dict')[1]]:
+            other = streaming.StreamingAssigner(self.G, parts)
+            nose.tools.assert_equal(other.part_of, assigner.part_of)
+
+        nose.tools.assert_raises(nx.NetworkXError,
+                                 streaming.StreamingAssigner, self.G,
+                                 self.parts[1:])
+
+    def test_assign(self):
+        assigner = streaming.StreamingAssigner(self.G, self.parts)
+        u = self.parts[2][0]
+        v = self.parts[3][0]
+        # The part with the most connection wins
+        nose.tools.assert_equal(
+            assigner.assign('a', {u: 1, v: 3}), 3)
+        nose.tools.assert_equal(assigner.edgecut, self.objval + 1)
+        nose.tools.assert_equal(assigner.assign('a', [u]), 3)
+        nose.tools.assert_equal(assigner.edgecut, self.objval + 1)
+
+        # A full part is avoided in favour of the lightest one
+        assigner.assign('b', [u], weight=2)
+        nose.tools.assert_equal(assigner.part_of['b'], 2)
+        heavy = assigner.assign('c', [u], weight=50)
+        nose.tools.assert_not_equal(heavy, 2)
+        nose.tools.assert_equal(assigner.part_weights[heavy], 150)
+        nose.tools.assert_true(assigner.degraded())
+
+        nose.tools.assert_raises(nx.NetworkXError, assigner.add_edge, 'd', u)
+        cut = assigner.edgecut
+        assigner.add_edge('a', 'b', 2)
+        nose.tools.assert_equal(assigner.edgecut, cut + 2)
+
+    def test_assign_from(self):
+        assigner = streaming.StreamingAssigner(self.G, self.parts)
+        H = nx.grid_2d_graph(20, 24)
+        parts = assigner.assign_from(H)
+        nose.tools.assert_equal(len(parts), 80)
+        nose.tools.assert_equal(len(assigner), 480)
+
+        # The cut and the balance are kept exactly
+        metrics = nxmetis.evaluate(H, assigner.part_of, nparts=4)
+        nose.tools.assert_equal(assigner.edgecut, metrics.edgecut)
+        nose.tools.assert_equal(assigner.total_edge_weight,
+                                H.number_of_edges())
+        nose.tools.assert_almost_equal(assigner.imbalance,
+                                       metrics.imbalance[0])
+        nose.tools.assert_true(assigner.imbalance <= 1.03)
+        # Stale entries of the parts by load are dropped
+        nose.tools.assert_less_equal(len(assigner._heap), 16)
@@ -1,9 +1,269 @@
+import itertools
 import numbers
+import operator
+
+import networkx as nx
+import numpy
 
 from nxmetis import enums
 from nxmetis import metis
 
-__all__ = ['MetisOptions']
+__all__ = ['MetisGraph', 'MetisMetrics', 'MetisOptions', 'MetisStats']
+
+
+def _convert_graph(G, node_weight=None, node_size=None, edge_weight=None):
+    """Convert a graph to the numbered adjacency list structure expected by
+    METIS, together with its node and edge weights.
+
+    The graph is traversed once, and the per-node and per-edge work is left to
+    C-level iterators feeding NumPy arrays.
+
+    Parameters
+    ----------
+    G : NetworkX graph
+        A graph.
+
+    node_weight, node_size, edge_weight : object, optional
+        The data keys used to determine the weights and sizes of nodes and the
+        weights of edges. If None, the corresponding array is not built.
+        ``node_weight`` may also be a list of data keys or an array, as
+        described in :class:`MetisGraph`.
+
+    Returns
+    -------
+    xadj, adjncy : NumPy arrays
+        Adjacency structure of the graph, of the data type selected by
+        :func:`nxmetis.metis.idx_dtype` for its size.
+
+    vwgt, vsize, adjwgt : NumPy arrays or None
+        Node weights, node sizes and edge weights, or None if the data key is
+        None or all values are one. Node weights with several constraints are
+        returned as a two-dimensional array with one row per node.
+    """
+    n = len(G)
+    index = dict(zip(G, range(n)))
+    nbrs = list(map(G._adj.__getitem__, G))
+
+    degrees = numpy.fromiter(map(len, nbrs), numpy.intp, n)
+    dtype = metis.idx_dtype(max(n + 1, int(degrees.sum())))
+    xadj = numpy.zeros(n + 1, dtype=dtype)
+    numpy.cumsum(degrees, out=xadj[1:])
+    adjncy = numpy.fromiter(
+        map(index.__getitem__, itertools.chain.from_iterable(nbrs)),
+        dtype, xadj[-1])
+
+    vwgt = vsize = adjwgt = None
+    if node_weight is not None or node_size is not None:
+        data = list(map(G._node.__getitem__, G))
+        if isinstance(node_weight, numpy.ndarray):
+            vwgt = _check_node_weights(node_weight, n)
+        elif isinstance(node_weight, list):
+            # One row per node, built with one C-level pass per constraint.
+            vwgt = _check_node_weights(numpy.array(
+                [list(map(operator.methodcaller('get', key, 1), data))
+                 for key in node_weight]).T, n)
+        elif node_weight is not None:
+            vwgt = _convert_weights(
+                map(operator.methodcaller('get', node_weight, 1), data))
+        if node_size is not None:
+            vsize = _convert_weights(
+                map(operator.methodcaller('get', node_size, 1), data))
+    if edge_weight is not None:
+        adjwgt = _convert_weights(
+            map(operator.methodcaller('get', edge_weight, 1),
+                itertools.chain.from_iterable(
+                    map(operator.methodcaller('values'), nbrs))))
+
+    return xadj, adjncy, vwgt, vsize, adjwgt
+
+
+def _check_node_weights(vwgt, n):
+    """Check the shape and type of an array of node weights with one or more
+    constraints, and return it C-contiguous.
+    """
+    if vwgt.dtype.kind not in 'biu' and vwgt.size != 0:
+        raise TypeError('weights are not ints')
+    if vwgt.ndim not in (1, 2) or len(vwgt) != n:
+        raise ValueError('node weights are not of shape (n,) or (n, ncon)')
+    if vwgt.ndim == 2 and vwgt.shape[1] == 0:
+        raise ValueError('node weights have no constraints')
+    return numpy.ascontiguousarray(vwgt)
+
+
+def _convert_weights(weights):
+    """Convert an iterable of integer weights to a NumPy array, or None if all
+    weights are one.
+    """
+    weights = numpy.array(list(weights))
+    if weights.dtype.kind not in 'biu' and weights.size != 0:
+        raise TypeError('weights are not ints')
+    if (weights == 1).all():
+        return None
+    return weights
+
+
+def _idx_arrays(xadj, adjncy, *weights):
+    """Convert the adjacency structure and the weights of a graph to NumPy
+    arrays of the data type of idx_t in the build of METIS that handles it,
+    without copying arrays that already have it.
+    """
+    dtype = metis.idx_dtype(max(len(xadj), len(adjncy)), weights,
+                            (xadj, adjncy))
+    return [None if array is None else numpy.asarray(array, dtype)
+            for array in (xadj, adjncy) + weights]
+
+
+class MetisGraph(object):
+    """A graph converted once to the adjacency structure expected by METIS.
+
+    A MetisGraph can be passed to :func:`nxmetis.partition`,
+    :func:`nxmetis.node_nested_dissection` and
+    :func:`nxmetis.vertex_separator` in place of the NetworkX graph it was
+    built from, so that repeated calls on the same graph skip validation,
+    conversion and self-loop removal.
+    """
+
+    def __init__(self, G, node_weight='weight', node_size='size',
+                 edge_weight='weight'):
+        """Initializes a MetisGraph object.
+
+        Parameters
+        ----------
+        G : NetworkX graph
+            An undirected graph.
+
+        node_weight : object, list or NumPy array, optional
+            The data key used to determine the weight of each node. If None,
+            each node has unit weight. For partitioning with several
+            balancing constraints, a list of data keys, one per constraint,
+            or an array of shape ``(n, ncon)`` whose rows are the
+            weights of the nodes in the order of ``G``. Missing data values
+            count as one. Default value: 'weight'.
+
+        node_size : object, optional
+            The data key used to determine the size of each node when
+            computing the total communication volume. If None, each node has
+            unit size. Default value: 'size'.
+
+        edge_weight : object, optional
+            The data key used to determine the weight of each edge. If None,
+            each edge has unit weight. Default value: 'weight'.
+
+        Raises
+        ------
+        NetworkXNotImplemented
+            If the graph is directed or is a multigraph.
+
+        Example
+        -------
+        >>> G = MetisGraph(nx.cycle_graph(16))
+        >>> cuts = [nxmetis.partition(G, k)[0] for k in range(2, 5)]
+
+        """
+        if G.is_directed():
+            raise nx.NetworkXNotImplemented(
+                'not implemented for directed type')
+        if G.is_multigraph():
+            raise nx.NetworkXNotImplemented(
+                'not implemented for multigraph type')
+
+        self.nodes = list(G)
+        xadj, adjncy, vwgt, vsize, adjwgt = _convert_graph(
+            G, node_weight, node_size, edge_weight)
+        if self.nodes:
+            xadj, adjncy, adjwgt = metis.convert_graph(xadj, adjncy, adjwgt)
+        arrays = _idx_arrays(xadj, adjncy, vwgt, vsize, adjwgt)
+        for array in arrays:
+            if array is not None:
+                array.flags.writeable = False
+        self.xadj, self.adjncy, self.vwgt, self.vsize, self.adjwgt = arrays
+
+    @classmethod
+    def from_arrays(cls, xadj, adjncy, vwgt=None, vsize=None, adjwgt=None,
+                    nodes=None):
+        """Create a MetisGraph directly from its adjacency structure.
+
+        Arrays that already hold contiguous integers of the type returned by
+        :func:`nxmetis.metis.idx_dtype` for the graph (for instance, NumPy
+        memory maps of files on disk) are used as they are, so graphs too
+        large to be held as NetworkX graphs can still be partitioned.
+
+        Parameters
+        ----------
+        xadj, adjncy : array-like of ints
+            Adjacency structure of the graph, with zero-based numbering. Both
+            directions of each edge must be present.
+
+        vwgt, vsize : array-like of ints, optional
+            Node weights and node sizes. Node weights with several balancing
+            constraints are given as a two-dimensional array with one row per
+            node. If None, each node has unit weight and size. Default value:
+            None.
+
+        adjwgt : array-like of ints, optional
+            Edge weights, in the same order as `adjncy`. If None, each edge
+            has unit weight. Default value: None.
+
+        nodes : sequence, optional
+            Nodes labelling the vertices, in order. If None, the vertices are
+            labelled by the integers from 0 to `len(xadj) - 2`. Default value:
+            None.
+
+        Raises
+        ------
+        ValueError
+            If the adjacency structure is inconsistent.
+
+        Example
+        -------
+        >>> G = MetisGraph.from_arrays([0, 1, 3, 4], [1, 0, 2, 1])
+        >>> objval, parts = nxmetis.partition(G, 2)
+
+        """
+        xadj, adjncy, adjwgt = metis.convert_graph(xadj, adjncy, adjwgt)
+        nvtxs = len(xadj) - 1
+        if nodes is None:
+            nodes = range(nvtxs)
+        elif len(nodes) != nvtxs:
+            raise ValueError('len(nodes) != len(xadj) - 1')
+        for name, array in [('vwgt', vwgt), ('vsize', vsize)]:
+            if array is not None and len(array) != nvtxs:
+                raise ValueError('len({0}) != len(xadj) - 1'.format(name))
+        # Read-only views leave the flags of the caller's arrays untouched.
+        arrays = []
+        for array in _idx_arrays(xadj, adjncy, vwgt, vsize, adjwgt):
+            if array is not None:
+                array = array.view()
+                array.flags.writeable = False
+            arrays.append(array)
+
+        self = cls.__new__(cls)
+        self.nodes = nodes
+        self.xadj, self.adjncy, self.vwgt, self.vsize, self.adjwgt = arrays
+        return self
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def is_directed(self):
+        return False
+
+    def is_multigraph(self):
+        return False
+
+    def __repr__(self):
+        return '{0}(nvtxs={1}, nedges={2})'.format(
+            self.__class__.__name__, len(self.nodes), len(self.adjncy) // 2)
+
+
+def _convert_bool(value):
+    """Convert an option value to a bool, keeping -1, which tells METIS to use
+    its default.
+    """
+    return -1 if value == -1 else bool(value)
 
 
 class MetisOptions(object):
@@ -169,7 +429,7 @@ class MetisOptions(object):
 
     @minconn.setter
     def minconn(self, value):
-        self._minconn = bool(value)
+        self._minconn = _convert_bool(value)
 
     @property
     def no2hop(self):
@@ -178,7 +438,7 @@ class MetisOptions(object):
 
     @no2hop.setter
     def no2hop(self, value):
-        self._no2hop = bool(value)
+        self._no2hop = _convert_bool(value)
 
     @property
     def contig(self):
@@ -187,7 +447,7 @@ class MetisOptions(object):
 
     @contig.setter
     def contig(self, value):
-        self._contig = bool(value)
+        self._contig = _convert_bool(value)
 
     @property
     def compress(self):
@@ -196,7 +456,7 @@ class MetisOptions(object):
 
     @compress.setter
     def compress(self, value):
-        self._compress = bool(value)
+        self._compress = _convert_bool(value)
 
     @property
     def ccorder(self):
@@ -205,7 +465,7 @@ class MetisOptions(object):
 
     @ccorder.setter
     def ccorder(self, value):
-        self._ccorder = bool(value)
+        self._ccorder = _convert_bool(value)
 
     @property
     def pfactor(self):
@@ -267,3 +527,141 @@ class MetisOptions(object):
             self.__class__.__name__,
             ', '.join('{0}={1}'.format(name, repr(getattr(self, name)))
                       for name in names))
+
+
+class MetisStats(object):
+    """Statistics of a METIS run.
+
+    A MetisStats object passed as the ``stats`` argument of
+    :func:`nxmetis.partition`, :func:`nxmetis.node_nested_dissection` or
+    :func:`nxmetis.vertex_separator` is filled with the statistics of the run.
+    The times are CPU seconds spent by the calling thread in each phase of the
+    multilevel paradigm. ``vars(stats)`` gives them as a dict.
+
+    Attributes
+    ----------
+    total_time : float
+        Time spent in the multilevel algorithm.
+
+    coarsening_time : float
+        Time spent coarsening the graph, including matching and contraction.
+
+    matching_time, contraction_time : float
+        Time spent computing matchings and contracting the graph.
+
+    initial_partition_time : float
+        Time spent partitioning the coarsest graph.
+
+    uncoarsening_time : float
+        Time spent uncoarsening the graph, including refinement and
+        projection.
+
+    refinement_time, projection_time : float
+        Time spent refining the partitions and projecting them to finer
+        graphs.
+
+    splitting_time : float
+        Time spent splitting graphs in recursive bisection and nested
+        dissection.
+
+    peak_memory : int
+        Maximum number of bytes allocated by METIS at any time.
+
+    coarsenings : int
+        Number of times a graph was coarsened. Recursive bisection and nested
+        dissection coarsen each subgraph they bisect.
+
+    coarsening_levels : int
+        Maximum number of levels of a coarsening.
+    """
+
+    def __init__(self):
+        """Initializes a MetisStats object with all statistics set to zero.
+        """
+        self.total_time = 0.0
+        self.coarsening_time = 0.0
+        self.matching_time = 0.0
+        self.contraction_time = 0.0
+        self.initial_partition_time = 0.0
+        self.uncoarsening_time = 0.0
+        self.refinement_time = 0.0
+        self.projection_time = 0.0
+        self.splitting_time = 0.0
+        self.peak_memory = 0
+        self.coarsenings = 0
+        self.coarsening_levels = 0
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, ', '.join(
+            '{0}={1!r}'.format(key, value)
+            for key, value in sorted(vars(self).items())))
+
+
+class MetisMetrics(object):
+    """Quality metrics of a partitioning.
+
+    A MetisMetrics object is returned by :func:`nxmetis.evaluate`, or passed
+    as the ``metrics`` argument of :func:`nxmetis.partition` to be filled
+    with the metrics of the partitioning found. The metrics are computed in a
+    single pass over the adjacency structure of the graph.
+
+    Attributes
+    ----------
+    edgecut : int
+        Total weight of the edges between parts.
+
+    volume : int
+        Total communication volume: the sum over the nodes of their sizes
+        times the number of other parts among their neighbors.
+
+    part_weights : NumPy array
+        Weights of the parts, of shape ``(nparts, ncon)`` with one column per
+        balancing constraint.
+
+    imbalance : list of floats
+        Load imbalance of each constraint: the largest ratio of the weight of
+        a part to its target weight.
+
+    boundary : NumPy array
+        Number of nodes of each part with neighbors in other parts.
+
+    connectivity : tuple of three NumPy arrays
+        The subdomain graph ``(xadj, adjncy, adjwgt)``, in the compressed
+        sparse row format of :class:`MetisGraph`: the parts adjacent to part
+        `i` are ``adjncy[xadj[i]:xadj[i + 1]]`` in increasing order, and the
+        total weights of the edges to them are the matching entries of
+        ``adjwgt``. Its size grows with the number of pairs of adjacent parts,
+        not with the square of the number of parts; see
+        :meth:`connectivity_matrix` for the dense form.
+    """
+
+    def __init__(self):
+        """Initializes a MetisMetrics object with all metrics set to zero.
+        """
+        self.edgecut = 0
+        self.volume = 0
+        self.part_weights = None
+        self.imbalance = []
+        self.boundary = None
+        self.connectivity = None
+
+    def __repr__(self):
+        return '{0}(edgecut={1}, volume={2}, imbalance={3})'.format(
+            self.__class__.__name__, self.edgecut, self.volume,
+            self.imbalance)
+
+    def connectivity_matrix(self):
+        """Return the total weights of the edges between each pair of parts.
+
+        Returns
+        -------
+        matrix : NumPy array
+            A symmetric matrix of shape ``(nparts, nparts)`` with a zero
+            diagonal. It takes memory quadratic in the number of parts.
+        """
+        xadj, adjncy, adjwgt = self.connectivity
+        nparts = len(xadj) - 1
+        matrix = numpy.zeros((nparts, nparts), dtype=adjwgt.dtype)
+        rows = numpy.repeat(numpy.arange(nparts), numpy.diff(xadj))
+        matrix[rows, adjncy] = adjwgt
+        return matrix
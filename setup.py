@@ -7,6 +7,8 @@ import os
 import sys
 
 from setuptools import setup, Extension
+from setuptools.command.build_clib import build_clib as _build_clib
+from setuptools.command.build_ext import build_ext as _build_ext
 from Cython.Build import cythonize
 
 if sys.argv[-1] == 'setup.py':
@@ -22,17 +24,66 @@ if sys.version_info[:2] < (2, 7):
 libraries = [
     ('gklib', {'sources': glob('src/GKlib/*.c') + glob('src/GKlib/*.cc'),
                'depends': glob('src/GKlib/*.h'),
-               'include_dirs': ['src/GKlib']}),
+               'include_dirs': ['src/GKlib'],
+               # Use the thread-local random number generator of GKlib
+               'macros': [('USE_GKRAND', None)]}),
     ('metis', {'sources': glob('src/libmetis/*.c') + glob('src/libmetis/*.cc'),
-               'depends': glob('src/libmetis/*.h'),
-               'include_dirs': ['src/GKlib', 'src/libmetis']})]
+               'depends': glob('src/GKlib/*.h') + glob('src/libmetis/*.h'),
+               'include_dirs': ['src/GKlib', 'src/libmetis']}),
+    # METIS with 32-bit idx_t, for graphs whose sizes and weights fit
+    ('metis32', {'sources': glob('src/libmetis/*.c') +
+                            glob('src/libmetis/*.cc'),
+                 'depends': glob('src/GKlib/*.h') + glob('src/libmetis/*.h'),
+                 'include_dirs': ['src/GKlib', 'src/libmetis'],
+                 'macros': [('IDXTYPEWIDTH', '32')]})]
+
+
+class build_clib(_build_clib):
+    """Compile the objects of each library in a directory of its own, since
+    metis and metis32 are built from the same sources with different macros.
+    """
+
+    def build_libraries(self, libraries):
+        build_temp = self.build_temp
+        try:
+            for lib_name, build_info in libraries:
+                # Without a directory per library, the objects of metis32
+                # would overwrite those of metis, which have the same names,
+                # and libmetis.a would be archived with 32-bit objects.
+                self.build_temp = os.path.join(build_temp, lib_name)
+                _build_clib.build_libraries(self, [(lib_name, build_info)])
+        finally:
+            self.build_temp = build_temp
+
+
+class build_ext(_build_ext):
+    """Link each extension only with the libraries it lists.
+
+    build_ext adds all the libraries built by build_clib to every extension,
+    which would link _metis with metis32 and _metis32 with metis. Both define
+    the same METIS symbols with different widths of idx_t, so the wrong ones
+    could be picked.
+    """
+
+    def build_extensions(self):
+        clib_names = set(
+            self.get_finalized_command('build_clib').get_library_names()
+            or [])
+        self.compiler.set_libraries([lib for lib in self.compiler.libraries
+                                     if lib not in clib_names])
+        _build_ext.build_extensions(self)
+
 
 ext_modules = cythonize(
     [Extension('nxmetis._metis', ['nxmetis/_metis.pyx'],
                include_dirs=['src/GKlib', 'src/libmetis'],
-               libraries=['metis', 'gklib'])])
+               libraries=['metis', 'gklib']),
+     Extension('nxmetis._metis32', ['nxmetis/_metis32.pyx'],
+               include_dirs=['src/GKlib', 'src/libmetis'],
+               define_macros=[('IDXTYPEWIDTH', '32')],
+               libraries=['metis32', 'gklib'])])
 
-install_requires = ['networkx', 'decorator', 'six']
+install_requires = ['networkx', 'numpy', 'decorator', 'six']
 
 if sys.version_info[:2] < (3, 4):
     install_requires.append('enum34')
@@ -60,6 +111,8 @@ if __name__ == "__main__":
                               'Programming Language :: Python :: 3.4',],
         packages           = ['nxmetis', 'nxmetis.tests'],
         libraries          = libraries,
+        cmdclass           = {'build_clib': build_clib,
+                              'build_ext': build_ext},
         ext_modules        = ext_modules,
         install_requires   = install_requires,
         test_suite         = 'nose.collector',
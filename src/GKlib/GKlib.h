@@ -70,6 +70,10 @@
 
 #include <gk_proto.h>
 
+/* Route all output through the per-thread capture buffers */
+#include <gk_capture.h>
+#define printf gk_printf
+
 
 #endif  /* GKlib.h */
 
@@ -0,0 +1,100 @@
+/*!
+\file  capture.c
+\brief Per-thread capture of the output written through gk_printf()
+*/
+
+#include <GKlib.h>
+
+
+typedef struct {
+  int active;
+  char *buf;
+  size_t len;
+  size_t size;
+} gk_capture_t;
+
+static __thread gk_capture_t gk_capture = {0, NULL, 0, 0};
+
+
+/*************************************************************************/
+/*! Starts capturing the output of gk_printf() in the calling thread.
+    Output captured by an earlier call that has not been ended is discarded.
+ */
+/*************************************************************************/
+void gk_capture_begin(void)
+{
+  free(gk_capture.buf);
+  gk_capture.buf    = NULL;
+  gk_capture.len    = 0;
+  gk_capture.size   = 0;
+  gk_capture.active = 1;
+}
+
+
+/*************************************************************************/
+/*! Stops capturing the output of gk_printf() in the calling thread.
+    \returns the captured output, which must be freed with free(), or NULL
+             if there was none. Its length is stored in *size.
+ */
+/*************************************************************************/
+char *gk_capture_end(size_t *size)
+{
+  char *buf = gk_capture.buf;
+
+  *size = gk_capture.len;
+
+  gk_capture.buf    = NULL;
+  gk_capture.len    = 0;
+  gk_capture.size   = 0;
+  gk_capture.active = 0;
+
+  return buf;
+}
+
+
+/*************************************************************************/
+/*! A printf() that appends to the buffer of the calling thread while a
+    capture is active, and writes to stdout otherwise. Output that does not
+    fit in memory is dropped.
+ */
+/*************************************************************************/
+int gk_printf(const char *format, ...)
+{
+  va_list argp, argq;
+  int n;
+  size_t size;
+  char *buf;
+
+  va_start(argp, format);
+  if (!gk_capture.active) {
+    n = vprintf(format, argp);
+    va_end(argp);
+    return n;
+  }
+
+  va_copy(argq, argp);
+  n = vsnprintf(NULL, 0, format, argq);
+  va_end(argq);
+
+  if (n > 0) {
+    if (gk_capture.len + n + 1 > gk_capture.size) {
+      size = 2*gk_capture.size;
+      if (size < gk_capture.len + n + 1)
+        size = gk_capture.len + n + 1;
+      if (size < 256)
+        size = 256;
+      buf = (char *)realloc(gk_capture.buf, size);
+      if (buf == NULL) {
+        va_end(argp);
+        return n;
+      }
+      gk_capture.buf  = buf;
+      gk_capture.size = size;
+    }
+    vsnprintf(gk_capture.buf+gk_capture.len, n+1, format, argp);
+    gk_capture.len += n;
+  }
+  va_end(argp);
+
+  return n;
+}
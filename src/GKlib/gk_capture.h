@@ -0,0 +1,20 @@
+/*!
+\file  gk_capture.h
+\brief Per-thread capture of the output written through gk_printf()
+
+The output of GKlib and METIS is redirected through gk_printf(). While a
+capture is active for the calling thread, it is appended to a private buffer
+instead of being written to stdout, so that concurrent callers neither see
+each other's output nor touch the process-wide stdout.
+*/
+
+#ifndef _GK_CAPTURE_H_
+#define _GK_CAPTURE_H_
+
+#include <stddef.h>
+
+void gk_capture_begin(void);
+char *gk_capture_end(size_t *size);
+int gk_printf(const char *format, ...);
+
+#endif
@@ -61,10 +61,11 @@ GK_MKRANDOM(gk_z,   size_t, ssize_t)
 #define LM 0x7FFFFFFFULL /* Least significant 31 bits */
 
 
-/* The array for the state vector */
-static uint64_t mt[NN]; 
+/* The array for the state vector, kept per thread so that concurrent
+   callers each get their own reproducible sequence */
+static __thread uint64_t mt[NN]; 
 /* mti==NN+1 means mt[NN] is not initialized */
-static int mti=NN+1; 
+static __thread int mti=NN+1; 
 #endif /* USE_GKRAND */
 
 /* initializes mt[NN] with a seed */
@@ -7,6 +7,12 @@
 \version\verbatim $Id: timers.c 10711 2011-08-31 22:23:04Z karypis $ \endverbatim
 */
 
+#ifdef __linux__
+/* Get RUSAGE_THREAD to be defined. */
+#define _GNU_SOURCE
+#include <sys/resource.h>
+#undef _GNU_SOURCE
+#endif
 
 #include <GKlib.h>
 
@@ -44,7 +50,13 @@ double gk_CPUSeconds(void)
   #else
     struct rusage r;
 
+    /* Time the calling thread only, so that concurrent runs do not count
+       each other's CPU time */
+    #ifdef RUSAGE_THREAD
+    getrusage(RUSAGE_THREAD, &r);
+    #else
     getrusage(RUSAGE_SELF, &r);
+    #endif
     return ((r.ru_utime.tv_sec + r.ru_stime.tv_sec) + 1.0e-6*(r.ru_utime.tv_usec + r.ru_stime.tv_usec));
   #endif
 #endif
@@ -70,6 +70,8 @@ graph_t *CoarsenGraph(ctrl_t *ctrl, graph_t *graph)
            graph->nvtxs < COARSEN_FRACTION*graph->finer->nvtxs && 
            graph->nedges > graph->nvtxs/2);
 
+  RecordCoarsening(level);
+
   IFSET(ctrl->dbglvl, METIS_DBG_COARSEN, PrintCGraphStats(ctrl, graph));
   IFSET(ctrl->dbglvl, METIS_DBG_TIME, gk_stopcputimer(ctrl->CoarsenTmr));
 
@@ -130,10 +132,14 @@ graph_t *CoarsenGraphNlevels(ctrl_t *ctrl, graph_t *graph, idx_t nlevels)
 
     if (graph->nvtxs < ctrl->CoarsenTo || 
         graph->nvtxs > COARSEN_FRACTION*graph->finer->nvtxs || 
-        graph->nedges < graph->nvtxs/2)
+        graph->nedges < graph->nvtxs/2) {
+      level++;
       break; 
+    }
   } 
 
+  RecordCoarsening(level);
+
   IFSET(ctrl->dbglvl, METIS_DBG_COARSEN, PrintCGraphStats(ctrl, graph));
   IFSET(ctrl->dbglvl, METIS_DBG_TIME, gk_stopcputimer(ctrl->CoarsenTmr));
 
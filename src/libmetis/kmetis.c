@@ -88,6 +88,112 @@ SIGTHROW:
 }
 
 
+/*************************************************************************/
+/*! This function refines a given k-way partitioning of a graph with the 
+    k-way refinement of the finest level only, without coarsening the graph.
+    It is used to repartition graphs that changed little since they were 
+    partitioned, so that most vertices keep their parts.
+
+    \param part is the partitioning to refine on input, and the refined 
+           partitioning on return.
+*/
+/*************************************************************************/
+int METIS_RefineGraphKway(idx_t *nvtxs, idx_t *ncon, idx_t *xadj, idx_t *adjncy, 
+          idx_t *vwgt, idx_t *vsize, idx_t *adjwgt, idx_t *nparts, 
+          real_t *tpwgts, real_t *ubvec, idx_t *options, idx_t *objval, 
+          idx_t *part)
+{
+  int sigrval=0, renumber=0;
+  idx_t i;
+  graph_t *graph;
+  ctrl_t *ctrl;
+
+  /* set up malloc cleaning code and signal catchers */
+  if (!gk_malloc_init()) 
+    return METIS_ERROR_MEMORY;
+
+  gk_sigtrap();
+
+  if ((sigrval = gk_sigcatch()) != 0)
+    goto SIGTHROW;
+
+
+  /* set up the run parameters */
+  ctrl = SetupCtrl(METIS_OP_KMETIS, options, *ncon, *nparts, tpwgts, ubvec);
+  if (!ctrl) {
+    gk_siguntrap();
+    return METIS_ERROR_INPUT;
+  }
+
+  /* if required, change the numbering to 0 */
+  if (ctrl->numflag == 1) {
+    Change2CNumbering(*nvtxs, xadj, adjncy);
+    for (i=0; i<*nvtxs; i++)
+      part[i]--;
+    renumber = 1;
+  }
+
+  for (i=0; i<*nvtxs; i++) {
+    if (part[i] < 0 || part[i] >= *nparts)
+      gk_errexit(SIGERR, "METIS Error: part[%"PRIDX"] is not a valid part.\n", i);
+  }
+
+  /* set up the graph */
+  graph = SetupGraph(ctrl, *nvtxs, *ncon, xadj, adjncy, vwgt, vsize, adjwgt);
+
+  /* set up multipliers for making balance computations easier */
+  SetupKWayBalMultipliers(ctrl, graph);
+
+  /* take care contiguity requests for disconnected graphs */
+  if (ctrl->contig && !IsConnected(graph, 0)) 
+    gk_errexit(SIGERR, "METIS Error: A contiguous partition is requested for a non-contiguous input graph.\n");
+    
+  /* allocate workspace memory */  
+  AllocateWorkSpace(ctrl, graph);
+
+  /* start the refinement */
+  IFSET(ctrl->dbglvl, METIS_DBG_TIME, InitTimers(ctrl));
+  IFSET(ctrl->dbglvl, METIS_DBG_TIME, gk_startcputimer(ctrl->TotalTmr));
+
+  AllocateKWayPartitionMemory(ctrl, graph);
+  icopy(graph->nvtxs, part, graph->where);
+  AllocateRefinementWorkSpace(ctrl, 2*graph->nedges);
+
+  RefineKWay(ctrl, graph, graph);
+
+  switch (ctrl->objtype) {
+    case METIS_OBJTYPE_CUT:
+      *objval = graph->mincut;
+      break;
+
+    case METIS_OBJTYPE_VOL:
+      *objval = graph->minvol;
+      break;
+
+    default:
+      gk_errexit(SIGERR, "Unknown objtype: %d\n", ctrl->objtype);
+  }
+  icopy(graph->nvtxs, graph->where, part);
+
+  IFSET(ctrl->dbglvl, METIS_DBG_TIME, gk_stopcputimer(ctrl->TotalTmr));
+  IFSET(ctrl->dbglvl, METIS_DBG_TIME, PrintTimers(ctrl));
+
+  /* clean up */
+  FreeGraph(&graph);
+  FreeCtrl(&ctrl);
+
+SIGTHROW:
+  /* if required, change the numbering back to 1 */
+  if (renumber)
+    Change2FNumbering(*nvtxs, xadj, adjncy, part);
+
+  gk_siguntrap();
+  gk_malloc_cleanup(0);
+
+  return metis_rcode(sigrval);
+}
+
+
 /*************************************************************************/
 /*! This function computes a k-way partitioning of a graph that minimizes
     the specified objective function.
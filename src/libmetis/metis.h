@@ -30,7 +30,9 @@
  GCC does provides these definitions in stdint.h, but it may require some
  modifications on other architectures.
 --------------------------------------------------------------------------*/
-#define IDXTYPEWIDTH 64
+#ifndef IDXTYPEWIDTH
+  #define IDXTYPEWIDTH 64
+#endif
 
 
 /*--------------------------------------------------------------------------
@@ -192,6 +194,11 @@ METIS_API(int) METIS_PartGraphKway(idx_t *nvtxs, idx_t *ncon, idx_t *xadj,
                   idx_t *nparts, real_t *tpwgts, real_t *ubvec, idx_t *options, 
                   idx_t *edgecut, idx_t *part);
 
+METIS_API(int) METIS_RefineGraphKway(idx_t *nvtxs, idx_t *ncon, idx_t *xadj, 
+                  idx_t *adjncy, idx_t *vwgt, idx_t *vsize, idx_t *adjwgt, 
+                  idx_t *nparts, real_t *tpwgts, real_t *ubvec, idx_t *options, 
+                  idx_t *objval, idx_t *part);
+
 METIS_API(int) METIS_MeshToDual(idx_t *ne, idx_t *nn, idx_t *eptr, idx_t *eind, 
                   idx_t *ncommon, idx_t *numflag, idx_t **r_xadj, idx_t **r_adjncy);
 
@@ -210,6 +217,10 @@ METIS_API(int) METIS_PartMeshDual(idx_t *ne, idx_t *nn, idx_t *eptr, idx_t *eind
 METIS_API(int) METIS_NodeND(idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt,
                   idx_t *options, idx_t *perm, idx_t *iperm);
 
+METIS_API(int) METIS_NodeNDTree(idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, 
+                  idx_t *vwgt, idx_t *options, idx_t *perm, idx_t *iperm, 
+                  idx_t *r_nnodes, idx_t **r_tree);
+
 METIS_API(int) METIS_Free(void *ptr);
 
 METIS_API(int) METIS_SetDefaultOptions(idx_t *options);
@@ -22,6 +22,7 @@
 
 
 #include <metis.h>
+#include <runstats.h>
 #include <rename.h>
 #include <gklib_defs.h>
 
@@ -16,6 +16,119 @@
 #include "metislib.h"
 
 
+/* The separator tree of the nested dissection of each thread. Each node is
+   stored as four idx_t's: the positions first, sep and last in the ordering
+   and the index of its parent. The subtree of the node is ordered in
+   [first, last) and its own vertices (the separator, or all of the vertices of
+   a leaf) in [sep, last). Nodes are recorded in pre-order, so parents come
+   before their children. The nodes are only recorded by METIS_NodeNDTree(). */
+static __thread struct {
+  int active;        /*!< Whether the nodes are recorded */
+  int failed;        /*!< Whether the nodes could not be allocated */
+  idx_t nnodes;      /*!< The # of nodes recorded */
+  idx_t maxnodes;    /*!< The # of nodes allocated */
+  idx_t parent;      /*!< The node of the graph being dissected */
+  idx_t *nodes;      /*!< The nodes, allocated with realloc() */
+} septree;
+
+
+/*************************************************************************/
+/*! This function records a node of the separator tree as a child of the
+    current node and makes it the current node. It returns the previous
+    current node, to be restored by SepTreePop(). */
+/*************************************************************************/
+static idx_t SepTreePush(idx_t first, idx_t sep, idx_t last)
+{
+  idx_t parent=septree.parent, *nodes;
+
+  if (!septree.active || septree.failed || first == last)
+    return parent;
+
+  if (septree.nnodes == septree.maxnodes) {
+    nodes = (idx_t *)realloc(septree.nodes, 
+                sizeof(idx_t)*4*(2*septree.maxnodes+16));
+    if (nodes == NULL) {
+      septree.failed = 1;
+      return parent;
+    }
+    septree.nodes    = nodes;
+    septree.maxnodes = 2*septree.maxnodes+16;
+  }
+
+  nodes = septree.nodes + 4*septree.nnodes;
+  nodes[0] = first;
+  nodes[1] = sep;
+  nodes[2] = last;
+  nodes[3] = parent;
+  septree.parent = septree.nnodes++;
+
+  return parent;
+}
+
+
+/*************************************************************************/
+/*! This function restores the current node of the separator tree. */
+/*************************************************************************/
+static void SepTreePop(idx_t parent)
+{
+  septree.parent = parent;
+}
+
+
+/*************************************************************************/
+/*! This function maps the positions in the separator tree from the ordering
+    of a compressed graph to the ordering of the original graph. */
+/*************************************************************************/
+static void SepTreeUncompress(idx_t nnvtxs, idx_t *perm, idx_t *cptr)
+{
+  idx_t i, ii, *pos;
+
+  if (!septree.active || septree.failed)
+    return;
+
+  pos = imalloc(nnvtxs+1, "SepTreeUncompress: pos");
+  pos[0] = 0;
+  for (ii=0; ii<nnvtxs; ii++) {
+    i = perm[ii];
+    pos[ii+1] = pos[ii] + cptr[i+1] - cptr[i];
+  }
+
+  for (i=0; i<septree.nnodes; i++) {
+    septree.nodes[4*i]   = pos[septree.nodes[4*i]];
+    septree.nodes[4*i+1] = pos[septree.nodes[4*i+1]];
+    septree.nodes[4*i+2] = pos[septree.nodes[4*i+2]];
+  }
+
+  gk_free((void **)&pos, LTERM);
+}
+
+
+/*************************************************************************/
+/*! This function adds a root to the separator tree for the pruned vertices,
+    which are ordered last. */
+/*************************************************************************/
+static void SepTreeAddPruned(idx_t nnvtxs, idx_t nvtxs)
+{
+  idx_t i, nnodes=septree.nnodes;
+
+  if (!septree.active || septree.failed || nnvtxs == nvtxs)
+    return;
+
+  SepTreePush(0, nnvtxs, nvtxs);
+  if (septree.failed)
+    return;
+
+  /* move the new root in front of the other nodes */
+  memmove(septree.nodes+4, septree.nodes, sizeof(idx_t)*4*nnodes);
+  septree.nodes[0] = 0;
+  septree.nodes[1] = nnvtxs;
+  septree.nodes[2] = nvtxs;
+  septree.nodes[3] = -1;
+  for (i=1; i<=nnodes; i++)
+    septree.nodes[4*i+3]++;
+}
+
+
 /*************************************************************************/
 /*! This function is the entry point for the multilevel nested dissection 
     ordering code. At each bisection, a node-separator is computed using
@@ -135,6 +248,7 @@ int METIS_NodeND(idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt,
       iperm[piperm[i]] = perm[i];
     for (i=nnvtxs; i<*nvtxs; i++)
       iperm[piperm[i]] = i;
+    SepTreeAddPruned(nnvtxs, *nvtxs);
 
     gk_free((void **)&piperm, LTERM);
   }
@@ -142,6 +256,7 @@ int METIS_NodeND(idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt,
     /* construct perm from iperm */
     for (i=0; i<nnvtxs; i++)
       perm[iperm[i]] = i; 
+    SepTreeUncompress(nnvtxs, perm, cptr);
     for (l=ii=0; ii<nnvtxs; ii++) {
       i = perm[ii];
       for (j=cptr[i]; j<cptr[i+1]; j++)
@@ -172,6 +287,51 @@ SIGTHROW:
 }
 
 
+/*************************************************************************/
+/*! This function is similar to METIS_NodeND, and also returns the separator
+    tree of the nested dissection.
+
+    \param r_nnodes is set to the number of nodes of the tree.
+    \param r_tree is set to an array of 4*(*r_nnodes) idx_t's, to be freed
+           with METIS_Free, storing the positions first, sep and last in the
+           ordering and the parent of each node, in pre-order. The subtree
+           of a node is ordered in [first, last) and its own vertices in
+           [sep, last). The parent of the root is -1. The positions start
+           from 0 regardless of the numbering.
+*/
+/*************************************************************************/
+int METIS_NodeNDTree(idx_t *nvtxs, idx_t *xadj, idx_t *adjncy, idx_t *vwgt,
+          idx_t *options, idx_t *perm, idx_t *iperm, idx_t *r_nnodes, 
+          idx_t **r_tree) 
+{
+  int rstatus;
+
+  septree.active   = 1;
+  septree.failed   = 0;
+  septree.nnodes   = 0;
+  septree.maxnodes = 0;
+  septree.parent   = -1;
+  septree.nodes    = NULL;
+
+  rstatus = METIS_NodeND(nvtxs, xadj, adjncy, vwgt, options, perm, iperm);
+
+  septree.active = 0;
+  if (rstatus == METIS_OK && septree.failed)
+    rstatus = METIS_ERROR_MEMORY;
+  if (rstatus != METIS_OK) {
+    free(septree.nodes);
+    septree.nodes = NULL;
+    return rstatus;
+  }
+
+  *r_nnodes = septree.nnodes;
+  *r_tree   = septree.nodes;
+  septree.nodes = NULL;
+
+  return METIS_OK;
+}
+
+
 /*************************************************************************/
 /*! This is the driver for the recursive tri-section of a graph into the
     left, separator, and right partitions. The graphs correspond to the 
@@ -183,7 +343,7 @@ SIGTHROW:
 void MlevelNestedDissection(ctrl_t *ctrl, graph_t *graph, idx_t *order, 
          idx_t lastvtx)
 {
-  idx_t i, j, nvtxs, nbnd;
+  idx_t i, j, nvtxs, nbnd, parent;
   idx_t *label, *bndind;
   graph_t *lgraph, *rgraph;
 
@@ -191,6 +351,8 @@ void MlevelNestedDissection(ctrl_t *ctrl, graph_t *graph, idx_t *order,
 
   MlevelNodeBisectionMultiple(ctrl, graph);
 
+  parent = SepTreePush(lastvtx-nvtxs, lastvtx-graph->nbnd, lastvtx);
+
   IFSET(ctrl->dbglvl, METIS_DBG_SEPINFO, 
       printf("Nvtxs: %6"PRIDX", [%6"PRIDX" %6"PRIDX" %6"PRIDX"]\n", 
         graph->nvtxs, graph->pwgts[0], graph->pwgts[1], graph->pwgts[2]));
@@ -213,15 +375,21 @@ void MlevelNestedDissection(ctrl_t *ctrl, graph_t *graph, idx_t *order,
   if (lgraph->nvtxs > MMDSWITCH && lgraph->nedges > 0) 
     MlevelNestedDissection(ctrl, lgraph, order, lastvtx-rgraph->nvtxs);
   else {
+    SepTreePop(SepTreePush(lastvtx-rgraph->nvtxs-lgraph->nvtxs, 
+        lastvtx-rgraph->nvtxs-lgraph->nvtxs, lastvtx-rgraph->nvtxs));
     MMDOrder(ctrl, lgraph, order, lastvtx-rgraph->nvtxs); 
     FreeGraph(&lgraph);
   }
   if (rgraph->nvtxs > MMDSWITCH && rgraph->nedges > 0) 
     MlevelNestedDissection(ctrl, rgraph, order, lastvtx);
   else {
+    SepTreePop(SepTreePush(lastvtx-rgraph->nvtxs, lastvtx-rgraph->nvtxs, 
+        lastvtx));
     MMDOrder(ctrl, rgraph, order, lastvtx); 
     FreeGraph(&rgraph);
   }
+
+  SepTreePop(parent);
 }
 
 
@@ -236,7 +404,7 @@ void MlevelNestedDissection(ctrl_t *ctrl, graph_t *graph, idx_t *order,
 void MlevelNestedDissectionCC(ctrl_t *ctrl, graph_t *graph, idx_t *order, 
          idx_t lastvtx)
 {
-  idx_t i, j, nvtxs, nbnd, ncmps, rnvtxs, snvtxs;
+  idx_t i, j, nvtxs, nbnd, ncmps, rnvtxs, snvtxs, parent;
   idx_t *label, *bndind;
   idx_t *cptr, *cind;
   graph_t **sgraphs;
@@ -245,6 +413,8 @@ void MlevelNestedDissectionCC(ctrl_t *ctrl, graph_t *graph, idx_t *order,
 
   MlevelNodeBisectionMultiple(ctrl, graph);
 
+  parent = SepTreePush(lastvtx-nvtxs, lastvtx-graph->nbnd, lastvtx);
+
   IFSET(ctrl->dbglvl, METIS_DBG_SEPINFO, 
       printf("Nvtxs: %6"PRIDX", [%6"PRIDX" %6"PRIDX" %6"PRIDX"]\n", 
         graph->nvtxs, graph->pwgts[0], graph->pwgts[1], graph->pwgts[2]));
@@ -283,6 +453,8 @@ void MlevelNestedDissectionCC(ctrl_t *ctrl, graph_t *graph, idx_t *order,
       MlevelNestedDissectionCC(ctrl, sgraphs[i], order, lastvtx-rnvtxs);
     }
     else {
+      SepTreePop(SepTreePush(lastvtx-rnvtxs-snvtxs, lastvtx-rnvtxs-snvtxs, 
+          lastvtx-rnvtxs));
       MMDOrder(ctrl, sgraphs[i], order, lastvtx-rnvtxs);
       FreeGraph(&sgraphs[i]);
     }
@@ -290,6 +462,8 @@ void MlevelNestedDissectionCC(ctrl_t *ctrl, graph_t *graph, idx_t *order,
   }
 
   gk_free((void **)&sgraphs, LTERM);
+
+  SepTreePop(parent);
 }
 
 
@@ -521,6 +521,8 @@ void FreeCtrl(ctrl_t **r_ctrl)
 {
   ctrl_t *ctrl = *r_ctrl;
 
+  RecordRunStats(ctrl);
+
   FreeWorkSpace(ctrl);
 
   gk_free((void **)&ctrl->tpwgts, &ctrl->pijbm, 
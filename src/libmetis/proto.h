@@ -318,6 +318,8 @@ real_t ComputeElementBalance(idx_t, idx_t, idx_t *);
 /* timing.c */
 void InitTimers(ctrl_t *);
 void PrintTimers(ctrl_t *);
+void RecordRunStats(ctrl_t *);
+void RecordCoarsening(idx_t);
 
 /* util.c */
 idx_t iargmax_strd(size_t, idx_t *, idx_t);
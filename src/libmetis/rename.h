@@ -237,6 +237,8 @@
 /* timing.c */
 #define InitTimers			libmetis__InitTimers
 #define PrintTimers			libmetis__PrintTimers
+#define RecordRunStats			libmetis__RecordRunStats
+#define RecordCoarsening		libmetis__RecordCoarsening
 
 /* util.c */
 #define iargmax_strd                    libmetis__iargmax_strd 
@@ -0,0 +1,29 @@
+/*!
+\file  runstats.h
+\brief Per-thread statistics of the METIS runs
+
+The timers and the memory and coarsening statistics of a METIS run are
+recorded for the calling thread when its control structure is freed, so that
+they can be retrieved without parsing the output of PrintTimers(). The timers
+are only updated when METIS_DBG_TIME is set in the debug level.
+*/
+
+#ifndef _LIBMETIS_RUNSTATS_H_
+#define _LIBMETIS_RUNSTATS_H_
+
+#include <stddef.h>
+
+typedef struct {
+  /* CPU seconds spent in the phases of the multilevel paradigm */
+  double totaltime, coarsentime, matchtime, contracttime, initparttime,
+         uncoarsentime, reftime, projecttime, splittime;
+
+  size_t maxmem;        /*!< The maximum # of bytes allocated at any time */
+  size_t ncoarsenings;  /*!< The # of times a graph was coarsened */
+  size_t nlevels;       /*!< The maximum # of levels of a coarsening */
+} metis_runstats_t;
+
+void metis_runstats_reset(void);
+metis_runstats_t *metis_runstats_get(void);
+
+#endif
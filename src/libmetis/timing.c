@@ -61,3 +61,54 @@ void PrintTimers(ctrl_t *ctrl)
 
 
 
+
+
+/* The statistics of the METIS runs of each thread */
+static __thread metis_runstats_t runstats;
+
+
+/*************************************************************************
+* This function clears the statistics of the calling thread
+**************************************************************************/
+void metis_runstats_reset(void)
+{
+  memset(&runstats, 0, sizeof(metis_runstats_t));
+}
+
+
+/*************************************************************************
+* This function returns the statistics of the calling thread
+**************************************************************************/
+metis_runstats_t *metis_runstats_get(void)
+{
+  return &runstats;
+}
+
+
+/*************************************************************************
+* This function adds the timers and the memory usage of a run to the
+* statistics of the calling thread
+**************************************************************************/
+void RecordRunStats(ctrl_t *ctrl)
+{
+  runstats.totaltime     += gk_getcputimer(ctrl->TotalTmr);
+  runstats.coarsentime   += gk_getcputimer(ctrl->CoarsenTmr);
+  runstats.matchtime     += gk_getcputimer(ctrl->MatchTmr);
+  runstats.contracttime  += gk_getcputimer(ctrl->ContractTmr);
+  runstats.initparttime  += gk_getcputimer(ctrl->InitPartTmr);
+  runstats.uncoarsentime += gk_getcputimer(ctrl->UncoarsenTmr);
+  runstats.reftime       += gk_getcputimer(ctrl->RefTmr);
+  runstats.projecttime   += gk_getcputimer(ctrl->ProjectTmr);
+  runstats.splittime     += gk_getcputimer(ctrl->SplitTmr);
+  runstats.maxmem = gk_max(runstats.maxmem, gk_GetMaxMemoryUsed());
+}
+
+
+/*************************************************************************
+* This function records a coarsening of nlevels levels
+**************************************************************************/
+void RecordCoarsening(idx_t nlevels)
+{
+  runstats.ncoarsenings++;
+  runstats.nlevels = gk_max(runstats.nlevels, (size_t)nlevels);
+}